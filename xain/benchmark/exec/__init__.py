@@ -1,6 +1,7 @@
 from absl import flags
 
 from xain.benchmark.net import model_fns
+from xain.helpers import performance
 
 flags.DEFINE_string(
     "task_name",
@@ -24,4 +25,61 @@ flags.DEFINE_integer("B", None, "Batch size")
 
 flags.DEFINE_integer("partition_id", None, "Partition ID for unitary training")
 
+flags.DEFINE_integer(
+    "cores_per_worker",
+    None,
+    "If set, participants train in a pool of processes with one worker per group of "
+    + "this many cores instead of in threads",
+)
+
+flags.DEFINE_integer(
+    "eval_batch_size",
+    None,
+    "Batch size used by the coordinator and participants for validation and "
+    + "evaluation, by default the whole set is evaluated in a single batch",
+)
+
+flags.DEFINE_bool(
+    "async_eval",
+    False,
+    "Validate each round in the background while the next round is training",
+)
+
+flags.DEFINE_bool(
+    "instrument",
+    False,
+    "Time the sections of each round (participant selection, weight broadcast, "
+    + "model init, dataset construction, fit, aggregation, evaluation, ...) and "
+    + "record them in results.json and TensorBoard",
+)
+
+flags.DEFINE_bool("xla", False, "Compile the train step of all models with XLA (JIT)")
+
+flags.DEFINE_enum(
+    "precision",
+    "float32",
+    performance.PRECISIONS,
+    "Precision models train in; mixed_bfloat16 computes layers in bfloat16 while "
+    + "keeping weights in float32",
+)
+flags.register_validator(
+    "precision",
+    lambda precision: precision == "float32" or performance.mixed_precision_available(),
+    message="Mixed precision requires TensorFlow 2.1 or newer",
+)
+
+flags.DEFINE_integer(
+    "checkpoint_every",
+    None,
+    "If set, the state of federated training is checkpointed into output_dir "
+    + "after every this many rounds",
+)
+
+flags.DEFINE_bool(
+    "resume",
+    False,
+    "Continue federated training after the last round checkpointed in output_dir "
+    + "(see checkpoint_every), e.g. after the instance was preempted",
+)
+
 flags.DEFINE_bool("push_results", True, "Indicates if results should be pushed to S3")
@@ -1,10 +1,12 @@
 import atexit
 import time
+from typing import Optional
 
 from absl import app, flags
 
 from xain.datasets import load_splits
-from xain.helpers import storage
+from xain.fl.coordinator import ProcessExecutor
+from xain.helpers import performance, storage, timing
 from xain.ops import results
 
 from . import run
@@ -25,6 +27,10 @@ def main(_):
             after_main, group_name=FLAGS.group_name, task_name=FLAGS.task_name
         )
 
+    timing.enable(FLAGS.instrument)
+    # Has to be configured before the first model is built
+    performance.configure(FLAGS.xla, FLAGS.precision)
+
     # Load data
     xy_train_partitions, xy_val, xy_test = load_splits(FLAGS.dataset)
 
@@ -40,18 +46,32 @@ def main(_):
             xy_test=xy_test,
             E=FLAGS.E,
             B=FLAGS.B,
+            eval_batch_size=FLAGS.eval_batch_size,
         )
     else:
-        hist, _, hist_metrics, loss, acc = run.federated_training(
-            model_name=FLAGS.model,
-            xy_train_partitions=xy_train_partitions,
-            xy_val=xy_val,
-            xy_test=xy_test,
-            R=FLAGS.R,
-            E=FLAGS.E,
-            C=FLAGS.C,
-            B=FLAGS.B,
-        )
+        executor: Optional[ProcessExecutor] = None
+        if FLAGS.cores_per_worker:
+            executor = ProcessExecutor(cores_per_worker=FLAGS.cores_per_worker)
+        try:
+            hist, _, hist_metrics, loss, acc = run.federated_training(
+                model_name=FLAGS.model,
+                xy_train_partitions=xy_train_partitions,
+                xy_val=xy_val,
+                xy_test=xy_test,
+                R=FLAGS.R,
+                E=FLAGS.E,
+                C=FLAGS.C,
+                B=FLAGS.B,
+                executor=executor,
+                eval_batch_size=FLAGS.eval_batch_size,
+                async_eval=FLAGS.async_eval,
+                checkpoint_every=FLAGS.checkpoint_every,
+                resume=FLAGS.resume,
+            )
+        finally:
+            # Stop the worker processes also if training failed
+            if executor:
+                executor.close()
     end = time.time()
 
     # Write results
@@ -65,6 +85,8 @@ def main(_):
         "E": FLAGS.E,
         "C": FLAGS.C,
         "B": FLAGS.B,
+        "xla": FLAGS.xla,
+        "precision": FLAGS.precision,
         "partition_id": partition_id,
         "start": start,
         "end": end,
@@ -74,6 +96,9 @@ def main(_):
         "hist": hist,
         "hist_metrics": hist_metrics,
     }
+    if FLAGS.instrument:
+        # Seconds spent in each section, one entry per round
+        res["timings"] = timing.rounds
     storage.write_json(res, fname="results.json")
 
 
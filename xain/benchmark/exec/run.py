@@ -7,10 +7,12 @@ import tensorflow as tf
 from absl import logging
 
 from xain.benchmark.aggregation import task_accuracies
-from xain.benchmark.net import load_model_fn
+from xain.benchmark.net import load_lr_fn, load_model_fn
 from xain.datasets import load_splits
+from xain.datasets.stats.histograms import label_histograms
 from xain.fl.coordinator import Coordinator, RandomController
 from xain.fl.coordinator.aggregate import Aggregator
+from xain.fl.coordinator.executor import Executor
 from xain.fl.participant import ModelProvider, Participant
 from xain.helpers import storage
 from xain.types import FederatedDatasetPartition, KerasHistory, Metrics
@@ -35,6 +37,7 @@ def unitary_training(
     xy_test: FederatedDatasetPartition,
     E: int,
     B: int,
+    eval_batch_size: Optional[int] = None,
 ) -> Tuple[KerasHistory, float, float]:
 
     model_fn = load_model_fn(model_name)
@@ -49,6 +52,7 @@ def unitary_training(
         xy_val=xy_val,
         num_classes=10,
         batch_size=B,
+        eval_batch_size=eval_batch_size,
     )
     model = model_provider.init_model()
     theta = model.get_weights()
@@ -75,6 +79,11 @@ def federated_training(
     C: float,
     B: int,
     aggregator: Aggregator = None,
+    executor: Executor = None,
+    eval_batch_size: Optional[int] = None,
+    async_eval: bool = False,
+    checkpoint_every: Optional[int] = None,
+    resume: bool = False,
 ) -> Tuple[KerasHistory, List[List[KerasHistory]], List[List[Metrics]], float, float]:
     # Initialize participants and coordinator
     # Note that there is no need for common initialization at this point: Common
@@ -82,13 +91,21 @@ def federated_training(
     # push its own weight to the respective participants of each training round.
 
     model_fn = load_model_fn(model_name)
-    model_provider = ModelProvider(model_fn=model_fn)
+    model_provider = ModelProvider(model_fn=model_fn, lr_fn=load_lr_fn(model_name))
 
-    # Init participants
+    # Init participants; label histograms of all partitions are counted at once
+    histograms = label_histograms([y for _, y in xy_train_partitions], num_classes=10)
     participants = []
     for cid, xy_train in enumerate(xy_train_partitions):
         participant = Participant(
-            cid, model_provider, xy_train, xy_val, num_classes=10, batch_size=B
+            cid,
+            model_provider,
+            xy_train,
+            xy_val,
+            num_classes=10,
+            batch_size=B,
+            volume_by_class=histograms[cid].tolist(),
+            eval_batch_size=eval_batch_size,
         )
         participants.append(participant)
     num_participants = len(participants)
@@ -103,10 +120,14 @@ def federated_training(
         E=E,
         xy_val=xy_val,
         aggregator=aggregator,
+        executor=executor,
+        eval_batch_size=eval_batch_size,
+        async_eval=async_eval,
+        checkpoint_every=checkpoint_every,
     )
 
     # Train model
-    hist_co, hist_ps, hist_metrics = coordinator.fit(num_rounds=R)
+    hist_co, hist_ps, hist_metrics = coordinator.fit(num_rounds=R, resume=resume)
 
     # Evaluate final performance
     loss, acc = coordinator.evaluate(xy_test)
@@ -1,11 +1,11 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional
 
 import tensorflow as tf
 
 from .blog_cnn import blog_cnn_compiled
 from .orig_2nn import orig_2nn_compiled
 from .orig_cnn import orig_cnn_compiled
-from .resnet import resnet20v2_compiled
+from .resnet import resnet20v2_compiled, resnet20v2_lr
 
 model_fns: Dict[str, Callable[[], tf.keras.Model]] = {
     "orig_2nn": orig_2nn_compiled,
@@ -14,9 +14,19 @@ model_fns: Dict[str, Callable[[], tf.keras.Model]] = {
     "resnet20": resnet20v2_compiled,
 }
 
+# Learning rate for a given epoch_base, for models whose learning rate depends on it
+lr_fns: Dict[str, Callable[[int], float]] = {"resnet20": resnet20v2_lr}
+
 
 def load_model_fn(model_name: str) -> Callable[[], tf.keras.Model]:
     assert (
         model_name in model_fns
     ), f"Model name '{model_name}' not in {model_fns.keys()}"
     return model_fns[model_name]
+
+
+def load_lr_fn(model_name: str) -> Optional[Callable[[int], float]]:
+    assert (
+        model_name in model_fns
+    ), f"Model name '{model_name}' not in {model_fns.keys()}"
+    return lr_fns.get(model_name)
@@ -42,7 +42,10 @@ def blog_cnn_compiled(
     model.add(Flatten())
     model.add(Dense(256, activation="relu", kernel_initializer=ki))
     model.add(Dropout(0.5))
-    model.add(Dense(num_classes, activation="softmax", kernel_initializer=ki))
+    # Softmax (and loss) in float32 also with mixed precision, for numeric stability
+    model.add(
+        Dense(num_classes, activation="softmax", kernel_initializer=ki, dtype="float32")
+    )
 
     # Compile model
     optimizer = "adam"
@@ -14,7 +14,10 @@ def orig_2nn_compiled(
     x = Flatten()(inputs)
     x = Dense(200, kernel_initializer=ki, activation="relu")(x)
     x = Dense(200, kernel_initializer=ki, activation="relu")(x)
-    outputs = Dense(num_classes, kernel_initializer=ki, activation="softmax")(x)
+    # Softmax (and loss) in float32 also with mixed precision, for numeric stability
+    outputs = Dense(
+        num_classes, kernel_initializer=ki, activation="softmax", dtype="float32"
+    )(x)
 
     model = tf.keras.Model(inputs=inputs, outputs=outputs)
 
@@ -34,7 +34,10 @@ def orig_cnn_compiled(
     x = MaxPool2D(pool_size=(2, 2), strides=(2, 2))(x)
     x = Flatten()(x)
     x = Dense(512, kernel_initializer=ki, activation="relu")(x)
-    outputs = Dense(num_classes, kernel_initializer=ki, activation="softmax")(x)
+    # Softmax (and loss) in float32 also with mixed precision, for numeric stability
+    outputs = Dense(
+        num_classes, kernel_initializer=ki, activation="softmax", dtype="float32"
+    )(x)
 
     model = tf.keras.Model(inputs=inputs, outputs=outputs)
 
@@ -21,21 +21,23 @@ from tensorflow.keras.regularizers import l2
 
 L2_DEFAULT: float = 1e-4
 KERNEL_INITIALIZER_DEFAULT = "he_normal"
+LR_INITIAL_DEFAULT: float = 0.1
+K_DEFAULT: float = 0.15
 
 
 def resnet20v2_compiled(
     input_shape=(32, 32, 3),  # CIFAR
     num_classes=10,
-    lr_initial: float = 0.1,
+    lr_initial: float = LR_INITIAL_DEFAULT,
     momentum: float = 0.9,
-    k: float = 0.15,
+    k: float = K_DEFAULT,
     epoch_base: int = 0,
 ) -> tf.keras.Model:
     model, _ = resnet(input_shape=(32, 32, 3), num_classes=10, version=2, n=2)
 
     def exp_decay(epoch_optimizer: int) -> float:
         epoch = epoch_base + epoch_optimizer
-        return lr_initial * math.exp(-k * epoch)
+        return resnet20v2_lr(epoch, lr_initial=lr_initial, k=k)
 
     optimizer = tf.keras.optimizers.SGD(lr=exp_decay(0), momentum=momentum)
     model.compile(
@@ -44,6 +46,13 @@ def resnet20v2_compiled(
     return model
 
 
+def resnet20v2_lr(
+    epoch_base: int, lr_initial: float = LR_INITIAL_DEFAULT, k: float = K_DEFAULT
+) -> float:
+    """Learning rate `resnet20v2_compiled` uses when compiled with epoch_base"""
+    return lr_initial * math.exp(-k * epoch_base)
+
+
 def resnet(
     input_shape: Tuple[int, int, int] = (32, 32, 3),
     num_classes: int = 10,
@@ -230,6 +239,7 @@ def resnet_v1(
         activation="softmax",
         kernel_initializer="he_normal",
         kernel_regularizer=l2(l2_dense) if l2_dense is not None else None,
+        dtype="float32",  # Softmax in float32 also with mixed precision
     )(y)
 
     # Instantiate model.
@@ -360,6 +370,7 @@ def resnet_v2(
         activation="softmax",
         kernel_initializer=kernel_initializer,
         kernel_regularizer=l2(l2_dense) if l2_dense is not None else None,
+        dtype="float32",  # Softmax in float32 also with mixed precision
     )(y)
 
     # Instantiate model.
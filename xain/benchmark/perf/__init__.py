@@ -0,0 +1,32 @@
+"""Micro-benchmarks of the parts of federated training which dominate its runtime
+
+Other than the benchmark suites in `xain.benchmark`, which compare the accuracy
+of complete training sessions on EC2, these run locally on CPU within minutes
+and measure how fast aggregation, input pipelines, dataset loading, the
+generator transformers and the overhead of a single round are.
+"""
+from absl import flags
+
+flags.DEFINE_string(
+    "perf_results",
+    "perf.json",
+    "File the results are written to, relative paths are relative to output_dir",
+)
+
+flags.DEFINE_string(
+    "perf_baseline",
+    None,
+    "Results of an earlier run (e.g. on the main branch) to compare against",
+)
+
+flags.DEFINE_float(
+    "perf_tolerance",
+    0.1,
+    "Relative slowdown compared to the baseline which is still not a regression",
+)
+
+flags.DEFINE_list(
+    "perf_only", None, "Glob patterns of the benchmarks to run, all if not given"
+)
+
+flags.DEFINE_integer("perf_repeat", 5, "Number of timed runs of each benchmark")
@@ -0,0 +1,68 @@
+import os
+import platform
+import time
+
+import numpy as np
+import tensorflow as tf
+from absl import app, flags, logging
+
+from xain.helpers import storage
+
+from . import measure, suite
+
+FLAGS = flags.FLAGS
+
+
+def environment():
+    """Describes where the results were measured, they are only comparable to
+    results measured in the same environment"""
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "tensorflow": tf.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(_):
+    results = suite.run(patterns=FLAGS.perf_only, repeat=FLAGS.perf_repeat)
+
+    storage.write_json(
+        {"time": time.time(), "environment": environment(), "benchmarks": results},
+        fname=FLAGS.perf_results,
+    )
+
+    if FLAGS.perf_baseline is None:
+        return 0
+
+    baseline = storage.read_json(FLAGS.perf_baseline)
+    if baseline["environment"] != environment():
+        logging.warning("Baseline was measured in a different environment")
+
+    for name, result in sorted(results.items()):
+        if name in baseline["benchmarks"]:
+            baseline_seconds = baseline["benchmarks"][name]["seconds"]
+            logging.info(
+                "{}: {:.4f}s (baseline {:.4f}s, {:+.1%})".format(
+                    name,
+                    result["seconds"],
+                    baseline_seconds,
+                    result["seconds"] / baseline_seconds - 1,
+                )
+            )
+
+    regressions = measure.compare(
+        results, baseline["benchmarks"], tolerance=FLAGS.perf_tolerance
+    )
+    for name, baseline_seconds, seconds in regressions:
+        logging.error(
+            "Regression in {}: {:.4f}s instead of {:.4f}s".format(
+                name, seconds, baseline_seconds
+            )
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    app.run(main=main)
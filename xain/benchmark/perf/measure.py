@@ -0,0 +1,65 @@
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (benchmark name, seconds in baseline, seconds)
+Regression = Tuple[str, float, float]
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int = 5,
+    warmup: int = 1,
+    setup: Optional[Callable[[], object]] = None,
+    items: Optional[int] = None,
+) -> Dict:
+    """Times `repeat` calls of fn after `warmup` calls which are not timed
+
+    Parameters:
+    fn (Callable): Function to be timed
+    repeat (int): Number of timed calls
+    warmup (int): Number of calls before, e.g. to build and cache graphs
+    setup (Callable): Called before each call of fn without being timed
+    items (int): Number of items (e.g. examples) fn processes per call
+
+    Returns:
+        Dict: Median, min and max of the durations in seconds, and the throughput
+            in items per second if items is given
+    """
+    assert repeat >= 1
+    durations = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        duration = time.perf_counter() - start
+        if i >= warmup:
+            durations.append(duration)
+
+    seconds = statistics.median(durations)
+    result = {
+        "seconds": seconds,
+        "min": min(durations),
+        "max": max(durations),
+        "repeat": repeat,
+    }
+    if items is not None:
+        result["items_per_second"] = items / seconds
+    return result
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Regression]:
+    """Returns all benchmarks which took more than (1 + tolerance) times as long
+    as in baseline
+
+    Benchmarks which are missing in either of both are ignored.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        baseline_seconds = baseline[name]["seconds"]
+        if result["seconds"] > baseline_seconds * (1 + tolerance):
+            regressions.append((name, baseline_seconds, result["seconds"]))
+    return regressions
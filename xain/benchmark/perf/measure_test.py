@@ -0,0 +1,34 @@
+from .measure import compare, measure
+
+
+def test_measure():
+    # Prepare
+    calls = []
+    setups = []
+
+    # Execute
+    result = measure(
+        lambda: calls.append(len(setups)),
+        repeat=3,
+        warmup=2,
+        setup=lambda: setups.append(None),
+        items=10,
+    )
+
+    # Assert
+    assert calls == [1, 2, 3, 4, 5]
+    assert result["repeat"] == 3
+    assert 0 <= result["min"] <= result["seconds"] <= result["max"]
+    assert result["items_per_second"] == 10 / result["seconds"]
+
+
+def test_compare():
+    # Prepare
+    baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}
+    results = {"a": {"seconds": 1.05}, "b": {"seconds": 1.2}, "d": {"seconds": 9.0}}
+
+    # Execute
+    regressions = compare(results, baseline, tolerance=0.1)
+
+    # Assert
+    assert regressions == [("b", 1.0, 1.2)]
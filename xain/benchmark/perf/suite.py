@@ -0,0 +1,306 @@
+"""Benchmarks of the micro-benchmark suite
+
+Every benchmark prepares synthetic data shaped like the real datasets, so the
+suite neither needs to fetch any dataset nor to train a model to convergence.
+"""
+import fnmatch
+import os
+import tempfile
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import tensorflow as tf
+from absl import flags, logging
+
+from xain.benchmark.net import model_fns
+from xain.datasets import hashes, prep, storage
+from xain.fl.coordinator import Coordinator, RoundRobinController
+from xain.fl.coordinator.aggregate import evo_agg, federated_averaging
+from xain.fl.participant import ModelProvider, Participant
+from xain.generator import transformer
+from xain.helpers.sha1 import checksum
+from xain.types import KerasWeights
+
+from .measure import measure
+
+FLAGS = flags.FLAGS
+
+SEED = 2019
+
+# Shapes of a single example of the datasets used in the benchmarks
+EXAMPLE_SHAPES = {"fashion-mnist": (28, 28), "cifar-10": (32, 32, 3)}
+
+# Models whose weights are aggregated, from about 0.2M (orig_2nn) to 1.7M
+# (orig_cnn) parameters
+AGGREGATION_MODELS = ["orig_2nn", "blog_cnn", "resnet20", "orig_cnn"]
+AGGREGATION_PARTICIPANTS = [10, 50]
+
+# Name under which the dataset of the `load_splits` benchmarks is registered
+LOAD_SPLITS_DATASET = "perf-load-splits"
+
+
+class ConstantEvaluatorPool:  # pylint: disable=too-few-public-methods
+    """Stands in for an `EvaluatorPool` so only the aggregation of `evo_agg` is
+    timed, not the evaluation of the candidates on Keras models"""
+
+    def evaluate_all(self, thetas: List[KerasWeights]):
+        return [(float(i), 0.0) for i in range(len(thetas))]
+
+
+def create_xy(
+    num_examples: int, example_shape=EXAMPLE_SHAPES["fashion-mnist"], num_classes=10
+):
+    random = np.random.RandomState(SEED)
+    x = random.randint(0, 256, size=(num_examples,) + example_shape, dtype=np.uint8)
+    y = random.randint(0, num_classes, size=num_examples).astype(np.uint8)
+    return x, y
+
+
+def create_thetas(model_name: str, num_participants: int) -> List[KerasWeights]:
+    random = np.random.RandomState(SEED)
+    theta = model_fns[model_name]().get_weights()
+    return [
+        [w + random.normal(scale=0.01, size=w.shape).astype(w.dtype) for w in theta]
+        for _ in range(num_participants)
+    ]
+
+
+def bench_federated_averaging(
+    repeat: int, model_name: str, num_participants: int
+) -> Dict:
+    thetas = create_thetas(model_name, num_participants)
+    weighting = np.random.RandomState(SEED).randint(100, 1000, size=num_participants)
+    return measure(lambda: federated_averaging(thetas, weighting), repeat=repeat)
+
+
+def bench_evo_agg(repeat: int, model_name: str, num_participants: int) -> Dict:
+    thetas = create_thetas(model_name, num_participants)
+    evaluator_pool = ConstantEvaluatorPool()
+    return measure(
+        lambda: evo_agg(thetas, evaluator_pool, population_size=10),  # type: ignore
+        repeat=repeat,
+    )
+
+
+def consume(ds: tf.data.Dataset, num_batches: int):
+    """Iterates over the first num_batches of ds, in graph as in eager mode"""
+    ds = ds.take(num_batches)
+    if tf.executing_eagerly():
+        for _ in ds:
+            pass
+        return
+    next_batch = tf.compat.v1.data.make_one_shot_iterator(ds).get_next()
+    with tf.compat.v1.Session() as session:
+        for _ in range(num_batches):
+            session.run(next_batch)
+
+
+def bench_init_ds_train(
+    repeat: int,
+    dataset_name: str,
+    num_examples: int = 6400,
+    batch_size: int = 64,
+    augmentation: bool = False,
+) -> Dict:
+    """Throughput (in examples per second) of building the input pipeline of a
+    participant and passing all of its examples once"""
+    xy = create_xy(num_examples, EXAMPLE_SHAPES[dataset_name])
+
+    def consume_once():
+        ds = prep.init_ds_train(xy, batch_size=batch_size, augmentation=augmentation)
+        consume(ds, num_examples // batch_size)
+
+    return measure(consume_once, repeat=repeat, items=num_examples)
+
+
+def bench_load_splits(
+    repeat: int,
+    warm: bool,
+    mmap: bool = False,
+    num_partitions: int = 10,
+    num_examples: int = 60000,
+) -> Dict:
+    """Loads a (fashion-mnist sized) dataset from local files
+
+    Cold loads hash every file, warm loads find the checksums of all files in the
+    checksum cache. The files are in the page cache in both cases.
+    """
+    xy_train = create_xy(num_examples)
+    xy_splits = {
+        "{:02d}".format(i): (x, y)
+        for i, (x, y) in enumerate(
+            zip(*[np.split(a, num_partitions) for a in xy_train])
+        )
+    }
+    xy_splits["val"] = create_xy(num_examples // 10)
+    xy_splits["test"] = create_xy(num_examples // 6)
+
+    fetch_datasets, datasets_cache_dir = FLAGS.fetch_datasets, FLAGS.datasets_cache_dir
+    with tempfile.TemporaryDirectory() as local_datasets_dir:
+        dataset_dir = storage.get_dataset_dir(LOAD_SPLITS_DATASET, local_datasets_dir)
+        split_hashes = {}
+        for split_id, (x, y) in xy_splits.items():
+            fpaths = [
+                os.path.join(dataset_dir, "{}_{}.npy".format(name, split_id))
+                for name in ["x", "y"]
+            ]
+            np.save(fpaths[0], x)
+            np.save(fpaths[1], y)
+            split_hashes[split_id] = [checksum(fpath) for fpath in fpaths]
+
+        def remove_checksum_cache():
+            fpath = os.path.join(dataset_dir, storage.CHECKSUM_CACHE_FNAME)
+            if os.path.isfile(fpath):
+                os.remove(fpath)
+
+        hashes.datasets[LOAD_SPLITS_DATASET] = split_hashes
+        FLAGS.fetch_datasets = False
+        FLAGS.datasets_cache_dir = None
+        try:
+            return measure(
+                lambda: storage.load_splits(
+                    LOAD_SPLITS_DATASET,
+                    get_local_datasets_dir=lambda: local_datasets_dir,
+                    mmap=mmap,
+                ),
+                repeat=repeat,
+                setup=None if warm else remove_checksum_cache,
+                items=num_examples,
+            )
+        finally:
+            del hashes.datasets[LOAD_SPLITS_DATASET]
+            FLAGS.fetch_datasets = fetch_datasets
+            FLAGS.datasets_cache_dir = datasets_cache_dir
+
+
+def bench_transformer(
+    repeat: int, fn: Callable, with_x: bool = False, num_examples: int = 60000, **kwargs
+) -> Dict:
+    """Runs a transformer (with_x) or its permutation on a fashion-mnist sized,
+    balanced training set"""
+    x, _ = create_xy(num_examples)
+    y = np.random.RandomState(SEED).permutation(np.arange(num_examples) % 10)
+    if with_x:
+        return measure(lambda: fn(x, y, **kwargs), repeat=repeat, items=num_examples)
+    return measure(lambda: fn(y, **kwargs), repeat=repeat, items=num_examples)
+
+
+def bench_fit_round(
+    repeat: int,
+    model_name: str = "blog_cnn",
+    num_participants: int = 4,
+    num_examples: int = 128,
+    batch_size: int = 32,
+) -> Dict:
+    """One round of training in which all participants train for one epoch
+
+    The participants are so small that the time is dominated by the overhead of
+    the round: broadcasting weights, preparing the participants' models and
+    datasets, starting the training, and aggregation. The first round, which
+    also builds the models and input pipelines, is not timed.
+    """
+    model_provider = ModelProvider(model_fns[model_name])
+    xy = create_xy(num_examples)
+    participants = [
+        Participant(cid, model_provider, xy, xy, num_classes=10, batch_size=batch_size)
+        for cid in range(num_participants)
+    ]
+    coordinator = Coordinator(
+        RoundRobinController(num_participants),
+        model_provider,
+        participants,
+        C=1.0,
+        E=1,
+        xy_val=xy,
+    )
+    indices = list(range(num_participants))
+    return measure(
+        lambda: coordinator.fit_round(indices, 1),
+        repeat=repeat,
+        items=num_participants * num_examples,
+    )
+
+
+benchmarks: Dict[str, Callable[[int], Dict]] = {
+    **{
+        "aggregation/{}/{}/{}p".format(fn.__name__, model_name, num_participants): (
+            partial(bench_fn, model_name=model_name, num_participants=num_participants)
+        )
+        for fn, bench_fn in [
+            (federated_averaging, bench_federated_averaging),
+            (evo_agg, bench_evo_agg),
+        ]
+        for model_name in AGGREGATION_MODELS
+        for num_participants in AGGREGATION_PARTICIPANTS
+    },
+    "prep/init_ds_train/fashion-mnist": partial(
+        bench_init_ds_train, dataset_name="fashion-mnist"
+    ),
+    "prep/init_ds_train/cifar-10": partial(
+        bench_init_ds_train, dataset_name="cifar-10"
+    ),
+    "prep/init_ds_train/cifar-10-augmentation": partial(
+        bench_init_ds_train, dataset_name="cifar-10", augmentation=True
+    ),
+    "storage/load_splits/cold": partial(bench_load_splits, warm=False),
+    "storage/load_splits/warm": partial(bench_load_splits, warm=True),
+    "storage/load_splits/warm-mmap": partial(bench_load_splits, warm=True, mmap=True),
+    "generator/random_shuffle": partial(
+        bench_transformer, fn=transformer.random_shuffle, with_x=True
+    ),
+    "generator/random_shuffle_permutation": partial(
+        bench_transformer, fn=transformer.random_shuffle_permutation
+    ),
+    "generator/classes_balanced_randomized_per_partition_permutation": partial(
+        bench_transformer,
+        fn=transformer.classes_balanced_randomized_per_partition_permutation,
+        num_partitions=100,
+    ),
+    "generator/sort_by_class_permutation": partial(
+        bench_transformer, fn=transformer.sort_by_class_permutation
+    ),
+    "generator/one_biased_class_per_partition_permutation": partial(
+        bench_transformer, fn=transformer.one_biased_class_per_partition_permutation
+    ),
+    "generator/class_per_partition_permutation": partial(
+        bench_transformer,
+        fn=transformer.class_per_partition_permutation,
+        num_partitions=100,
+        cpp=2,
+    ),
+    "generator/class_per_partition_permutation-seeded": partial(
+        bench_transformer,
+        fn=transformer.class_per_partition_permutation,
+        num_partitions=100,
+        cpp=2,
+        seed=SEED,
+    ),
+    "coordinator/fit_round": bench_fit_round,
+}
+
+
+def select_benchmarks(patterns: Optional[List[str]]) -> List[str]:
+    """Returns the benchmark names matching any of the glob patterns, all if no
+    patterns are given"""
+    if not patterns:
+        return list(benchmarks)
+    return [
+        name
+        for name in benchmarks
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+    ]
+
+
+def run(patterns: Optional[List[str]] = None, repeat: int = 5) -> Dict[str, Dict]:
+    """Runs all benchmarks matching patterns, one after another
+
+    Returns:
+        Dict[str, Dict]: Result of `measure` by benchmark name
+    """
+    results = {}
+    for name in select_benchmarks(patterns):
+        logging.info("Running {}".format(name))
+        results[name] = benchmarks[name](repeat)
+        logging.info("{}: {:.4f}s".format(name, results[name]["seconds"]))
+    return results
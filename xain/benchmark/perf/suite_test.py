@@ -0,0 +1,59 @@
+import pytest
+from absl import flags
+
+from xain.datasets import hashes
+
+from . import suite
+
+FLAGS = flags.FLAGS
+
+
+def test_select_benchmarks():
+    # Execute
+    names = suite.select_benchmarks(["storage/*", "coordinator/fit_round"])
+
+    # Assert
+    assert names == [
+        "storage/load_splits/cold",
+        "storage/load_splits/warm",
+        "storage/load_splits/warm-mmap",
+        "coordinator/fit_round",
+    ]
+
+
+def test_run_generator():
+    # Execute
+    results = suite.run(["generator/*"], repeat=1)
+
+    # Assert
+    assert list(results) == suite.select_benchmarks(["generator/*"])
+    for result in results.values():
+        assert result["seconds"] > 0
+        assert result["items_per_second"] > 0
+
+
+def test_bench_load_splits():
+    # Prepare
+    fetch_datasets = FLAGS.fetch_datasets
+
+    # Execute
+    result = suite.bench_load_splits(
+        repeat=2, warm=False, num_partitions=2, num_examples=600
+    )
+
+    # Assert
+    assert result["repeat"] == 2
+    assert result["items_per_second"] > 0
+    assert suite.LOAD_SPLITS_DATASET not in hashes.datasets
+    assert FLAGS.fetch_datasets == fetch_datasets
+
+
+@pytest.mark.slow
+def test_bench_fit_round():
+    # Execute
+    result = suite.bench_fit_round(
+        repeat=1, num_participants=2, num_examples=32, batch_size=16
+    )
+
+    # Assert
+    assert result["items_per_second"] > 0
@@ -10,6 +10,8 @@ from xain.helpers import project
 # Storage dir for bigger files like the datasets
 storage_dir = Path.home().joinpath(".xain")
 datasets_dir_default = storage_dir.joinpath("datasets")
+# Host-wide dataset cache shared by all local docker tasks
+datasets_cache_dir_default = storage_dir.joinpath("datasets-cache")
 
 # Local outputs and remote results
 root_dir = project.root()
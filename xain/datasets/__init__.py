@@ -4,7 +4,7 @@ from absl import flags
 
 import xain.config
 
-from .dataset import load_splits
+from .dataset import load_splits, load_virtual
 
 c = xain.config.load()
 
@@ -25,3 +25,15 @@ flags.DEFINE_boolean(
     True,
     "Indicates if remote datasets should be fetched if required.",
 )
+flags.DEFINE_boolean(
+    "mmap_datasets",
+    False,
+    "Indicates if dataset splits should be memory-mapped instead of read into memory. "
+    + "Pages of a split are then only read once its examples are accessed.",
+)
+flags.DEFINE_string(
+    "datasets_cache_dir",
+    None,
+    "Content-addressed dataset cache shared by all tasks on a host (see "
+    + "xain.datasets.cache). Used before local_datasets_dir if set.",
+)
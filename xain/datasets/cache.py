@@ -0,0 +1,94 @@
+"""Host-wide, content-addressed cache of dataset files
+
+Files are stored under the sha1 checksum given for them in `xain.datasets.hashes`,
+i.e. as `<cache_dir>/<sha1[:2]>/<sha1>`. A blob is only moved into the cache once
+its checksum was verified, so blobs can be used without hashing them again and
+identical files of different datasets are stored only once.
+
+Several processes, e.g. all docker containers of a benchmark on one host, can
+share one cache: a file lock per blob makes sure every blob is fetched only once.
+Processes which only read from the cache (e.g. through a read-only mount) don't
+need any locking at all.
+"""
+import concurrent.futures
+import fcntl
+import os
+from typing import List, Optional, Tuple
+
+from absl import logging
+
+from . import fetch, hashes, packed, virtual
+
+
+def blob_path(cache_dir: str, sha1: str) -> str:
+    return os.path.join(cache_dir, sha1[:2], sha1)
+
+
+def lookup(cache_dir: str, sha1: str) -> Optional[str]:
+    """Returns the path of the blob with checksum sha1 if it is in the cache"""
+    fpath = blob_path(cache_dir, sha1)
+    return fpath if os.path.isfile(fpath) else None
+
+
+def is_writable(cache_dir: str) -> bool:
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.access(cache_dir, os.W_OK)
+
+
+def fetch_blob(cache_dir: str, url: str, sha1: str) -> str:
+    """Returns the path of the blob with checksum sha1, fetching it from url first
+    if it is not in the cache yet"""
+    fpath = blob_path(cache_dir, sha1)
+    if os.path.isfile(fpath):
+        return fpath
+
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    with open("{}.lock".format(fpath), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Another process might have fetched the blob while we were waiting
+            if not os.path.isfile(fpath):
+                fetch.fetch(url, fpath, expected_sha1=sha1)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return fpath
+
+
+def dataset_files(dataset_name: str) -> List[Tuple[str, str]]:
+    """Returns (file name, sha1) of all files of a dataset"""
+    dataset_hashes = hashes.datasets[dataset_name]
+    if packed.HASH_KEY in dataset_hashes:
+        return [(packed.PACKED_FNAME, dataset_hashes[packed.HASH_KEY])]
+    if virtual.HASH_KEY in dataset_hashes:
+        return [(virtual.INDEX_FNAME, dataset_hashes[virtual.HASH_KEY]["index"])]
+
+    files = []
+    for split_id, (x_hash, y_hash) in dataset_hashes.items():
+        files.append(("x_{}.npy".format(split_id), x_hash))
+        files.append(("y_{}.npy".format(split_id), y_hash))
+    return files
+
+
+def prefetch_dataset(cache_dir: str, dataset_name: str, datasets_repository: str):
+    """Fetches all files of a dataset into the cache which are not in it yet"""
+    logging.info("Prefetching {} into {}".format(dataset_name, cache_dir))
+
+    dataset_hashes = hashes.datasets[dataset_name]
+    if virtual.HASH_KEY in dataset_hashes:
+        # The files of the base dataset are stored under its own name
+        prefetch_dataset(
+            cache_dir, dataset_hashes[virtual.HASH_KEY]["base"], datasets_repository
+        )
+
+    def fetch_file(fname: str, sha1: str) -> str:
+        url = "{}/{}/{}".format(datasets_repository, dataset_name, fname)
+        return fetch_blob(cache_dir, url, sha1)
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        future_results = [
+            executor.submit(fetch_file, fname, sha1)
+            for fname, sha1 in dataset_files(dataset_name)
+        ]
+        for future in future_results:
+            future.result()
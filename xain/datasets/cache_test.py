@@ -0,0 +1,66 @@
+import concurrent.futures
+import hashlib
+import os
+import time
+
+from absl import flags
+
+from . import cache, fetch, storage
+
+FLAGS = flags.FLAGS
+
+CONTENT = b"xain" * 1024
+SHA1 = hashlib.sha1(CONTENT).hexdigest()
+
+
+def fake_fetch(urls_fetched):
+    def fn(url, fpath, expected_sha1=None):
+        urls_fetched.append(url)
+        time.sleep(0.05)  # Give concurrent callers a chance to race
+        with open(fpath, "wb") as f:
+            f.write(CONTENT)
+        return expected_sha1
+
+    return fn
+
+
+def test_fetch_blob_fetches_once(tmp_path, monkeypatch):
+    # Prepare
+    urls_fetched = []
+    monkeypatch.setattr(fetch, "fetch", fake_fetch(urls_fetched))
+    cache_dir = str(tmp_path)
+
+    # Execute
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        fpaths = list(
+            executor.map(
+                lambda _: cache.fetch_blob(cache_dir, "http://x/y", SHA1), range(4)
+            )
+        )
+
+    # Assert
+    assert urls_fetched == ["http://x/y"]
+    assert fpaths == [cache.blob_path(cache_dir, SHA1)] * 4
+    assert cache.lookup(cache_dir, SHA1) == fpaths[0]
+
+
+def test_fetch_and_verify_uses_cache(tmp_path, monkeypatch):
+    # Prepare
+    cache_dir = os.path.join(tmp_path, "cache")
+    fpath_expected = cache.blob_path(cache_dir, SHA1)
+    os.makedirs(os.path.dirname(fpath_expected))
+    with open(fpath_expected, "wb") as f:
+        f.write(CONTENT)
+    monkeypatch.setattr(FLAGS, "datasets_cache_dir", cache_dir)
+    monkeypatch.setattr(FLAGS, "fetch_datasets", False)
+
+    # Execute
+    fpath_actual = storage.fetch_and_verify(
+        dataset_name="mock_dataset",
+        fname="x_00.npy",
+        fhash=SHA1,
+        local_datasets_dir=os.path.join(tmp_path, "datasets"),
+    )
+
+    # Assert
+    assert fpath_actual == fpath_expected
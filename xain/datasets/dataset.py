@@ -1,7 +1,9 @@
+from typing import Optional
+
 import tensorflow as tf
 from absl import flags
 
-from xain.datasets import storage
+from xain.datasets import hashes, storage, virtual
 from xain.types import FederatedDataset
 
 FLAGS = flags.FLAGS
@@ -56,8 +58,28 @@ config = {
 
 
 def load_splits(
-    dataset_name: str, get_local_datasets_dir=storage.default_get_local_datasets_dir
+    dataset_name: str,
+    get_local_datasets_dir=storage.default_get_local_datasets_dir,
+    mmap: Optional[bool] = None,
 ) -> FederatedDataset:
+    """Loads all splits of a dataset; memory-maps them if `mmap` (defaults to the
+    `mmap_datasets` flag) is set, so only the partitions used get paged in"""
     return storage.load_splits(
-        dataset_name=dataset_name, get_local_datasets_dir=get_local_datasets_dir
+        dataset_name=dataset_name,
+        get_local_datasets_dir=get_local_datasets_dir,
+        mmap=FLAGS.mmap_datasets if mmap is None else mmap,
+    )
+
+
+def load_virtual(
+    dataset_name: str,
+    get_local_datasets_dir=storage.default_get_local_datasets_dir,
+    mmap: Optional[bool] = None,
+) -> virtual.VirtualDataset:
+    """Loads a virtual dataset without gathering any of its partitions yet"""
+    return storage.load_virtual(
+        dataset_name=dataset_name,
+        virtual_hashes=hashes.datasets[dataset_name][virtual.HASH_KEY],
+        local_datasets_dir=get_local_datasets_dir(),
+        mmap=FLAGS.mmap_datasets if mmap is None else mmap,
     )
@@ -0,0 +1,160 @@
+"""Downloads dataset files from the remote datasets repository
+
+Files are downloaded into a `.part` file next to their destination and only
+moved into place once complete, so an interrupted download never leaves a
+truncated file behind. A later attempt resumes the `.part` file with an HTTP
+Range request. The sha1 checksum is computed while downloading, so a fetched
+file does not need to be read again to verify it.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+import requests
+from absl import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+MAX_ATTEMPTS = 5
+BACKOFF_FACTOR = 0.5  # Seconds, doubled after every failed attempt
+POOL_MAXSIZE = 32  # Connections kept alive per host
+# Seconds to wait for a connection and between two received bytes; a stalled
+# download fails after the read timeout and is then resumed
+TIMEOUT = (10.0, 60.0)
+
+session_lock = threading.Lock()
+session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """Returns the session shared by all fetches so connections are reused"""
+    global session  # pylint: disable=global-statement
+    with session_lock:
+        if session is None:
+            session = requests.Session()
+            # Retry failed connections and server errors before any data is received
+            retry = Retry(
+                total=MAX_ATTEMPTS,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=[500, 502, 503, 504],
+            )
+            adapter = HTTPAdapter(
+                pool_connections=POOL_MAXSIZE,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=retry,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        return session
+
+
+def fetch(
+    url: str,
+    fpath: str,
+    expected_sha1: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> str:
+    """Downloads url to fpath, resuming a previous partial download if present
+
+    Parameters:
+    url (str): URL of the file
+    fpath (str): Destination of the file
+    expected_sha1 (str): If given, fpath is only created if the checksum matches
+    chunk_size (int): Number of bytes written at once
+    max_attempts (int): Number of attempts before an interrupted download fails
+
+    Returns:
+        str: sha1 checksum of the downloaded file
+    """
+    part_fpath = "{}.part".format(fpath)
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            sha1 = fetch_part(url, part_fpath, chunk_size)
+            break
+        except (
+            requests.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.Timeout,
+        ) as e:
+            if attempt == max_attempts:
+                raise
+            backoff = BACKOFF_FACTOR * 2 ** (attempt - 1)
+            logging.warning(
+                "Fetching {} failed ({}), resuming in {}s".format(url, e, backoff)
+            )
+            time.sleep(backoff)
+
+    if expected_sha1 is not None and sha1 != expected_sha1:
+        # Start from scratch next time instead of resuming a corrupt file
+        os.remove(part_fpath)
+        raise Exception(
+            "Given hash {} for url {} does not match".format(expected_sha1, url)
+        )
+
+    os.replace(part_fpath, fpath)
+
+    return sha1
+
+
+def fetch_part(url: str, part_fpath: str, chunk_size: int) -> str:
+    """Appends the missing remainder of url to part_fpath
+
+    Returns:
+        str: sha1 checksum of the complete file
+    """
+    sha1 = hashlib.sha1()
+    offset = 0
+    if os.path.isfile(part_fpath):
+        # Hash what is already there so the checksum covers the whole file
+        with open(part_fpath, "rb") as f:
+            for data in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(data)
+                offset += len(data)
+
+    headers = {"Range": "bytes={}-".format(offset)} if offset > 0 else {}
+
+    logging.info("Fetching file {} (offset {})".format(url, offset))
+
+    with get_session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+        if r.status_code == 416:
+            # Nothing left to fetch, the part file is already complete
+            return sha1.hexdigest()
+        if r.status_code == 200 and offset > 0:
+            # The server ignored the Range header, start from scratch
+            sha1 = hashlib.sha1()
+            offset = 0
+        elif r.status_code not in (200, 206):
+            raise Exception(
+                "Received HTTP Status {} for url {}".format(r.status_code, url)
+            )
+        size = expected_size(r)
+
+        with open(part_fpath, "ab" if offset > 0 else "wb") as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if chunk:  # filter out keep-alive new chunks
+                    sha1.update(chunk)
+                    f.write(chunk)
+                    offset += len(chunk)
+
+    if size is not None and offset != size:
+        # The connection was closed early; the next attempt resumes from here
+        raise requests.ConnectionError(
+            "Received {} of {} bytes for url {}".format(offset, size, url)
+        )
+
+    return sha1.hexdigest()
+
+
+def expected_size(r: requests.Response) -> Optional[int]:
+    """Returns the size of the complete file if the response tells it"""
+    if r.status_code == 206:
+        # Content-Range: bytes <first>-<last>/<size>
+        size = r.headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        size = r.headers.get("Content-Length", "")
+    return int(size) if size.isdigit() else None
@@ -0,0 +1,157 @@
+import hashlib
+import http.server
+import os
+import socketserver
+import threading
+
+import pytest
+
+from . import fetch
+
+# pylint: disable=redefined-outer-name
+
+CONTENT = bytes(range(256)) * 64
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves CONTENT, supports Range requests and closes the first response early
+    if the server's `truncate_once` is set, or stalls in the middle of it if
+    `stall_once` is set"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests.append(self.headers.get("Range"))
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header[len("bytes=") : -1])
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+            )
+        else:
+            self.send_response(200)
+        body = CONTENT[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.truncate_once:
+            self.server.truncate_once = False
+            body = body[: len(body) // 2]
+            self.close_connection = True
+        if self.server.stall_once:
+            self.server.stall_once = False
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            # Send nothing more until the test is over
+            self.server.stop_stalling.wait()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    # Requests are handled in threads, so a stalled response doesn't block others
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    httpd.requests = []
+    httpd.truncate_once = False
+    httpd.stall_once = False
+    httpd.stop_stalling = threading.Event()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.stop_stalling.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server) -> str:
+    return "http://127.0.0.1:{}/x_00.npy".format(server.server_address[1])
+
+
+def test_fetch(tmp_path, server):
+    # Prepare
+    fpath = os.path.join(tmp_path, "x_00.npy")
+
+    # Execute
+    sha1 = fetch.fetch(url(server), fpath, chunk_size=1000)
+
+    # Assert
+    with open(fpath, "rb") as f:
+        assert f.read() == CONTENT
+    assert sha1 == hashlib.sha1(CONTENT).hexdigest()
+    assert not os.path.exists(fpath + ".part")
+
+
+def test_fetch_resumes_part_file(tmp_path, server):
+    # Prepare
+    fpath = os.path.join(tmp_path, "x_00.npy")
+    with open(fpath + ".part", "wb") as f:
+        f.write(CONTENT[:1000])
+
+    # Execute
+    sha1 = fetch.fetch(url(server), fpath)
+
+    # Assert
+    assert server.requests == ["bytes=1000-"]
+    with open(fpath, "rb") as f:
+        assert f.read() == CONTENT
+    assert sha1 == hashlib.sha1(CONTENT).hexdigest()
+
+
+def test_fetch_resumes_after_connection_loss(tmp_path, server, monkeypatch):
+    # Prepare
+    monkeypatch.setattr(fetch, "BACKOFF_FACTOR", 0.0)
+    server.truncate_once = True
+    fpath = os.path.join(tmp_path, "x_00.npy")
+
+    # Execute
+    sha1 = fetch.fetch(url(server), fpath, chunk_size=1000)
+
+    # Assert
+    assert len(server.requests) == 2
+    assert server.requests[0] is None
+    assert server.requests[1].startswith("bytes=")
+    with open(fpath, "rb") as f:
+        assert f.read() == CONTENT
+    assert sha1 == hashlib.sha1(CONTENT).hexdigest()
+
+
+def test_fetch_resumes_after_stall(tmp_path, server, monkeypatch):
+    # Prepare
+    monkeypatch.setattr(fetch, "BACKOFF_FACTOR", 0.0)
+    monkeypatch.setattr(fetch, "TIMEOUT", (1.0, 0.2))
+    server.stall_once = True
+    fpath = os.path.join(tmp_path, "x_00.npy")
+
+    # Execute
+    sha1 = fetch.fetch(url(server), fpath, chunk_size=1000)
+
+    # Assert
+    assert len(server.requests) == 2
+    assert server.requests[0] is None
+    assert server.requests[1].startswith("bytes=")
+    with open(fpath, "rb") as f:
+        assert f.read() == CONTENT
+    assert sha1 == hashlib.sha1(CONTENT).hexdigest()
+
+
+def test_fetch_wrong_hash(tmp_path, server):
+    # Prepare
+    fpath = os.path.join(tmp_path, "x_00.npy")
+
+    # Execute & Assert
+    with pytest.raises(Exception):
+        fetch.fetch(url(server), fpath, expected_sha1="wrong_hash")
+    assert not os.path.exists(fpath)
+    assert not os.path.exists(fpath + ".part")
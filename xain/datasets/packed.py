@@ -0,0 +1,146 @@
+"""Packed single-file format for federated datasets
+
+All splits of a dataset are stored in one file:
+
+- MAGIC (8 bytes) followed by the length of the index (little-endian uint64)
+- The index as UTF-8 encoded JSON
+- Zero padding up to the next multiple of PAGE_SIZE
+- The raw C-order bytes of every ndarray, each one starting at a multiple of
+  PAGE_SIZE
+
+The index lists for each split (in order: "00", "01", ..., "val", "test") the
+offset, shape, dtype and sha1 checksum of its x and y ndarrays. Offsets are
+relative to the start of the data section, which itself starts at the first page
+boundary after the index.
+
+Opening a packed dataset costs one file open and one index read: the file is
+memory-mapped once and every ndarray is a zero-copy, read-only slice of it.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from xain.types import FederatedDataset
+
+MAGIC = b"XAINPACK"
+VERSION = 1
+PAGE_SIZE = 4096
+HEADER = struct.Struct("<8sQ")
+
+# File name of a packed dataset inside its dataset directory
+PACKED_FNAME = "splits.pack"
+# Key under which the checksum of a packed dataset is stored in its hash file
+HASH_KEY = "packed"
+
+
+def write(fpath: str, dataset: FederatedDataset) -> str:
+    """Writes dataset into a packed file at fpath
+
+    The file is written next to fpath first and moved into place once complete.
+
+    Returns:
+        str: sha1 checksum of the written file, computed while writing
+    """
+    xy_splits, xy_val, xy_test = dataset
+    splits = [(str(i).zfill(2), xy) for i, xy in enumerate(xy_splits)]
+    splits += [("val", xy_val), ("test", xy_test)]
+
+    # Lay out all ndarrays first as the index stores their offsets
+    ndarrays: List[Tuple[int, np.ndarray]] = []
+    index: Dict = {"version": VERSION, "splits": []}
+    offset = 0
+    for split_id, (x, y) in splits:
+        entry: Dict[str, Any] = {"id": split_id}
+        for name, ndarray in [("x", x), ("y", y)]:
+            ndarray = np.ascontiguousarray(ndarray)
+            entry[name] = {
+                "offset": offset,
+                "shape": list(ndarray.shape),
+                "dtype": ndarray.dtype.str,
+                "sha1": hashlib.sha1(ndarray.data).hexdigest(),
+            }
+            ndarrays.append((offset, ndarray))
+            offset = align(offset + ndarray.nbytes)
+        index["splits"].append(entry)
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    header = HEADER.pack(MAGIC, len(index_bytes)) + index_bytes
+    data_start = align(len(header))
+
+    sha1 = hashlib.sha1()
+    tmp_fpath = "{}.tmp".format(fpath)
+    with open(tmp_fpath, "wb") as f:
+
+        def write_hashed(data):
+            sha1.update(data)
+            f.write(data)
+
+        write_hashed(header)
+        position = len(header)
+        for ndarray_offset, ndarray in ndarrays:
+            write_hashed(bytes(data_start + ndarray_offset - position))
+            write_hashed(ndarray.data)
+            position = data_start + ndarray_offset + ndarray.nbytes
+    os.replace(tmp_fpath, fpath)
+
+    return sha1.hexdigest()
+
+
+def load(fpath: str, verify: bool = False) -> FederatedDataset:
+    """Loads a packed dataset as read-only ndarrays backed by a memory-map of fpath
+
+    Parameters:
+    fpath (str): Path of the packed dataset
+    verify (bool): Check the sha1 checksum of every ndarray (reads all of them)
+    """
+    with open(fpath, "rb") as f:
+        # The mapping stays valid after the file is closed
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    index, data_start = read_index(buffer)
+
+    def load_ndarray(entry: Dict) -> np.ndarray:
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        count = int(np.prod(shape))
+        if count == 0:
+            ndarray = np.empty(shape, dtype=dtype)
+            ndarray.flags.writeable = False
+        else:
+            ndarray = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=data_start + entry["offset"]
+            ).reshape(shape)
+        if verify and hashlib.sha1(ndarray.data).hexdigest() != entry["sha1"]:
+            raise Exception("Checksum of {} in {} does not match".format(entry, fpath))
+        return ndarray
+
+    # Splits are stored in order, so the remaining ones are the partitions
+    xys = {
+        entry["id"]: (load_ndarray(entry["x"]), load_ndarray(entry["y"]))
+        for entry in index["splits"]
+    }
+    xy_val, xy_test = xys.pop("val"), xys.pop("test")
+
+    return list(xys.values()), xy_val, xy_test
+
+
+def read_index(buffer) -> Tuple[Dict, int]:
+    """Returns the index of a packed dataset and the offset of its data section"""
+    magic, index_len = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise Exception("Not a packed dataset")
+    index_bytes = bytes(buffer[HEADER.size : HEADER.size + index_len])
+    index = json.loads(index_bytes.decode("utf-8"))
+    if index["version"] != VERSION:
+        raise Exception(
+            "Unsupported packed dataset version {}".format(index["version"])
+        )
+    return index, align(HEADER.size + index_len)
+
+
+def align(offset: int) -> int:
+    return -(-offset // PAGE_SIZE) * PAGE_SIZE
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from ..helpers.sha1 import checksum
+from . import packed, storage
+
+
+def create_dataset():
+    xy_splits = [
+        (
+            np.random.randint(0, high=256, size=(n, 4, 4, 3)).astype(np.uint8),
+            np.random.randint(0, high=10, size=(n)).astype(np.int64),
+        )
+        for n in [5, 0, 7]
+    ]
+    xy_val = (np.ones((3, 4, 4, 3), dtype=np.uint8), np.arange(3, dtype=np.int64))
+    xy_test = (np.zeros((2, 4, 4, 3), dtype=np.uint8), np.arange(2, dtype=np.int64))
+    return xy_splits, xy_val, xy_test
+
+
+def assert_datasets_equal(dataset_expected, dataset_actual):
+    xy_splits_expected, xy_val_expected, xy_test_expected = dataset_expected
+    xy_splits_actual, xy_val_actual, xy_test_actual = dataset_actual
+    assert len(xy_splits_expected) == len(xy_splits_actual)
+    for xy_expected, xy_actual in zip(
+        xy_splits_expected + [xy_val_expected, xy_test_expected],
+        xy_splits_actual + [xy_val_actual, xy_test_actual],
+    ):
+        for ndarray_expected, ndarray_actual in zip(xy_expected, xy_actual):
+            assert ndarray_expected.dtype == ndarray_actual.dtype
+            np.testing.assert_array_equal(ndarray_expected, ndarray_actual)
+
+
+def test_write_load(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, packed.PACKED_FNAME)
+    dataset = create_dataset()
+
+    # Execute
+    sha1 = packed.write(fpath, dataset)
+    dataset_actual = packed.load(fpath, verify=True)
+
+    # Assert
+    assert sha1 == checksum(fpath)
+    assert_datasets_equal(dataset, dataset_actual)
+    x_00, _ = dataset_actual[0][0]
+    assert not x_00.flags.writeable
+    assert not x_00.flags.owndata  # Slice of the memory-map
+
+
+def test_write_aligns_ndarrays(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, packed.PACKED_FNAME)
+
+    # Execute
+    packed.write(fpath, create_dataset())
+
+    # Assert
+    with open(fpath, "rb") as f:
+        index, data_start = packed.read_index(f.read())
+    assert data_start % packed.PAGE_SIZE == 0
+    assert [entry["id"] for entry in index["splits"]] == [
+        "00",
+        "01",
+        "02",
+        "val",
+        "test",
+    ]
+    for entry in index["splits"]:
+        assert entry["x"]["offset"] % packed.PAGE_SIZE == 0
+        assert entry["y"]["offset"] % packed.PAGE_SIZE == 0
+
+
+def test_load_verify_detects_corruption(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, packed.PACKED_FNAME)
+    packed.write(fpath, create_dataset())
+    with open(fpath, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last_byte = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last_byte[0] ^ 0xFF]))
+
+    # Execute & Assert
+    with pytest.raises(Exception):
+        packed.load(fpath, verify=True)
+
+
+def test_load_packed_splits(tmp_path, disable_fetch):  # pylint: disable=W0613
+    # Prepare
+    dataset_name = "mock_dataset"
+    dataset = create_dataset()
+    dataset_dir = storage.get_dataset_dir(dataset_name, tmp_path)
+    sha1 = packed.write(os.path.join(dataset_dir, packed.PACKED_FNAME), dataset)
+
+    # Execute
+    dataset_actual = storage.load_packed_splits(
+        dataset_name=dataset_name, packed_hash=sha1, local_datasets_dir=tmp_path
+    )
+
+    # Assert
+    assert_datasets_equal(dataset, dataset_actual)
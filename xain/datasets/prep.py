@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
@@ -9,14 +9,33 @@ SEED = 2017
 
 
 def init_ds_train(
-    xy: Tuple[np.ndarray, np.ndarray], num_classes=10, batch_size=32, augmentation=False
+    xy: Tuple[np.ndarray, np.ndarray],
+    num_classes=10,
+    batch_size=32,
+    augmentation=False,
+    cache=False,
 ) -> Dataset:
-    return _init_ds(xy, num_classes, batch_size, augmentation, shuffle=True)
+    return _init_ds(
+        xy, num_classes, batch_size, augmentation, shuffle=True, cache=cache
+    )
 
 
-def init_ds_val(xy: Tuple[np.ndarray, np.ndarray], num_classes=10) -> Dataset:
-    batch_size = xy[0].shape[0]  # Return full dataset as one large batch
-    return _init_ds(xy, num_classes, batch_size, augmentation=False, shuffle=False)
+def init_ds_val(
+    xy: Tuple[np.ndarray, np.ndarray],
+    num_classes=10,
+    cache=False,
+    batch_size: Optional[int] = None,
+) -> Dataset:
+    """Creates a dataset yielding (repeated) batches of batch_size prepared examples
+
+    Every pass over the examples yields the same `num_val_batches` batches, the last
+    one possibly smaller. Without a batch_size, a pass is a single batch of all
+    examples.
+    """
+    batch_size = batch_size if batch_size else xy[0].shape[0]
+    return _init_ds(
+        xy, num_classes, batch_size, augmentation=False, shuffle=False, cache=cache
+    )
 
 
 # pylint: disable-msg=too-many-arguments
@@ -26,7 +45,13 @@ def _init_ds(
     batch_size: int,
     augmentation: bool,
     shuffle: bool,
+    cache: bool = False,
 ) -> Dataset:
+    """Creates a dataset yielding (repeated) batches of prepared examples
+
+    The returned dataset is meant to be reused for every round of training, so no
+    pipeline needs to be built more than once for the same data.
+    """
     (x, y) = xy
     # Assume that each row in `x` corresponds to the same row in `y`
     assert x.shape[0] == y.shape[0]
@@ -39,17 +64,64 @@ def _init_ds(
         x = np.reshape(x, (x.shape[0], x.shape[1], x.shape[2], 1))
     # Create tf.data.Dataset from ndarrays
     ds = to_dataset(x, y)
+    if not augmentation and not cache:
+        # Data preparation runs vectorized on whole batches
+        ds = batch_and_repeat(ds, batch_size, shuffle=shuffle, repeat=True)
+        ds = prepare(ds, num_classes=num_classes)
+        return ds.prefetch(buffer_size=AUTOTUNE)
     # Data preparation:
     # - Cast color channel values to float, divide by 255
     # - One-hot encode labels
     ds = prepare(ds, num_classes=num_classes)
+    # Keep the prepared examples in memory after the first pass
+    if cache:
+        ds = ds.cache()
     # Data augmentation:
     # - Randomize hue/saturation/brightness/contrast (CIFAR-10/non-grayscale only)
     # - Take random 32x32 (or 28x28) crop (after padding to 40x40 (or 32x32))
     # - Random horizontal flip
     if augmentation:
         ds = augment_ds(ds, grayscale)
-    return batch_and_repeat(ds, batch_size, shuffle=shuffle, repeat=True)
+    ds = batch_and_repeat(ds, batch_size, shuffle=shuffle, repeat=True)
+    return ds.prefetch(buffer_size=AUTOTUNE)
+
+
+def prepare_xy(
+    xy: Tuple[np.ndarray, np.ndarray], num_classes=10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Prepares all examples at once like `prepare` does, but into ndarrays
+
+    Meant for evaluation sets which are used many times: they can be prepared once
+    and then evaluated in batches of any size.
+    """
+    (x, y) = xy
+    assert x.shape[0] == y.shape[0]
+    assert x.ndim == 3 or x.ndim == 4  # (Fashion-)MNIST: 3, CIFAR-10: 4
+    assert y.ndim == 1
+    # Add one dimension to grayscale-image datasets
+    if x.ndim == 3:
+        x = np.reshape(x, (x.shape[0], x.shape[1], x.shape[2], 1))
+    x_prepared = x.astype(np.float32)
+    x_prepared /= 255
+    y_prepared = np.eye(num_classes, dtype=np.float32)[y]
+    return x_prepared, y_prepared
+
+
+def evaluate_prepared(
+    model: tf.keras.Model,
+    xy_prepared: Tuple[np.ndarray, np.ndarray],
+    batch_size: Optional[int] = None,
+) -> Tuple[float, float]:
+    """Evaluates model on examples prepared with `prepare_xy`
+
+    Examples are evaluated in batches of `batch_size`, or all in one batch if not
+    given. Keras weights the loss of each batch by its size, so the result does not
+    depend on the batch size.
+    """
+    x, y = xy_prepared
+    batch_size = batch_size if batch_size else x.shape[0]
+    loss, acc = model.evaluate(x, y, batch_size=batch_size, verbose=0)
+    return float(loss), float(acc)
 
 
 def to_dataset(x: np.ndarray, y: np.ndarray) -> Dataset:
@@ -57,10 +129,14 @@ def to_dataset(x: np.ndarray, y: np.ndarray) -> Dataset:
 
 
 def prepare(ds: Dataset, num_classes: int) -> Dataset:
-    ds = ds.map(lambda x, y: (x, _prep_cast_label(y)))
-    ds = ds.map(lambda x, y: (_prep_cast_divide(x), y))
-    ds = ds.map(lambda x, y: (x, _prep_one_hot(y, num_classes)))
-    return ds
+    """Prepares examples or batches of examples in a single map stage"""
+    return ds.map(
+        lambda x, y: (
+            _prep_cast_divide(x),
+            _prep_one_hot(_prep_cast_label(y), num_classes),
+        ),
+        num_parallel_calls=AUTOTUNE,
+    )
 
 
 def augment_ds(ds: Dataset, grayscale: bool) -> Dataset:
@@ -83,12 +159,22 @@ def augment_ds(ds: Dataset, grayscale: bool) -> Dataset:
     return ds
 
 
+def num_val_batches(num_examples: int, batch_size: Optional[int] = None) -> int:
+    """Returns the number of batches of a pass over a `init_ds_val` dataset"""
+    if not batch_size:
+        return 1
+    return -(-num_examples // batch_size)
+
+
 def batch_and_repeat(
     ds: Dataset, batch_size: int, shuffle: bool, repeat: bool
 ) -> Dataset:
-    ds = ds.prefetch(buffer_size=AUTOTUNE)
     if shuffle:
         ds = ds.shuffle(1024, seed=SEED)
+    elif repeat and batch_size > 0:
+        # Batch before repeating, so every pass yields the same batches and no batch
+        # mixes the end of one pass with the start of the next
+        return ds.batch(batch_size, drop_remainder=False).repeat()
     if repeat:
         ds = ds.repeat()
     if batch_size > 0:
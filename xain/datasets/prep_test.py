@@ -1,3 +1,4 @@
+import numpy as np
 import tensorflow as tf
 
 from . import prep
@@ -15,3 +16,31 @@ def test_init_dataset(mock_keras_dataset):
     assert len(shape_x) == 4
     shape_y = ds.output_shapes[1]
     assert len(shape_y) == 2
+
+
+def test_init_dataset_cache(mock_keras_dataset):
+    # Prepare
+    xy, _ = mock_keras_dataset
+    # Execute
+    ds = prep.init_ds_train(xy, cache=True)
+    # Assert
+    assert tf.compat.v1.data.get_output_types(ds) == (tf.float32, tf.float32)
+    shape_x, shape_y = tf.compat.v1.data.get_output_shapes(ds)
+    assert shape_x.as_list() == [None, 32, 32, 3]
+    assert shape_y.as_list() == [None, 10]
+
+
+def test_prepare_xy(mock_keras_dataset):
+    # Prepare
+    _, (x, y) = mock_keras_dataset
+    x = np.random.randint(0, high=256, size=x.shape).astype(np.uint8)
+
+    # Execute
+    x_actual, y_actual = prep.prepare_xy((x, y))
+
+    # Assert
+    assert x_actual.dtype == np.float32
+    np.testing.assert_array_equal(x_actual, x.astype(np.float32) / 255)
+    assert y_actual.shape == (100, 10)
+    np.testing.assert_array_equal(np.argmax(y_actual, axis=1), y)
+    np.testing.assert_array_equal(np.sum(y_actual, axis=1), np.ones((100)))
@@ -0,0 +1,47 @@
+"""Label histograms of federated datasets
+
+The labels of a dataset never change once it is loaded, so the number of
+examples per label of every partition is counted once, for all partitions in a
+single `np.bincount` pass, and then only looked up.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from xain.types import FederatedDataset
+
+
+def label_histograms(
+    ys: List[np.ndarray], num_classes: Optional[int] = None
+) -> np.ndarray:
+    """Counts the examples per label of each label array in ys
+
+    Parameters:
+    ys (List[ndarray]): Label arrays, e.g. one per partition
+    num_classes (int): Number of classes, defaults to the largest label plus one
+
+    Returns:
+        ndarray: Histograms of shape (len(ys), num_classes); row i holds the
+        number of examples of each label in ys[i]
+    """
+    sizes = [y.shape[0] for y in ys]
+    y_all = np.concatenate([np.asarray(y).reshape(-1) for y in ys]).astype(np.int64)
+    if num_classes is None:
+        num_classes = int(y_all.max()) + 1 if y_all.size > 0 else 0
+    assert y_all.size == 0 or (0 <= y_all.min() and y_all.max() < num_classes)
+
+    # Give each (array, label) pair its own bin
+    rows = np.repeat(np.arange(len(ys), dtype=np.int64), sizes)
+    counts = np.bincount(rows * num_classes + y_all, minlength=len(ys) * num_classes)
+
+    return counts.reshape((len(ys), num_classes))
+
+
+def federated_label_histograms(
+    dataset: FederatedDataset, num_classes: Optional[int] = None
+) -> np.ndarray:
+    """Returns the label histograms of all partitions of dataset followed by those
+    of its validation and test set"""
+    xy_partitions, (_, y_val), (_, y_test) = dataset
+    ys = [y for _, y in xy_partitions] + [y_val, y_test]
+    return label_histograms(ys, num_classes=num_classes)
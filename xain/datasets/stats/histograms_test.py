@@ -0,0 +1,45 @@
+import numpy as np
+
+from .histograms import federated_label_histograms, label_histograms
+
+
+def test_label_histograms():
+    # Prepare
+    ys = [
+        np.array([0, 1, 1, 3], dtype=np.int8),
+        np.array([], dtype=np.int8),
+        np.array([2, 2, 2], dtype=np.uint8),
+    ]
+
+    # Execute
+    histograms = label_histograms(ys, num_classes=5)
+
+    # Assert
+    np.testing.assert_array_equal(
+        histograms, [[1, 2, 0, 1, 0], [0, 0, 0, 0, 0], [0, 0, 3, 0, 0]]
+    )
+
+
+def test_label_histograms_default_num_classes():
+    # Execute
+    histograms = label_histograms([np.array([0, 4]), np.array([1])])
+
+    # Assert
+    assert histograms.shape == (2, 5)
+
+
+def test_federated_label_histograms(mock_federated_dataset):
+    # Prepare
+    xy_partitions, (_, y_val), (_, y_test) = mock_federated_dataset
+
+    # Execute
+    histograms = federated_label_histograms(mock_federated_dataset, num_classes=10)
+
+    # Assert
+    assert histograms.shape == (len(xy_partitions) + 2, 10)
+    for (_, y), histogram in zip(
+        list(xy_partitions) + [(None, y_val), (None, y_test)], histograms
+    ):
+        labels, counts = np.unique(y, return_counts=True)
+        np.testing.assert_array_equal(histogram[labels], counts)
+        assert histogram.sum() == y.shape[0]
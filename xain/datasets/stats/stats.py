@@ -4,6 +4,8 @@ import numpy as np
 
 from xain.types import FederatedDataset, FederatedDatasetPartition
 
+from .histograms import federated_label_histograms
+
 PartitionStat = Dict[str, List[int]]
 
 
@@ -52,22 +54,19 @@ class DSStats:
 
         zfill_width = int(np.log(len(xy_partitions)))
 
-        ys = [y for (_, y) in xy_partitions]
-        all_labels = np.unique(np.concatenate(ys, axis=0))
-
-        for index, xy_par in enumerate(xy_partitions):
-            key = str(index).zfill(zfill_width)
+        # One row per partition followed by validation and test set
+        histograms = federated_label_histograms(self.ds)
+        num_partitions = len(xy_partitions)
+        all_labels = np.flatnonzero(histograms[:num_partitions].sum(axis=0))
 
-            stats[key] = self.number_of_examples_per_label(
-                xy=xy_par, possible_labels=all_labels
-            )
+        keys = [str(index).zfill(zfill_width) for index in range(num_partitions)]
+        xys = list(xy_partitions) + [xy_val, xy_test]
 
-        stats["val"] = self.number_of_examples_per_label(
-            xy=xy_val, possible_labels=all_labels
-        )
-        stats["test"] = self.number_of_examples_per_label(
-            xy=xy_test, possible_labels=all_labels
-        )
+        for key, (x, _), histogram in zip(keys + ["val", "test"], xys, histograms):
+            stats[key] = {
+                "total": x.shape[0],
+                "per_label": histogram[all_labels].tolist(),
+            }
 
         return stats
 
@@ -1,17 +1,23 @@
 import concurrent.futures
+import json
 import os
-from typing import Tuple
+import threading
+from typing import Dict, List, Tuple
 
 import numpy
-import requests
-from absl import flags, logging
+from absl import flags
 
 from ..helpers.sha1 import checksum
 from ..types import FederatedDataset
-from . import hashes
+from . import cache, fetch, hashes, packed, virtual
 
 FLAGS = flags.FLAGS
 
+# Name of the file in each dataset directory which caches checksums of its files
+CHECKSUM_CACHE_FNAME = "checksums.json"
+
+checksum_cache_lock = threading.Lock()
+
 
 def default_get_local_datasets_dir():
     return FLAGS.local_datasets_dir
@@ -27,58 +33,134 @@ def get_dataset_dir(dataset_name: str, local_datasets_dir: str) -> str:
     return dataset_dir
 
 
-def fetch_ndarray(url, fpath):
-    """Get file from fpath and store at fpath"""
-    r = requests.get(url, stream=True)
+def fetch_ndarray(url, fpath) -> str:
+    """Get file from url and store at fpath; returns its sha1 checksum"""
+    sha1 = fetch.fetch(url, fpath)
+    # The checksum was computed while downloading, don't hash the file again
+    cache_checksum(fpath, sha1)
+    return sha1
 
-    logging.info("Fetching file {}".format(url))
 
-    if r.status_code != 200:
-        raise Exception("Received HTTP Status {} for url {}".format(r.status_code, url))
+def cached_checksum(fpath: str) -> str:
+    """Returns the sha1 checksum of fpath
 
-    handle = open(fpath, "wb")
-    for chunk in r.iter_content(chunk_size=1024):
-        if chunk:  # filter out keep-alive new chunks
-            handle.write(chunk)
+    Checksums are cached in a file next to fpath, keyed by file name together with
+    size, modification time and inode of the file. As long as none of them changed
+    the file is not hashed again.
+    """
+    cache_fpath, fname, key = checksum_cache_key(fpath)
 
+    with checksum_cache_lock:
+        entry = read_checksum_cache(cache_fpath).get(fname)
+    if entry is not None and entry["stat"] == key:
+        return entry["sha1"]
 
-def load_ndarray(
-    dataset_name: str, ndarray_name: str, ndarray_hash: str, local_datasets_dir: str
-):
-    """Downloads dataset ndarray and loads from disk if already present
+    sha1 = checksum(fpath)
+    cache_checksum(fpath, sha1)
 
-    Parameters:
-    datasets_repository (str): datasets repository base URL
-    dataset_name (str): Name of dataset in repository
-    ndarray_name (str): ndarray name. Example: "x_00.npy"
-    local_datasets_dir (str): Directory in which all local datasets are stored
-    cleanup (bool): Cleanup file if it has the wrong hash
+    return sha1
+
+
+def cache_checksum(fpath: str, sha1: str):
+    """Stores sha1 as checksum of fpath in its directory's checksum cache"""
+    cache_fpath, fname, key = checksum_cache_key(fpath)
+
+    with checksum_cache_lock:
+        # Read the cache again as other files might have been added meanwhile
+        entries = read_checksum_cache(cache_fpath)
+        entries[fname] = {"stat": key, "sha1": sha1}
+        # Replace the cache atomically so it is never read half-written
+        tmp_fpath = "{}.{}.tmp".format(cache_fpath, os.getpid())
+        with open(tmp_fpath, "w") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_fpath, cache_fpath)
+
+
+def checksum_cache_key(fpath: str) -> Tuple[str, str, List[int]]:
+    """Returns the checksum cache responsible for fpath and the key of fpath in it"""
+    dirname, fname = os.path.split(fpath)
+    stat = os.stat(fpath)
+    key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    return os.path.join(dirname, CHECKSUM_CACHE_FNAME), fname, key
+
+
+def read_checksum_cache(cache_fpath: str) -> Dict:
+    try:
+        with open(cache_fpath, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # A missing or unreadable cache just means everything needs to be hashed
+        return {}
+
+
+def fetch_and_verify(
+    dataset_name: str, fname: str, fhash: str, local_datasets_dir: str
+) -> str:
+    """Downloads dataset file if not present yet and verifies its checksum
+
+    Returns:
+        str: Path of the verified local file
     """
-    url = "{}/{}/{}".format(FLAGS.datasets_repository, dataset_name, ndarray_name)
+    url = "{}/{}/{}".format(FLAGS.datasets_repository, dataset_name, fname)
+
+    cache_dir = FLAGS.datasets_cache_dir
+    if cache_dir:
+        # Blobs in the shared cache were verified before they were added
+        fpath = cache.lookup(cache_dir, fhash)
+        if fpath is not None:
+            return fpath
+        if FLAGS.fetch_datasets and cache.is_writable(cache_dir):
+            return cache.fetch_blob(cache_dir, url, fhash)
+        # Otherwise (e.g. read-only cache) fall back to the local datasets dir
 
     dataset_dir = get_dataset_dir(dataset_name, local_datasets_dir)
-    fpath = os.path.join(dataset_dir, ndarray_name)
+    fpath = os.path.join(dataset_dir, fname)
 
     if FLAGS.fetch_datasets and not os.path.isfile(fpath):
         fetch_ndarray(url, fpath)
 
     # Check sha1 checksum after conditional fetch even when no download
-    # occured and local dataset was used to avoid accidental corruption
-    sha1 = checksum(fpath)
+    # occured and local dataset was used to avoid accidental corruption;
+    # unchanged files are not hashed again
+    sha1 = cached_checksum(fpath)
 
-    if sha1 != ndarray_hash:
+    if sha1 != fhash:
         # Delete the downloaded file if it has the wrong hash
         # Otherwise the next invocation will not download it again
         # which is not a desired behavior
         os.remove(fpath)
 
-        raise Exception(
-            "Given hash {} for file {} does not match".format(
-                ndarray_hash, ndarray_name
-            )
-        )
+        raise Exception("Given hash {} for file {} does not match".format(fhash, fname))
+
+    return fpath
+
+
+def load_ndarray(
+    dataset_name: str,
+    ndarray_name: str,
+    ndarray_hash: str,
+    local_datasets_dir: str,
+    mmap: bool = False,
+):
+    """Downloads dataset ndarray and loads from disk if already present
+
+    Parameters:
+    datasets_repository (str): datasets repository base URL
+    dataset_name (str): Name of dataset in repository
+    ndarray_name (str): ndarray name. Example: "x_00.npy"
+    local_datasets_dir (str): Directory in which all local datasets are stored
+    cleanup (bool): Cleanup file if it has the wrong hash
+    mmap (bool): Return a read-only memory-map of the file instead of reading it
+    """
+    fpath = fetch_and_verify(
+        dataset_name=dataset_name,
+        fname=ndarray_name,
+        fhash=ndarray_hash,
+        local_datasets_dir=local_datasets_dir,
+    )
 
-    ndarray = numpy.load(fpath)
+    # A memory-mapped ndarray is only paged in when its elements are accessed
+    ndarray = numpy.load(fpath, mmap_mode="r" if mmap else None)
 
     return ndarray
 
@@ -88,6 +170,7 @@ def load_split(
     split_id: str,
     split_hashes: Tuple[str, str],
     local_datasets_dir=str,
+    mmap: bool = False,
 ):
     x_name = "x_{}.npy".format(split_id)
     x_hash = split_hashes[0]
@@ -100,6 +183,7 @@ def load_split(
         ndarray_name=x_name,
         ndarray_hash=x_hash,
         local_datasets_dir=local_datasets_dir,
+        mmap=mmap,
     )
 
     y = load_ndarray(
@@ -107,13 +191,16 @@ def load_split(
         ndarray_name=y_name,
         ndarray_hash=y_hash,
         local_datasets_dir=local_datasets_dir,
+        mmap=mmap,
     )
 
     return x, y
 
 
 def load_splits(
-    dataset_name: str, get_local_datasets_dir=default_get_local_datasets_dir
+    dataset_name: str,
+    get_local_datasets_dir=default_get_local_datasets_dir,
+    mmap: bool = False,
 ) -> FederatedDataset:
     xy_splits = []
     xy_val = (None, None)
@@ -123,6 +210,21 @@ def load_splits(
 
     local_datasets_dir = get_local_datasets_dir()
 
+    if packed.HASH_KEY in dataset_split_hashes:
+        return load_packed_splits(
+            dataset_name=dataset_name,
+            packed_hash=dataset_split_hashes[packed.HASH_KEY],
+            local_datasets_dir=local_datasets_dir,
+        )
+
+    if virtual.HASH_KEY in dataset_split_hashes:
+        return load_virtual(
+            dataset_name=dataset_name,
+            virtual_hashes=dataset_split_hashes[virtual.HASH_KEY],
+            local_datasets_dir=local_datasets_dir,
+            mmap=mmap,
+        ).materialize()
+
     def load_method(split_id: str):
         data = load_split(
             dataset_name=dataset_name,
@@ -130,6 +232,7 @@ def load_splits(
             # passing respective hash tuple for given split_id
             split_hashes=dataset_split_hashes[split_id],
             local_datasets_dir=local_datasets_dir,
+            mmap=mmap,
         )
 
         return split_id, data
@@ -151,3 +254,48 @@ def load_splits(
             xy_splits.append(data)
 
     return xy_splits, xy_val, xy_test
+
+
+def load_packed_splits(
+    dataset_name: str, packed_hash: str, local_datasets_dir: str
+) -> FederatedDataset:
+    """Loads a dataset stored in the packed format (see `xain.datasets.packed`)
+
+    All splits are always memory-mapped from the single packed file.
+    """
+    fpath = fetch_and_verify(
+        dataset_name=dataset_name,
+        fname=packed.PACKED_FNAME,
+        fhash=packed_hash,
+        local_datasets_dir=local_datasets_dir,
+    )
+    return packed.load(fpath)
+
+
+def load_virtual(
+    dataset_name: str, virtual_hashes: Dict, local_datasets_dir: str, mmap: bool = False
+) -> virtual.VirtualDataset:
+    """Loads a virtual dataset (see `xain.datasets.virtual`) together with its base
+    dataset, which is shared by all virtual datasets referring to it"""
+    base_name = virtual_hashes["base"]
+    base_hashes = hashes.datasets[base_name]
+
+    xy_train, xy_test = [
+        load_split(
+            dataset_name=base_name,
+            split_id=split_id,
+            split_hashes=base_hashes[split_id],
+            local_datasets_dir=local_datasets_dir,
+            mmap=mmap,
+        )
+        for split_id in virtual.BASE_SPLIT_IDS
+    ]
+
+    fpath = fetch_and_verify(
+        dataset_name=dataset_name,
+        fname=virtual.INDEX_FNAME,
+        fhash=virtual_hashes["index"],
+        local_datasets_dir=local_datasets_dir,
+    )
+
+    return virtual.VirtualDataset((xy_train, xy_test), virtual.read_index(fpath))
@@ -1,5 +1,9 @@
+import os
+
+import numpy as np
 import pytest
 
+from ..helpers.sha1 import checksum
 from . import storage
 
 
@@ -18,3 +22,53 @@ def test_load_ndarray_wrong_hash(tmp_path):
             ndarray_hash=ndarray_hash,
             local_datasets_dir=tmp_path,
         )
+
+
+def test_load_ndarray_mmap(tmp_path, disable_fetch):  # pylint: disable=W0613
+    # Prepare
+    dataset_name = "mock_dataset"
+    ndarray_name = "x_00.npy"
+    ndarray_expected = np.arange(12, dtype=np.uint8).reshape((3, 4))
+    fpath = os.path.join(storage.get_dataset_dir(dataset_name, tmp_path), ndarray_name)
+    np.save(fpath, ndarray_expected)
+
+    # Execute
+    ndarray_actual = storage.load_ndarray(
+        dataset_name=dataset_name,
+        ndarray_name=ndarray_name,
+        ndarray_hash=checksum(fpath),
+        local_datasets_dir=tmp_path,
+        mmap=True,
+    )
+
+    # Assert
+    assert isinstance(ndarray_actual, np.memmap)
+    assert not ndarray_actual.flags.writeable
+    np.testing.assert_array_equal(ndarray_expected, ndarray_actual)
+
+
+def test_cached_checksum(tmp_path, monkeypatch):
+    # Prepare
+    fpath = os.path.join(tmp_path, "x_00.npy")
+    np.save(fpath, np.zeros((3, 4), dtype=np.uint8))
+    fpaths_hashed = []
+
+    def checksum_spy(fpath):
+        fpaths_hashed.append(fpath)
+        return checksum(fpath)
+
+    monkeypatch.setattr(storage, "checksum", checksum_spy)
+
+    # Execute
+    sha1_first = storage.cached_checksum(fpath)
+    sha1_cached = storage.cached_checksum(fpath)
+    np.save(fpath, np.ones((3, 4), dtype=np.uint8))
+    os.utime(fpath, ns=(0, 0))  # Make sure the modification time changes
+    sha1_changed = storage.cached_checksum(fpath)
+
+    # Assert
+    assert fpaths_hashed == [fpath, fpath]
+    assert sha1_first == sha1_cached
+    assert sha1_changed == checksum(fpath)
+    assert sha1_changed != sha1_first
+    assert os.path.isfile(os.path.join(tmp_path, storage.CHECKSUM_CACHE_FNAME))
@@ -33,11 +33,29 @@ def unpack_keras_and_federated_dataset(keras_dataset, federated_dataset):
     return (x_keras, y_keras), (x_fed, y_fed)
 
 
-def hash_xy(x, y):
-    return hash(x.tobytes() + y.tobytes())
+def to_rows(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Returns a 1-D array with one fixed-width void element per example holding
+    the raw bytes of x[i] followed by y[i], so examples can be sorted and compared
+    exactly and in bulk"""
+    num_examples = x.shape[0]
+    xy_bytes = np.concatenate(
+        [
+            np.ascontiguousarray(x).reshape((num_examples, -1)).view(np.uint8),
+            np.ascontiguousarray(y).reshape((num_examples, -1)).view(np.uint8),
+        ],
+        axis=1,
+    )
+    return xy_bytes.view(np.dtype((np.void, xy_bytes.shape[1]))).reshape(-1)
+
+
+def has_duplicates(rows_sorted: np.ndarray) -> bool:
+    row_bytes = rows_sorted.view(np.uint8).reshape((rows_sorted.shape[0], -1))
+    return bool((row_bytes[1:] == row_bytes[:-1]).all(axis=1).any())
 
 
 def assert_dataset_origin(keras_dataset, federated_dataset):
+    """Asserts that the federated dataset contains every example of the keras
+    dataset exactly once"""
     # Unpack and group each dataset
     (x_keras, y_keras), (x_fed, y_fed) = unpack_keras_and_federated_dataset(
         keras_dataset, federated_dataset
@@ -45,14 +63,15 @@ def assert_dataset_origin(keras_dataset, federated_dataset):
 
     assert x_keras.shape == x_fed.shape
     assert y_keras.shape == y_fed.shape
-
-    hash_table = {hash_xy(x, y): 0 for (x, y) in zip(x_keras, y_keras)}
-
-    for (x, y) in zip(x_fed, y_fed):
-        hash_table[hash_xy(x, y)] += 1
-
-    counts = list(hash_table.values())
-    unq = np.unique(counts)
-
-    assert len(unq) == 1, "Some examples are duplicate or not existing in keras dataset"
-    assert unq[0] == 1, "Federated example not found in original keras dataset"
+    assert x_keras.dtype == x_fed.dtype and y_keras.dtype == y_fed.dtype
+
+    # Compare the sorted examples byte by byte, this is exact (no hash collisions)
+    keras_rows = np.sort(to_rows(x_keras, y_keras))
+    fed_rows = np.sort(to_rows(x_fed, y_fed))
+
+    assert not has_duplicates(keras_rows) and not has_duplicates(
+        fed_rows
+    ), "Some examples are duplicate or not existing in keras dataset"
+    assert np.array_equal(
+        keras_rows.view(np.uint8), fed_rows.view(np.uint8)
+    ), "Federated example not found in original keras dataset"
@@ -29,3 +29,39 @@ def test_assert_dataset_origin_raise(
             keras_dataset=mock_simple_keras_dataset,
             federated_dataset=mock_simple_federated_dataset,
         )
+
+
+def test_assert_dataset_origin_raise_duplicate(
+    mock_simple_keras_dataset, mock_simple_federated_dataset
+):
+    # Prepare
+    # Replace the validation example by a copy of the first train example
+    xy_splits, (x_val, y_val), xy_test = mock_simple_federated_dataset
+    xy_splits = list(xy_splits)
+    x_00, y_00 = xy_splits[0]
+    x_val[0], y_val[0] = x_00[0], y_00[0]
+
+    # Execute & Assert
+    with pytest.raises(AssertionError, match="duplicate"):
+        testing.assert_dataset_origin(
+            keras_dataset=mock_simple_keras_dataset,
+            federated_dataset=(xy_splits, (x_val, y_val), xy_test),
+        )
+
+
+def test_assert_dataset_origin_raise_label(
+    mock_simple_keras_dataset, mock_simple_federated_dataset
+):
+    # Prepare
+    # Swap the labels of two examples, all images and labels still exist
+    xy_splits, xy_val, xy_test = mock_simple_federated_dataset
+    xy_splits = list(xy_splits)
+    (_, y_00), (_, y_01) = xy_splits[0], xy_splits[1]
+    y_00[0], y_01[0] = y_01[0], y_00[0]
+
+    # Execute & Assert
+    with pytest.raises(AssertionError):
+        testing.assert_dataset_origin(
+            keras_dataset=mock_simple_keras_dataset,
+            federated_dataset=(xy_splits, xy_val, xy_test),
+        )
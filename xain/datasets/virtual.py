@@ -0,0 +1,120 @@
+"""Virtual federated datasets
+
+A virtual dataset does not store any examples itself. It refers to a base
+dataset holding the arrays of the original Keras dataset once, and stores only
+an index map: for every partition and for the validation set the indices of its
+examples in the base training set. The test set is the base test set.
+
+The hashes of a virtual dataset are stored as
+
+    {"virtual": {"base": "<base dataset name>", "index": "<sha1 of index map>"}}
+
+and those of its base dataset as
+
+    {"train": ["<sha1 of x_train.npy>", "<sha1 of y_train.npy>"],
+     "test": ["<sha1 of x_test.npy>", "<sha1 of y_test.npy>"]}
+
+so all variants of one Keras dataset share the same base files and each of them
+only costs the few kilobytes of its index map.
+"""
+import os
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from xain.types import FederatedDataset, FederatedDatasetPartition, KerasDataset
+
+# Key under which the base dataset and index map are stored in the hash file
+HASH_KEY = "virtual"
+# File name of the index map inside the dataset directory of a virtual dataset
+INDEX_FNAME = "index.npz"
+# Split ids of a base dataset
+BASE_SPLIT_IDS = ["train", "test"]
+
+# Indices of the examples of each partition and of the validation set
+IndexMap = Tuple[List[np.ndarray], np.ndarray]
+
+
+class VirtualDataset:
+    """Federated dataset whose partitions are gathered from the base arrays only
+    when they are accessed
+
+    If the base arrays are memory-mapped, only the pages holding the examples
+    of the partitions which are actually used are ever read.
+    """
+
+    def __init__(self, base: KerasDataset, index_map: IndexMap):
+        (self.x_train, self.y_train), (self.x_test, self.y_test) = base
+        self.partition_indices, self.val_indices = index_map
+
+    def num_partitions(self) -> int:
+        return len(self.partition_indices)
+
+    def partition(self, i: int) -> FederatedDatasetPartition:
+        return self.gather(self.partition_indices[i])
+
+    def partition_batches(
+        self, i: int, batch_size: int
+    ) -> Iterator[FederatedDatasetPartition]:
+        """Yields the examples of partition i in batches of batch_size, only one
+        batch is gathered at a time"""
+        indices = self.partition_indices[i]
+        for start in range(0, indices.shape[0], batch_size):
+            yield self.gather(indices[start : start + batch_size])
+
+    def validation(self) -> FederatedDatasetPartition:
+        return self.gather(self.val_indices)
+
+    def test(self) -> FederatedDatasetPartition:
+        return self.x_test, self.y_test
+
+    def gather(self, indices: np.ndarray) -> FederatedDatasetPartition:
+        return np.take(self.x_train, indices, axis=0), np.take(self.y_train, indices)
+
+    def materialize(self) -> FederatedDataset:
+        """Gathers all partitions, e.g. for code which expects a FederatedDataset"""
+        xy_splits = [self.partition(i) for i in range(self.num_partitions())]
+        return xy_splits, self.validation(), self.test()
+
+
+def index_dtype(num_examples: int) -> np.dtype:
+    """Returns the smallest unsigned integer type which can index num_examples"""
+    for dtype in [np.uint16, np.uint32]:
+        if num_examples <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def write_index(fpath: str, index_map: IndexMap, num_examples: int):
+    """Writes index_map into fpath, moving it into place once complete
+
+    All partition indices are stored concatenated together with the offset of
+    each partition.
+    """
+    partition_indices, val_indices = index_map
+    dtype = index_dtype(num_examples)
+
+    sizes = [indices.shape[0] for indices in partition_indices]
+    offsets = np.cumsum([0] + sizes, dtype=np.int64)
+    partitions = np.concatenate(
+        [np.empty(0, dtype=dtype)]
+        + [indices.astype(dtype) for indices in partition_indices]
+    )
+
+    tmp_fpath = "{}.tmp".format(fpath)
+    with open(tmp_fpath, "wb") as f:
+        np.savez_compressed(
+            f, partitions=partitions, offsets=offsets, val=val_indices.astype(dtype)
+        )
+    os.replace(tmp_fpath, fpath)
+
+
+def read_index(fpath: str) -> IndexMap:
+    with np.load(fpath) as index:
+        partitions, offsets = index["partitions"], index["offsets"]
+        val_indices = index["val"]
+
+    partition_indices = [
+        partitions[start:end] for start, end in zip(offsets[:-1], offsets[1:])
+    ]
+    return partition_indices, val_indices
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+
+from ..helpers.sha1 import checksum
+from . import hashes, storage, virtual
+
+
+def create_base():
+    x_train = np.random.randint(0, high=256, size=(20, 4, 4)).astype(np.uint8)
+    y_train = np.arange(20, dtype=np.int64) % 10
+    x_test = np.zeros((5, 4, 4), dtype=np.uint8)
+    y_test = np.arange(5, dtype=np.int64)
+    return (x_train, y_train), (x_test, y_test)
+
+
+def create_index_map():
+    permutation = np.random.permutation(20)
+    return [permutation[:8], permutation[8:10], permutation[10:16]], permutation[16:]
+
+
+def test_write_read_index(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, virtual.INDEX_FNAME)
+    partition_indices, val_indices = create_index_map()
+
+    # Execute
+    virtual.write_index(fpath, (partition_indices, val_indices), num_examples=20)
+    partition_indices_actual, val_indices_actual = virtual.read_index(fpath)
+
+    # Assert
+    assert len(partition_indices_actual) == len(partition_indices)
+    for expected, actual in zip(partition_indices, partition_indices_actual):
+        assert actual.dtype == np.uint16
+        np.testing.assert_array_equal(expected, actual)
+    np.testing.assert_array_equal(val_indices, val_indices_actual)
+
+
+def test_index_dtype():
+    assert virtual.index_dtype(60000) == np.uint16
+    assert virtual.index_dtype(65536) == np.uint16
+    assert virtual.index_dtype(65537) == np.uint32
+
+
+def test_virtual_dataset():
+    # Prepare
+    base = create_base()
+    (x_train, y_train), (x_test, _) = base
+    partition_indices, val_indices = create_index_map()
+
+    # Execute
+    dataset = virtual.VirtualDataset(base, (partition_indices, val_indices))
+    xy_splits, (x_val, y_val), (x_test_actual, _) = dataset.materialize()
+    batches = list(dataset.partition_batches(0, batch_size=3))
+
+    # Assert
+    assert dataset.num_partitions() == 3
+    for indices, (x, y) in zip(partition_indices, xy_splits):
+        np.testing.assert_array_equal(x, x_train[indices])
+        np.testing.assert_array_equal(y, y_train[indices])
+    np.testing.assert_array_equal(x_val, x_train[val_indices])
+    np.testing.assert_array_equal(y_val, y_train[val_indices])
+    assert x_test_actual is x_test
+
+    assert [x.shape[0] for x, _ in batches] == [3, 3, 2]
+    np.testing.assert_array_equal(
+        np.concatenate([x for x, _ in batches]), x_train[partition_indices[0]]
+    )
+
+
+def test_load_virtual(tmp_path, monkeypatch, disable_fetch):  # pylint: disable=W0613
+    # Prepare
+    base_name, dataset_name = "mock_base", "mock_dataset"
+    base = create_base()
+    index_map = create_index_map()
+
+    base_dir = storage.get_dataset_dir(base_name, tmp_path)
+    base_hashes = {}
+    for split_id, (x, y) in zip(virtual.BASE_SPLIT_IDS, base):
+        for name, ndarray in [("x", x), ("y", y)]:
+            np.save(os.path.join(base_dir, "{}_{}.npy".format(name, split_id)), ndarray)
+        base_hashes[split_id] = [
+            checksum(os.path.join(base_dir, "{}_{}.npy".format(name, split_id)))
+            for name in ["x", "y"]
+        ]
+
+    index_fpath = os.path.join(
+        storage.get_dataset_dir(dataset_name, tmp_path), virtual.INDEX_FNAME
+    )
+    virtual.write_index(index_fpath, index_map, num_examples=20)
+    virtual_hashes = {"base": base_name, "index": checksum(index_fpath)}
+
+    monkeypatch.setitem(hashes.datasets, base_name, base_hashes)
+    monkeypatch.setitem(
+        hashes.datasets, dataset_name, {virtual.HASH_KEY: virtual_hashes}
+    )
+
+    # Execute
+    dataset = storage.load_virtual(
+        dataset_name=dataset_name,
+        virtual_hashes=virtual_hashes,
+        local_datasets_dir=tmp_path,
+        mmap=True,
+    )
+    xy_splits, _, _ = storage.load_splits(
+        dataset_name=dataset_name, get_local_datasets_dir=lambda: tmp_path
+    )
+
+    # Assert
+    (x_train, _), _ = base
+    assert isinstance(dataset.x_train, np.memmap)
+    assert len(xy_splits) == 3
+    for indices, (x, _) in zip(index_map[0], xy_splits):
+        np.testing.assert_array_equal(x, x_train[indices])
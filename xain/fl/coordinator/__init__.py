@@ -1,3 +1,4 @@
 from .aggregate import Aggregator
 from .controller import RandomController, RoundRobinController
 from .coordinator import Coordinator
+from .executor import Executor, ProcessExecutor, SequentialExecutor, ThreadExecutor
@@ -1,21 +1,52 @@
 from abc import ABC
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 from absl import logging
 
 from xain.types import KerasWeights
 
-from .evaluator import Evaluator
+from .evaluator import Evaluator, EvaluatorPool
+from .weights import DTYPE, WeightsLayout, layout_of
 
 
 class Aggregator(ABC):
+    """Combines the updates of one round into new global weights
+
+    Updates are either passed all at once to `aggregate` or streamed in as they
+    arrive, i.e. `begin_round`, then `add_update` for every update, then `finalize`.
+    By default the streaming interface collects all updates and calls `aggregate`
+    with them in the order of their `position`, so the result doesn't depend on the
+    order in which participants finish. Aggregators which can fold updates
+    incrementally, and whose result doesn't depend on their order, override it to
+    keep memory usage independent of the number of participants.
+    """
+
     def __init__(self):
-        pass
+        # (position, theta, num_examples) of the updates of the current round
+        self.updates: List[Tuple[int, KerasWeights, int]] = []
 
     def aggregate(self, thetas: List[Tuple[KerasWeights, int]]) -> KerasWeights:
         raise NotImplementedError()
 
+    def begin_round(self) -> None:
+        self.updates = []
+
+    def add_update(
+        self, theta: KerasWeights, num_examples: int, position: Optional[int] = None
+    ) -> None:
+        """
+        :param position: Index of the update in the round, by default its index in
+            the order of arrival
+        """
+        position = len(self.updates) if position is None else position
+        self.updates.append((position, theta, num_examples))
+
+    def finalize(self) -> KerasWeights:
+        updates, self.updates = self.updates, []
+        updates.sort(key=lambda update: update[0])
+        return self.aggregate([(theta, n) for _, theta, n in updates])
+
 
 class IdentityAgg(Aggregator):
     def aggregate(self, thetas: List[Tuple[KerasWeights, int]]) -> KerasWeights:
@@ -24,20 +55,81 @@ class IdentityAgg(Aggregator):
 
 
 class FederatedAveragingAgg(Aggregator):
+    def __init__(self):
+        super().__init__()
+        # Running weighted sum of the updates of the current round
+        self.layout: Optional[WeightsLayout] = None
+        self.theta_sum: Optional[np.ndarray] = None
+        self.theta_scratch: Optional[np.ndarray] = None
+        self.weighting_sum: int = 0
+
     def aggregate(self, thetas: List[Tuple[KerasWeights, int]]) -> KerasWeights:
         theta_list = [theta for theta, _ in thetas]
         weighting = np.array([num_examples for _, num_examples in thetas])
         return federated_averaging(theta_list, weighting)
 
+    def begin_round(self) -> None:
+        self.theta_sum = None
+        self.weighting_sum = 0
+
+    def add_update(
+        self, theta: KerasWeights, num_examples: int, position: Optional[int] = None
+    ) -> None:
+        # A weighted sum doesn't depend on the order of the updates (up to rounding)
+        layout = layout_of(theta)
+        if self.layout is not layout:
+            self.layout = layout
+            self.theta_scratch = np.empty((layout.size,), dtype=DTYPE)
+        assert self.theta_scratch is not None
+        if self.theta_sum is None:
+            self.theta_sum = np.zeros((layout.size,), dtype=DTYPE)
+        # Fold the update into the running sum without allocating temporaries
+        layout.flatten(theta, out=self.theta_scratch)
+        self.theta_scratch *= num_examples
+        self.theta_sum += self.theta_scratch
+        self.weighting_sum += num_examples
+
+    def finalize(self) -> KerasWeights:
+        assert self.layout is not None and self.theta_sum is not None, "No updates"
+        theta_sum, self.theta_sum = self.theta_sum, None
+        theta_sum /= self.weighting_sum
+        return self.layout.unflatten(theta_sum)
+
 
 class EvoAgg(Aggregator):
-    def __init__(self, evaluator: Evaluator):
+    def __init__(
+        self,
+        evaluator: Evaluator,
+        population_size: int = 3,
+        top_n: int = 1,
+        num_evaluators: Optional[int] = None,
+    ):
+        """
+        :param population_size: Number of candidates evaluated in each round
+        :param top_n: Number of best candidates which are averaged
+        :param num_evaluators: Number of candidates evaluated concurrently, defaults
+            to `population_size`
+        """
         super().__init__()
+        assert 1 <= top_n <= population_size
         self.evaluator = evaluator
+        self.population_size = population_size
+        self.top_n = top_n
+        self.num_evaluators = num_evaluators if num_evaluators else population_size
+        self.evaluator_pool: Optional[EvaluatorPool] = None
 
     def aggregate(self, thetas: List[Tuple[KerasWeights, int]]) -> KerasWeights:
+        if self.evaluator_pool is None:
+            # Replicas are created once and reused in all later rounds
+            self.evaluator_pool = EvaluatorPool(self.evaluator, self.num_evaluators)
         weight_matrices = [theta for theta, num_examples in thetas]
-        return evo_agg(weight_matrices, self.evaluator, False)
+        return evo_agg(
+            weight_matrices,
+            self.evaluator_pool,
+            False,
+            population_size=self.population_size,
+            top_n=self.top_n,
+        )
 
 
 def federated_averaging(
@@ -46,24 +138,30 @@ def federated_averaging(
     assert weighting.ndim == 1
     assert len(thetas) == weighting.shape[0]
 
-    theta_avg: KerasWeights = thetas[0]
-    for w in theta_avg:
-        w *= weighting[0]
+    layout, stacked = stack_thetas(thetas)
+
+    # Aggregate (weighted) updates in a single matrix-vector product
+    theta_avg_flat = weighting.astype(DTYPE) @ stacked
+    theta_avg_flat /= np.sum(weighting)
 
-    # Aggregate (weighted) updates
-    for theta, update_weighting in zip(thetas[1:], weighting[1:]):
-        for w_index, w in enumerate(theta):
-            theta_avg[w_index] += update_weighting * w
+    return layout.unflatten(theta_avg_flat)
 
-    weighting_sum = np.sum(weighting)
-    for w in theta_avg:
-        w /= weighting_sum
 
-    return theta_avg
+def stack_thetas(thetas: List[KerasWeights]) -> Tuple[WeightsLayout, np.ndarray]:
+    """Flattens thetas into the rows of one contiguous (len(thetas), size) matrix"""
+    layout = layout_of(thetas[0])
+    stacked = np.empty((len(thetas), layout.size), dtype=DTYPE)
+    for theta, row in zip(thetas, stacked):
+        layout.flatten(theta, out=row)
+    return layout, stacked
 
 
 def evo_agg(
-    thetas: List[KerasWeights], evaluator: Evaluator, verbose=False
+    thetas: List[KerasWeights],
+    evaluator_pool: EvaluatorPool,
+    verbose=False,
+    population_size: int = 3,
+    top_n: int = 1,
 ) -> KerasWeights:
     """
     - Init different weightings
@@ -71,40 +169,30 @@ def evo_agg(
     - Evaluate all candidates on the validation set
     - Pick (a) best candidate, or (b) average of n best candidates
     """
-    # Compute candidates
-    # TODO in parallel, do:
-    theta_prime_candidates = []
-    for i in range(3):
-        candidate = compute_candidate(thetas, evaluator)
-        if verbose:
+    layout, stacked = stack_thetas(thetas)
+
+    # Compute all candidates in a single matrix product
+    weightings = random_weighting((population_size, len(thetas)))
+    weightings /= np.sum(weightings, axis=1, keepdims=True)
+    candidates = weightings.astype(DTYPE) @ stacked
+
+    # Evaluate candidates in parallel
+    results = evaluator_pool.evaluate_all([layout.unflatten(c) for c in candidates])
+    if verbose:
+        for i, (weighting, (loss, _)) in enumerate(zip(weightings, results)):
             logging.info(
-                "candidate {} (weighting {}): {} loss".format(
-                    i, candidate[0], candidate[2]
-                )
+                "candidate {} (weighting {}): {} loss".format(i, weighting, loss)
             )
-        theta_prime_candidates.append(candidate)
-    # Return best candidate
-    best_candidate = pick_best_candidate(theta_prime_candidates)
-    return best_candidate
-
 
-def pick_best_candidate(candidates: List) -> KerasWeights:
-    _, best_candidate, best_loss, _ = candidates[0]
-    for _, candidate, loss, _ in candidates[1:]:
-        if loss < best_loss:
-            best_candidate = candidate
-            best_loss = loss
-    return best_candidate
+    # Return (average of the) best candidate(s)
+    best_indices = pick_best_candidates([loss for loss, _ in results], top_n)
+    return layout.unflatten(np.mean(candidates[best_indices], axis=0))
 
 
-def compute_candidate(
-    thetas: KerasWeights, evaluator: Evaluator
-) -> Tuple[np.ndarray, KerasWeights, float, float]:
-    weighting = random_weighting(len(thetas))
-    theta_prime_candidate = federated_averaging(thetas, weighting)
-    loss, acc = evaluator.evaluate(theta_prime_candidate)
-    return weighting, theta_prime_candidate, loss, acc
+def pick_best_candidates(losses: List[float], top_n: int = 1) -> np.ndarray:
+    """Returns the indices of the `top_n` candidates with the lowest loss"""
+    return np.argsort(losses, kind="stable")[:top_n]
 
 
-def random_weighting(num_weightings: int, low=0.5, high=1.5) -> np.ndarray:
-    return np.random.uniform(low=low, high=high, size=(num_weightings,))
+def random_weighting(size: Tuple[int, ...], low=0.5, high=1.5) -> np.ndarray:
+    return np.random.uniform(low=low, high=high, size=size)
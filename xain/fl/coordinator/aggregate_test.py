@@ -1,6 +1,18 @@
 import numpy as np
 
 from . import aggregate
+from .evaluator import EvaluatorPool
+
+
+class MeanEvaluator:
+    """Stands in for an `Evaluator`, scores theta by the negative mean of its first
+    tensor"""
+
+    def evaluate(self, theta):
+        return -float(np.mean(theta[0])), 0.0
+
+    def replicate(self):
+        return MeanEvaluator()
 
 
 def test_federated_averaging():  # pylint: disable=too-many-locals
@@ -39,3 +51,112 @@ def test_federated_averaging():  # pylint: disable=too-many-locals
     for w_index, w_actual in enumerate(theta_actual):
         w_expected = theta_expected[w_index]
         np.testing.assert_array_equal(w_actual, w_expected)
+
+
+def test_federated_averaging_does_not_modify_thetas():
+    # Prepare
+    u0 = [np.array([[1.0, 2.0], [3.0, 4.0]]), np.zeros((2))]
+    u1 = [np.array([[3.0, 2.0], [1.0, 0.0]]), np.ones((2))]
+    thetas = [[np.copy(w) for w in u0], [np.copy(w) for w in u1]]
+
+    # Execute
+    aggregate.federated_averaging(thetas, np.ones((2)))
+
+    # Assert
+    for theta_expected, theta_actual in zip([u0, u1], thetas):
+        for w_expected, w_actual in zip(theta_expected, theta_actual):
+            np.testing.assert_array_equal(w_expected, w_actual)
+
+
+def test_federated_averaging_weighted():
+    # Prepare
+    u0 = [np.array([[1.0, 2.0], [3.0, 4.0]]), np.zeros((2))]
+    u1 = [np.array([[4.0, 5.0], [6.0, 7.0]]), np.ones((2))]
+    weighting = np.array([2, 1])
+
+    theta_expected = [np.array([[2.0, 3.0], [4.0, 5.0]]), np.full((2), 1 / 3)]
+
+    # Execute
+    theta_actual = aggregate.federated_averaging([u0, u1], weighting)
+
+    # Assert
+    for w_expected, w_actual in zip(theta_expected, theta_actual):
+        assert w_expected.shape == w_actual.shape
+        np.testing.assert_allclose(w_expected, w_actual, rtol=1e-6)
+
+
+def test_FederatedAveragingAgg_streaming_matches_aggregate():
+    # Prepare
+    thetas = [
+        ([np.full((2, 3), float(i)), np.full((2), 2.0 * i)], num_examples)
+        for i, num_examples in enumerate([3, 1, 4])
+    ]
+    agg = aggregate.FederatedAveragingAgg()
+    theta_expected = agg.aggregate(thetas)
+
+    # Execute
+    for _ in range(2):  # The second round must not see updates of the first one
+        agg.begin_round()
+        for theta, num_examples in reversed(thetas):
+            agg.add_update(theta, num_examples)
+        theta_actual = agg.finalize()
+
+    # Assert
+    for w_expected, w_actual in zip(theta_expected, theta_actual):
+        assert w_expected.shape == w_actual.shape
+        np.testing.assert_allclose(w_expected, w_actual, rtol=1e-6)
+
+
+def test_Aggregator_streaming_defaults_to_aggregate():
+    # Prepare
+    theta = [np.ones((2, 2)), np.zeros((2))]
+    agg = aggregate.IdentityAgg()
+
+    # Execute
+    agg.begin_round()
+    agg.add_update(theta, 10)
+    theta_actual = agg.finalize()
+
+    # Assert
+    assert theta_actual is theta
+
+
+def test_Aggregator_streaming_aggregates_in_order_of_position():
+    # Prepare
+    thetas = [([np.full((2), float(i))], i + 1) for i in range(4)]
+    aggregated = []
+
+    class RecordingAgg(aggregate.Aggregator):
+        def aggregate(self, thetas):
+            aggregated.extend(thetas)
+            return thetas[0][0]
+
+    agg = RecordingAgg()
+
+    # Execute
+    agg.begin_round()
+    for position in [2, 0, 3, 1]:
+        agg.add_update(*thetas[position], position=position)
+    agg.finalize()
+
+    # Assert
+    assert [num_examples for _, num_examples in aggregated] == [1, 2, 3, 4]
+
+
+def test_evo_agg_averages_top_n_candidates():
+    # Prepare
+    thetas = [[np.zeros((2, 2)), np.zeros((2))], [np.ones((2, 2)), np.ones((2))]]
+    evaluator_pool = EvaluatorPool(MeanEvaluator(), num_evaluators=2)
+
+    np.random.seed(0)
+    weightings = np.random.uniform(low=0.5, high=1.5, size=(4, 2))
+    # The value of each candidate is the relative weight of the second theta
+    values = np.sort(weightings[:, 1] / np.sum(weightings, axis=1))
+    np.random.seed(0)
+
+    # Execute
+    theta_actual = aggregate.evo_agg(thetas, evaluator_pool, population_size=4, top_n=2)
+
+    # Assert
+    for w_actual in theta_actual:
+        np.testing.assert_allclose(w_actual, np.mean(values[-2:]), rtol=1e-6)
@@ -0,0 +1,64 @@
+"""Checkpoints of the state of `Coordinator.fit` after a completed round
+
+A checkpoint holds everything needed to continue training with the next round:
+the coordinator's weights and epoch count, the state of its controller and of
+the global random number generators it draws from, and the histories of all
+rounds so far. Checkpoints are pickled into a temporary file which is moved into
+place once complete, so a process killed while writing one always leaves the
+previous checkpoint intact.
+"""
+import concurrent.futures
+import os
+import pickle
+from typing import Dict, Optional
+
+# File name of the checkpoint inside the output directory
+CHECKPOINT_FNAME = "checkpoint.pkl"
+
+
+def write(fpath: str, state: Dict) -> None:
+    tmp_fpath = "{}.tmp".format(fpath)
+    with open(tmp_fpath, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Make sure the data is on disk before the checkpoint replaces the last one
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_fpath, fpath)
+
+
+def read(fpath: str) -> Optional[Dict]:
+    """Returns the checkpoint stored in fpath, None if there is none"""
+    if not os.path.isfile(fpath):
+        return None
+    with open(fpath, "rb") as f:
+        return pickle.load(f)
+
+
+class CheckpointWriter:
+    """Writes checkpoints in the background while training continues
+
+    Checkpoints are written one after another in the order they were submitted.
+    An error while writing a checkpoint is raised by the next call of `submit`
+    or `close`.
+    """
+
+    def __init__(self, fpath: str) -> None:
+        self.fpath = fpath
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.pending: Optional[concurrent.futures.Future] = None
+
+    def submit(self, state: Dict) -> None:
+        """Writes state, which must not be modified afterwards, as checkpoint"""
+        self.wait()
+        self.pending = self.executor.submit(write, self.fpath, state)
+
+    def wait(self) -> None:
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            pending.result()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown()
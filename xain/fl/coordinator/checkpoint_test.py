@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from . import checkpoint
+
+
+def test_write_read(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, checkpoint.CHECKPOINT_FNAME)
+    state = {"round": 2, "theta": [np.arange(6, dtype=np.float32).reshape((2, 3))]}
+
+    # Execute
+    state_before = checkpoint.read(fpath)
+    checkpoint.write(fpath, state)
+    state_after = checkpoint.read(fpath)
+
+    # Assert
+    assert state_before is None
+    assert state_after["round"] == 2
+    np.testing.assert_array_equal(state_after["theta"][0], state["theta"][0])
+    assert os.listdir(tmp_path) == [checkpoint.CHECKPOINT_FNAME]
+
+
+def test_CheckpointWriter(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, checkpoint.CHECKPOINT_FNAME)
+    writer = checkpoint.CheckpointWriter(fpath)
+
+    # Execute
+    for r in range(1, 4):
+        writer.submit({"round": r})
+    writer.close()
+
+    # Assert
+    assert checkpoint.read(fpath) == {"round": 3}
+
+
+def test_CheckpointWriter_raises(tmp_path):
+    # Prepare
+    fpath = os.path.join(tmp_path, "missing", checkpoint.CHECKPOINT_FNAME)
+    writer = checkpoint.CheckpointWriter(fpath)
+
+    # Execute
+    writer.submit({"round": 1})
+
+    # Assert
+    with pytest.raises(FileNotFoundError):
+        writer.close()
@@ -1,17 +1,29 @@
 import concurrent.futures
+import copy
+import random
+from functools import partial
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import tensorflow as tf
 from absl import flags, logging
 from numpy import ndarray
 
 from xain.datasets import prep
-from xain.fl.logging.logging import create_summary_writer, write_summaries
+from xain.fl.logging.logging import (
+    create_summary_writer,
+    write_summaries,
+    write_timings,
+)
 from xain.fl.participant import ModelProvider, Participant
+from xain.helpers import timing
 from xain.types import KerasHistory, KerasWeights, Metrics
 
+from . import checkpoint
 from .aggregate import Aggregator, FederatedAveragingAgg
+from .evaluator import Evaluator
+from .executor import Executor, ThreadExecutor
 
 FLAGS = flags.FLAGS
 
@@ -28,28 +40,62 @@ class Coordinator:
         E: int,
         xy_val: Tuple[ndarray, ndarray],
         aggregator: Optional[Aggregator] = None,
+        executor: Optional[Executor] = None,
+        eval_batch_size: Optional[int] = None,
+        async_eval: bool = False,
+        checkpoint_every: Optional[int] = None,
     ) -> None:
+        """
+        :param async_eval: If set, validation and summary writing of each round run
+            in the background while the next round is already training
+        :param checkpoint_every: If set, a checkpoint is written into the output
+            directory (in the background) after every this many rounds
+        """
         self.controller = controller
         self.model = model_provider.init_model()
         self.participants = participants
         self.C = C
         self.E = E
         self.xy_val = xy_val
+        self.xy_val_prepared: Optional[Tuple[ndarray, ndarray]] = None
+        self.eval_batch_size = eval_batch_size
+        self.async_eval = async_eval
         self.aggregator = aggregator if aggregator else FederatedAveragingAgg()
+        self.executor = executor if executor else ThreadExecutor()
+        self.checkpoint_every = checkpoint_every if checkpoint_every else 0
         self.epoch = 0  # Count training epochs
 
     # Common initialization happens implicitly: By updating the participant weights to
     # match the coordinator weights ahead of every training round we achieve common
     # initialization.
     def fit(
-        self, num_rounds: int
+        self, num_rounds: int, resume: bool = False
     ) -> Tuple[KerasHistory, List[List[KerasHistory]], List[List[Metrics]]]:
+        """
+        :param resume: Continue after the last round of the checkpoint in the output
+            directory (if there is one) instead of starting from scratch
+        """
         # Initialize history; history coordinator
         hist_co: KerasHistory = {"val_loss": [], "val_acc": []}
         # Train rounds; training history of selected participants
         hist_ps: List[List[KerasHistory]] = []
         # History of participant metrics in each round
         hist_metrics: List[List[Metrics]] = []
+        # Validations still running in the background with async_eval
+        pending_val: List[concurrent.futures.Future] = []
+
+        checkpoint_fpath = str(
+            Path(FLAGS.output_dir).joinpath(checkpoint.CHECKPOINT_FNAME)
+        )
+        first_round = 0
+        state = self._resume(checkpoint_fpath, num_rounds) if resume else None
+        if state is not None:
+            first_round = state["round"]
+            hist_co, hist_ps = state["hist_co"], state["hist_ps"]
+            hist_metrics = state["hist_metrics"]
+        checkpoint_writer: Optional[checkpoint.CheckpointWriter] = None
+        if self.checkpoint_every:
+            checkpoint_writer = checkpoint.CheckpointWriter(checkpoint_fpath)
 
         # Defining log directory and file writer for tensorboard logging
         val_log_dir: str = str(
@@ -57,29 +103,59 @@ class Coordinator:
         )
         summary_writer = create_summary_writer(logdir=val_log_dir)
 
-        for r in range(num_rounds):
-            # Determine who participates in this round
-            num_indices = abs_C(self.C, self.num_participants())
-            indices = self.controller.indices(num_indices)
-            msg = f"Round {r+1}/{num_rounds}: Participants {indices}"
-            logging.info(msg)
-
-            # Train
-            histories, train_metrics = self.fit_round(indices, self.E)
-            hist_ps.append(histories)
-            hist_metrics.append(train_metrics)
-
-            # Evaluate
-            val_loss, val_acc = self.evaluate(self.xy_val)
-            # Writing validation loss and accuracy into summary
-            write_summaries(
-                summary_writer=summary_writer,
-                val_acc=val_acc,
-                val_loss=val_loss,
-                train_round=r,
-            )
-            hist_co["val_loss"].append(val_loss)
-            hist_co["val_acc"].append(val_acc)
+        # Validate on a separate model in the background if required
+        val_evaluator: Optional[Evaluator] = None
+        eval_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        if self.async_eval:
+            val_evaluator = Evaluator(
+                self.model, self.xy_val, self.eval_batch_size
+            ).replicate()
+            eval_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        for r in range(first_round, num_rounds):
+            with timing.section("round"):
+                # Determine who participates in this round
+                with timing.section("select"):
+                    num_indices = abs_C(self.C, self.num_participants())
+                    indices = self.controller.indices(num_indices)
+                msg = f"Round {r+1}/{num_rounds}: Participants {indices}"
+                logging.info(msg)
+
+                # Train
+                histories, train_metrics = self.fit_round(indices, self.E)
+                hist_ps.append(histories)
+                hist_metrics.append(train_metrics)
+
+                # Evaluate
+                if val_evaluator and eval_executor:
+                    self._submit_validation(
+                        val_evaluator, eval_executor, summary_writer, r, pending_val
+                    )
+                else:
+                    evaluate_fn = partial(self.evaluate, self.xy_val)
+                    append_val(hist_co, validate(evaluate_fn, summary_writer, r))
+
+            if timing.enabled:
+                # With async_eval, a validation is counted in the round it ends in
+                write_timings(summary_writer, timing.end_round(), r)
+
+            if checkpoint_writer and (
+                (r + 1) % self.checkpoint_every == 0 or r + 1 == num_rounds
+            ):
+                self._submit_checkpoint(
+                    checkpoint_writer,
+                    r + 1,
+                    hist_co,
+                    hist_ps,
+                    hist_metrics,
+                    pending_val,
+                )
+
+        if checkpoint_writer:
+            checkpoint_writer.close()
+        if eval_executor:
+            eval_executor.shutdown()
+        collect_pending_val(hist_co, pending_val)
 
         logging.info(
             "TensorBoard coordinator validation logs saved: {}".format(val_log_dir)
@@ -93,81 +169,149 @@ the console and open "localhost:6006" in a browser'.format(
 
         return hist_co, hist_ps, hist_metrics
 
+    def _resume(self, checkpoint_fpath: str, num_rounds: int) -> Optional[Dict]:
+        """Restores the checkpoint in checkpoint_fpath and returns it, None if there
+        is none"""
+        state = checkpoint.read(checkpoint_fpath)
+        if state is not None:
+            logging.info(
+                "Resuming after round {} of {}".format(state["round"], num_rounds)
+            )
+            self.restore(state)
+        return state
+
+    def _submit_validation(
+        self,
+        val_evaluator: Evaluator,
+        eval_executor: concurrent.futures.ThreadPoolExecutor,
+        summary_writer,
+        train_round: int,
+        pending_val: List[concurrent.futures.Future],
+    ) -> None:
+        """Validates the model after train_round in the background"""
+        # Snapshot theta, the next round will update the model's weights
+        evaluate_fn = partial(val_evaluator.evaluate, self.model.get_weights())
+        pending_val.append(
+            eval_executor.submit(validate, evaluate_fn, summary_writer, train_round)
+        )
+
+    def _submit_checkpoint(
+        self,
+        checkpoint_writer: checkpoint.CheckpointWriter,
+        num_rounds_done: int,
+        hist_co: KerasHistory,
+        hist_ps: List[List[KerasHistory]],
+        hist_metrics: List[List[Metrics]],
+        pending_val: List[concurrent.futures.Future],
+    ) -> None:
+        # A checkpoint includes the validation of its last round
+        collect_pending_val(hist_co, pending_val)
+        checkpoint_writer.submit(
+            self.snapshot(num_rounds_done, hist_co, hist_ps, hist_metrics)
+        )
+
     def fit_round(
         self, indices: List[int], E: int
     ) -> Tuple[List[KerasHistory], List[Metrics]]:
-        theta = self.model.get_weights()
-        participants = [self.participants[i] for i in indices]
-        # Collect training results from the participants of this round
-        theta_updates, histories, train_metrics = self.train_local_concurrently(
-            theta, participants, E
+        with timing.section("broadcast"):
+            theta = self.model.get_weights()
+        histories: List = [None] * len(indices)
+        train_metrics: List = [None] * len(indices)
+        # Aggregate training results as soon as each participant is done
+        results = self.executor.train_as_completed(
+            self.participants, indices, theta, E, self.epoch
         )
-        # Aggregate training results
-        theta_prime = self.aggregator.aggregate(theta_updates)
-        # Update own model parameters
-        self.model.set_weights(theta_prime)
+        self.aggregator.begin_round()
+        for position, theta_update, history, metrics in results:
+            with timing.section("aggregate"):
+                self.aggregator.add_update(*theta_update, position=position)
+            histories[position] = history
+            train_metrics[position] = metrics
+        with timing.section("aggregate"):
+            theta_prime = self.aggregator.finalize()
+            # Update own model parameters
+            self.model.set_weights(theta_prime)
         self.epoch += E
         return histories, train_metrics
 
-    def train_local_sequentially(
-        self, theta: KerasWeights, participants: List[Participant], E: int
-    ) -> Tuple[List[Tuple[KerasWeights, int]], List[KerasHistory], List[Metrics]]:
-        """Train on each participant sequentially"""
-        theta_updates: List[Tuple[KerasWeights, int]] = []
-        histories: List[KerasHistory] = []
-        train_metrics: List[Metrics] = []
-        for participant in participants:
-            # Train one round on this particular participant:
-            # - Push current model parameters to this participant
-            # - Train for a number of epochs
-            # - Pull updated model parameters from participant
-            theta_update, hist = participant.train_round(
-                theta, epochs=E, epoch_base=self.epoch
-            )
-            metrics = participant.metrics()
-            theta_updates.append(theta_update)
-            histories.append(hist)
-            train_metrics.append(metrics)
-        return theta_updates, histories, train_metrics
-
-    def train_local_concurrently(
-        self, theta: KerasWeights, participants: List[Participant], E: int
-    ) -> Tuple[List[Tuple[KerasWeights, int]], List[KerasHistory], List[Metrics]]:
-        """Train on each participant concurrently"""
-        theta_updates: List[Tuple[KerasWeights, int]] = []
-        histories: List[KerasHistory] = []
-        train_metrics: List[Metrics] = []
-        # Wait for all futures to complete
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_results = [
-                executor.submit(train_local, p, theta, E, self.epoch)
-                for p in participants
-            ]
-            concurrent.futures.wait(future_results)
-            for future in future_results:
-                theta_update, hist, metrics = future.result()
-                theta_updates.append(theta_update)
-                histories.append(hist)
-                train_metrics.append(metrics)
-        return theta_updates, histories, train_metrics
+    def snapshot(
+        self,
+        num_rounds_done: int,
+        hist_co: KerasHistory,
+        hist_ps: List[List[KerasHistory]],
+        hist_metrics: List[List[Metrics]],
+    ) -> Dict:
+        """Returns the state of training after num_rounds_done rounds, see
+        `xain.fl.coordinator.checkpoint`"""
+        return {
+            "round": num_rounds_done,
+            "epoch": self.epoch,
+            "theta": self.model.get_weights(),
+            "controller": copy.deepcopy(self.controller.__dict__),
+            # Controllers draw from the global random number generators
+            "random_state": random.getstate(),
+            "np_random_state": np.random.get_state(),
+            # Histories of past rounds are never modified, copying the lists suffices
+            "hist_co": {key: list(values) for key, values in hist_co.items()},
+            "hist_ps": list(hist_ps),
+            "hist_metrics": list(hist_metrics),
+            "timings": list(timing.rounds),
+        }
+
+    def restore(self, state: Dict) -> int:
+        """Restores the state of a snapshot, returns the number of its rounds"""
+        self.model.set_weights(state["theta"])
+        self.epoch = state["epoch"]
+        self.controller.__dict__.update(state["controller"])
+        random.setstate(state["random_state"])
+        np.random.set_state(state["np_random_state"])
+        timing.rounds[:] = state["timings"]
+        return state["round"]
 
     def evaluate(self, xy_val: Tuple[ndarray, ndarray]) -> Tuple[float, float]:
-        ds_val = prep.init_ds_val(xy_val)
-        # Assume the validation `tf.data.Dataset` to yield exactly one batch containing
-        # all examples in the validation set
-        loss, accuracy = self.model.evaluate(ds_val, steps=1)
-        return float(loss), float(accuracy)
+        if xy_val is self.xy_val:
+            # The validation set is evaluated every round, so only prepare it once
+            if self.xy_val_prepared is None:
+                self.xy_val_prepared = prep.prepare_xy(xy_val)
+            xy_prepared = self.xy_val_prepared
+        else:
+            xy_prepared = prep.prepare_xy(xy_val)
+        return prep.evaluate_prepared(self.model, xy_prepared, self.eval_batch_size)
 
     def num_participants(self) -> int:
         return len(self.participants)
 
 
-def train_local(
-    p: Participant, theta: KerasWeights, epochs: int, epoch_base: int
-) -> Tuple[Tuple[KerasWeights, int], KerasHistory, Metrics]:
-    theta_update, history = p.train_round(theta, epochs=epochs, epoch_base=epoch_base)
-    metrics = p.metrics()
-    return theta_update, history, metrics
+def validate(
+    evaluate_fn: Callable[[], Tuple[float, float]], summary_writer, train_round: int
+) -> Tuple[float, float]:
+    with timing.section("evaluate"):
+        val_loss, val_acc = evaluate_fn()
+    # Writing validation loss and accuracy into summary
+    with timing.section("summaries"):
+        write_summaries(
+            summary_writer=summary_writer,
+            val_acc=val_acc,
+            val_loss=val_loss,
+            train_round=train_round,
+        )
+    return val_loss, val_acc
+
+
+def append_val(hist_co: KerasHistory, val_result: Tuple[float, float]) -> None:
+    val_loss, val_acc = val_result
+    hist_co["val_loss"].append(val_loss)
+    hist_co["val_acc"].append(val_acc)
+
+
+def collect_pending_val(
+    hist_co: KerasHistory, pending_val: List[concurrent.futures.Future]
+) -> None:
+    """Waits for the validations running in the background and appends their
+    results to hist_co, in the order of their rounds"""
+    for future in pending_val:
+        append_val(hist_co, future.result())
+    pending_val.clear()
 
 
 def abs_C(C: float, num_participants: int) -> int:
@@ -175,9 +319,11 @@ def abs_C(C: float, num_participants: int) -> int:
 
 
 def create_evalueate_fn(
-    orig_model: tf.keras.Model, xy_val: Tuple[ndarray, ndarray]
+    orig_model: tf.keras.Model,
+    xy_val: Tuple[ndarray, ndarray],
+    batch_size: Optional[int] = None,
 ) -> Callable[[KerasWeights], Tuple[float, float]]:
-    ds_val = prep.init_ds_val(xy_val)
+    xy_val_prepared = prep.prepare_xy(xy_val)
     model = tf.keras.models.clone_model(orig_model)
     # FIXME refactor model compilation
     model.compile(
@@ -188,8 +334,6 @@ def create_evalueate_fn(
 
     def fn(theta: KerasWeights) -> Tuple[float, float]:
         model.set_weights(theta)
-        # Assume the validation `tf.data.Dataset` to yield exactly one batch containing
-        # all examples in the validation set
-        return model.evaluate(ds_val, steps=1)
+        return prep.evaluate_prepared(model, xy_val_prepared, batch_size)
 
     return fn
@@ -1,4 +1,17 @@
-from .coordinator import abs_C
+import os
+
+import numpy as np
+
+from xain.benchmark.net import model_fns
+from xain.fl.participant import ModelProvider
+from xain.helpers import timing
+
+from . import checkpoint
+from . import coordinator as coordinator_module
+from .controller import RoundRobinController
+from .coordinator import Coordinator, abs_C
+from .executor import SequentialExecutor
+from .executor_test import create_participants
 
 
 def test_abs_C_min():
@@ -49,3 +62,142 @@ def test_abs_C_2():
     actual = abs_C(C, num_participants)
     # Assert
     assert actual == 100
+
+
+def test_Coordinator_fit_async_eval(
+    output_dir, monkeypatch
+):  # pylint: disable=unused-argument
+    # Prepare
+    summaries = []
+    monkeypatch.setattr(
+        coordinator_module, "create_summary_writer", lambda logdir: None
+    )
+    monkeypatch.setattr(
+        coordinator_module,
+        "write_summaries",
+        lambda **kwargs: summaries.append(kwargs["train_round"]),
+    )
+    participants, _ = create_participants(2)
+    xy_val = participants[0].xy_val
+    coordinator = Coordinator(
+        RoundRobinController(2),
+        ModelProvider(model_fns["blog_cnn"]),
+        participants,
+        C=0.5,
+        E=1,
+        xy_val=xy_val,
+        executor=SequentialExecutor(),
+        async_eval=True,
+    )
+
+    # Execute
+    hist_co, hist_ps, _ = coordinator.fit(num_rounds=3)
+
+    # Assert
+    assert len(hist_co["val_loss"]) == 3
+    assert len(hist_co["val_acc"]) == 3
+    assert len(hist_ps) == 3
+    assert sorted(summaries) == [0, 1, 2]
+    # The last validation ran on a snapshot of the final weights
+    val_loss, val_acc = coordinator.evaluate(xy_val)
+    np.testing.assert_allclose(hist_co["val_loss"][-1], val_loss, rtol=1e-5)
+    np.testing.assert_allclose(hist_co["val_acc"][-1], val_acc)
+
+
+def test_Coordinator_fit_instrumented(
+    output_dir, monkeypatch
+):  # pylint: disable=unused-argument
+    # Prepare
+    timings_written = []
+    monkeypatch.setattr(
+        coordinator_module, "create_summary_writer", lambda logdir: None
+    )
+    monkeypatch.setattr(coordinator_module, "write_summaries", lambda **kwargs: None)
+    monkeypatch.setattr(
+        coordinator_module,
+        "write_timings",
+        lambda summary_writer, timings, train_round: timings_written.append(
+            train_round
+        ),
+    )
+    monkeypatch.setattr(timing, "rounds", [])
+    timing.enable()
+    participants, _ = create_participants(2)
+    coordinator = Coordinator(
+        RoundRobinController(2),
+        ModelProvider(model_fns["blog_cnn"]),
+        participants,
+        C=0.5,
+        E=1,
+        xy_val=participants[0].xy_val,
+        executor=SequentialExecutor(),
+    )
+
+    # Execute
+    try:
+        coordinator.fit(num_rounds=2)
+    finally:
+        timing.enable(False)
+
+    # Assert
+    assert timings_written == [0, 1]
+    assert len(timing.rounds) == 2
+    for round_timings in timing.rounds:
+        assert set(round_timings) == {
+            "round",
+            "select",
+            "broadcast",
+            "model_init",
+            "dataset",
+            "fit",
+            "get_weights",
+            "aggregate",
+            "evaluate",
+            "summaries",
+        }
+        assert round_timings["round"] >= round_timings["fit"] > 0
+
+
+def test_Coordinator_fit_resume(
+    output_dir, monkeypatch
+):  # pylint: disable=unused-argument
+    # Prepare
+    monkeypatch.setattr(
+        coordinator_module, "create_summary_writer", lambda logdir: None
+    )
+    monkeypatch.setattr(coordinator_module, "write_summaries", lambda **kwargs: None)
+    participants, _ = create_participants(3)
+
+    def create_coordinator():
+        return Coordinator(
+            RoundRobinController(3),
+            ModelProvider(model_fns["blog_cnn"]),
+            participants,
+            C=0.3,
+            E=1,
+            xy_val=participants[0].xy_val,
+            executor=SequentialExecutor(),
+            checkpoint_every=1,
+        )
+
+    # The first run is interrupted after two rounds
+    coordinator = create_coordinator()
+    hist_co, _, _ = coordinator.fit(num_rounds=2)
+    theta = coordinator.model.get_weights()
+
+    # Execute
+    state = checkpoint.read(os.path.join(output_dir, checkpoint.CHECKPOINT_FNAME))
+    resumed_coordinator = create_coordinator()
+    hist_co_resumed, hist_ps, hist_metrics = resumed_coordinator.fit(
+        num_rounds=3, resume=True
+    )
+
+    # Assert
+    assert state["round"] == 2
+    for w_checkpointed, w in zip(state["theta"], theta):
+        np.testing.assert_array_equal(w_checkpointed, w)
+    assert hist_co_resumed["val_loss"][:2] == hist_co["val_loss"]
+    assert len(hist_co_resumed["val_loss"]) == 3
+    assert len(hist_ps) == 3
+    assert [[cid for cid, _ in metrics] for metrics in hist_metrics] == [[0], [1], [2]]
+    assert resumed_coordinator.epoch == 3
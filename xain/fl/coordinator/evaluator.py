@@ -1,4 +1,6 @@
-from typing import Tuple
+import concurrent.futures
+import queue
+from typing import List, Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
@@ -9,14 +11,75 @@ from xain.types import KerasWeights
 
 class Evaluator:
     def __init__(
-        self, model: tf.keras.Model, xy_val: Tuple[np.ndarray, np.ndarray]
+        self,
+        model: tf.keras.Model,
+        xy_val: Tuple[np.ndarray, np.ndarray],
+        batch_size: Optional[int] = None,
+        xy_val_prepared: Optional[Tuple[np.ndarray, np.ndarray]] = None,
     ) -> None:
+        """
+        :param batch_size: Number of examples evaluated at once, all by default
+        :param xy_val_prepared: `xy_val` already passed through `prep.prepare_xy`
+        """
         self.model = model
-        self.ds_val = prep.init_ds_val(xy_val)
+        self.xy_val = xy_val
+        self.batch_size = batch_size
+        # Prepare the validation set only once, it is evaluated in every round
+        self.xy_val_prepared = (
+            xy_val_prepared if xy_val_prepared else prep.prepare_xy(xy_val)
+        )
 
     def evaluate(self, theta: KerasWeights) -> Tuple[float, float]:
         self.model.set_weights(theta)
-        # Assume the validation `tf.data.Dataset` to yield exactly one batch containing
-        # all examples in the validation set
-        loss, acc = self.model.evaluate(self.ds_val, steps=1)
-        return loss, acc
+        return prep.evaluate_prepared(self.model, self.xy_val_prepared, self.batch_size)
+
+    def replicate(self) -> "Evaluator":
+        """Returns an independent evaluator on the same validation set"""
+        model = tf.keras.models.clone_model(self.model)
+        # Compile the replica like the original so both evaluate the same
+        optimizer = self.model.optimizer
+        model.compile(
+            loss=self.model.loss,
+            optimizer=optimizer.__class__.from_config(optimizer.get_config()),
+            metrics=compile_metrics(self.model),
+        )
+        return Evaluator(
+            model, self.xy_val, self.batch_size, xy_val_prepared=self.xy_val_prepared
+        )
+
+
+class EvaluatorPool:
+    """Evaluates many thetas concurrently, each on its own `Evaluator` replica
+
+    An `Evaluator` sets the weights of a single model, so one replica can only be
+    used by one thread at a time.
+    """
+
+    def __init__(self, evaluator: Evaluator, num_evaluators: int) -> None:
+        assert num_evaluators >= 1
+        self.evaluators: queue.Queue = queue.Queue()
+        self.evaluators.put(evaluator)
+        for _ in range(num_evaluators - 1):
+            self.evaluators.put(evaluator.replicate())
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=num_evaluators
+        )
+
+    def evaluate_all(self, thetas: List[KerasWeights]) -> List[Tuple[float, float]]:
+        """Returns (loss, acc) for each theta, in order"""
+        return list(self.executor.map(self.evaluate, thetas))
+
+    def evaluate(self, theta: KerasWeights) -> Tuple[float, float]:
+        evaluator = self.evaluators.get()
+        try:
+            return evaluator.evaluate(theta)
+        finally:
+            self.evaluators.put(evaluator)
+
+
+def compile_metrics(model: tf.keras.Model) -> List:
+    """Returns the metrics model was compiled with"""
+    # pylint: disable=protected-access
+    if hasattr(model, "compiled_metrics"):  # TensorFlow >= 2.2
+        return model.compiled_metrics._user_metrics
+    return model._compile_metrics
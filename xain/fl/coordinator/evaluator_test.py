@@ -0,0 +1,45 @@
+import numpy as np
+
+from xain.benchmark.net import model_fns
+
+from .evaluator import Evaluator, compile_metrics
+
+
+def test_Evaluator_evaluate_does_not_depend_on_batch_size():
+    # Prepare
+    x = np.random.randint(0, high=256, size=(50, 28, 28)).astype(np.uint8)
+    y = np.random.randint(0, high=10, size=(50)).astype(np.uint8)
+    model = model_fns["orig_2nn"]()
+    theta = model.get_weights()
+    evaluator = Evaluator(model, (x, y))
+
+    # Execute
+    loss_expected, acc_expected = evaluator.evaluate(theta)
+    loss_actual, acc_actual = Evaluator(
+        model, (x, y), batch_size=16, xy_val_prepared=evaluator.xy_val_prepared
+    ).evaluate(theta)
+
+    # Assert
+    np.testing.assert_allclose(loss_expected, loss_actual, rtol=1e-5)
+    assert acc_expected == acc_actual
+
+
+def test_Evaluator_replicate_compiles_like_the_original():
+    # Prepare
+    x = np.random.randint(0, high=256, size=(50, 28, 28)).astype(np.uint8)
+    y = np.random.randint(0, high=10, size=(50)).astype(np.uint8)
+    model = model_fns["orig_2nn"]()
+    evaluator = Evaluator(model, (x, y))
+
+    # Execute
+    replica = evaluator.replicate()
+
+    # Assert
+    assert replica.model is not model
+    assert replica.model.loss is model.loss
+    assert replica.model.optimizer is not model.optimizer
+    assert isinstance(replica.model.optimizer, model.optimizer.__class__)
+    assert replica.model.optimizer.get_config() == model.optimizer.get_config()
+    assert compile_metrics(replica.model) == compile_metrics(model)
+    theta = model.get_weights()
+    np.testing.assert_allclose(replica.evaluate(theta), evaluator.evaluate(theta))
@@ -0,0 +1,311 @@
+import concurrent.futures
+import ctypes
+import multiprocessing
+import os
+import traceback
+from abc import ABC
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from absl import logging
+
+from xain.fl.participant import Participant
+from xain.helpers import performance, timing
+from xain.types import KerasHistory, KerasWeights, Metrics
+
+from .weights import WeightsLayout, layout_of
+
+TrainResults = Tuple[List[Tuple[KerasWeights, int]], List[KerasHistory], List[Metrics]]
+# Position in `indices`, (theta_update, num_examples), history, metrics
+CompletedResult = Tuple[int, Tuple[KerasWeights, int], KerasHistory, Metrics]
+
+
+class Executor(ABC):
+    """Runs the local training of the participants selected for one round"""
+
+    def train(
+        self,
+        participants: List[Participant],
+        indices: List[int],
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+    ) -> TrainResults:
+        """Train on each participant; results are ordered like `indices`"""
+        results: List = [None] * len(indices)
+        for position, theta_update, history, metrics in self.train_as_completed(
+            participants, indices, theta, epochs, epoch_base
+        ):
+            results[position] = (theta_update, history, metrics)
+        return unzip_results(results)
+
+    def train_as_completed(
+        self,
+        participants: List[Participant],
+        indices: List[int],
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+    ) -> Iterator[CompletedResult]:
+        """Train on each participant, yielding each result as soon as it is ready
+
+        Every result carries its position in `indices` as results may arrive in any
+        order.
+        """
+        raise NotImplementedError()
+
+
+class SequentialExecutor(Executor):
+    def train_as_completed(
+        self,
+        participants: List[Participant],
+        indices: List[int],
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+    ) -> Iterator[CompletedResult]:
+        """Train on each participant sequentially"""
+        for position, i in enumerate(indices):
+            yield (position, *train_local(participants[i], theta, epochs, epoch_base))
+
+
+class ThreadExecutor(Executor):
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        # Keep the threads alive across rounds
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def train_as_completed(
+        self,
+        participants: List[Participant],
+        indices: List[int],
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+    ) -> Iterator[CompletedResult]:
+        """Train on each participant concurrently"""
+        future_positions = {
+            self.executor.submit(
+                train_local, participants[i], theta, epochs, epoch_base
+            ): position
+            for position, i in enumerate(indices)
+        }
+        for future in concurrent.futures.as_completed(future_positions):
+            # Drop our reference so the result can be freed once it was consumed
+            position = future_positions.pop(future)
+            yield (position, *future.result())
+
+
+class ProcessExecutor(Executor):
+    """Trains participants in a persistent pool of worker processes
+
+    Each worker is pinned to its own group of `cores_per_worker` cores and runs its
+    own TensorFlow runtime, so local training neither competes for the GIL nor for
+    the intra-op threads of a shared runtime. The pool is started on the first call
+    to `train` and every worker receives all participants once at startup. Models
+    are reused across rounds through the `ModelProvider` model pool.
+
+    Weights never travel through pickle: the coordinator writes theta into a shared
+    buffer which all workers read from, and each worker writes its update into its
+    own slot of a second shared buffer.
+    """
+
+    def __init__(self, cores_per_worker: int = 1, num_workers: Optional[int] = None):
+        assert cores_per_worker >= 1
+        self.cores_per_worker = cores_per_worker
+        self.num_workers: int = (
+            num_workers
+            if num_workers
+            else max(1, (os.cpu_count() or 1) // cores_per_worker)
+        )
+        self.participants: Optional[List[Participant]] = None
+        self.layout: Optional[WeightsLayout] = None
+        self.theta_flat: Optional[np.ndarray] = None
+        self.workers: List[_Worker] = []
+
+    def train_as_completed(
+        self,
+        participants: List[Participant],
+        indices: List[int],
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+    ) -> Iterator[CompletedResult]:
+        """Train on each participant in one of the worker processes"""
+        if not self.workers:
+            self.start(participants, theta)
+        assert participants is self.participants, "Pool serves other participants"
+        assert self.layout is not None and self.theta_flat is not None
+
+        # Broadcast theta; workers read it straight from shared memory
+        with timing.section("broadcast"):
+            self.layout.flatten(theta, out=self.theta_flat)
+
+        pending: Deque[Tuple[int, int]] = deque(enumerate(indices))
+        idle = list(self.workers)
+        busy: Dict = {}  # Connection -> (worker, position in results)
+
+        try:
+            while pending or busy:
+                while pending and idle:
+                    worker = idle.pop()
+                    position, index = pending.popleft()
+                    worker.conn.send((index, epochs, epoch_base))
+                    busy[worker.conn] = (worker, position)
+                for conn in wait(list(busy)):
+                    worker, position = busy.pop(conn)
+                    idle.append(worker)
+                    yield (position, *self.receive(worker))
+        finally:
+            # If a worker failed (or the caller stopped early), the replies of the
+            # tasks still in flight must not be read as results of the next round
+            drain(busy)
+
+    def receive(self, worker: "_Worker"):
+        assert self.layout is not None
+        message = worker.conn.recv()
+        if message[0] == "error":
+            raise Exception(f"Worker {worker.worker_id} failed:\n{message[1]}")
+        _, num_examples, history, metrics, durations = message
+        # Sections timed in the worker count towards the current round
+        timing.merge(durations)
+        # Copy the update out of the slot as the worker will reuse it
+        theta_update = self.layout.unflatten(worker.update_flat.copy())
+        return (theta_update, num_examples), history, metrics
+
+    def start(self, participants: List[Participant], theta: KerasWeights) -> None:
+        self.participants = participants
+        self.layout = layout_of(theta)
+        size = self.layout.size
+
+        # Use "spawn" as forking a process with an initialized TensorFlow runtime
+        # is not safe
+        ctx = multiprocessing.get_context("spawn")
+        theta_raw = ctx.RawArray(ctypes.c_float, size)
+        updates_raw = ctx.RawArray(ctypes.c_float, size * self.num_workers)
+        self.theta_flat = np.frombuffer(theta_raw, dtype=np.float32)
+        updates_flat = np.frombuffer(updates_raw, dtype=np.float32)
+
+        num_cores = os.cpu_count() or 1
+        for worker_id in range(self.num_workers):
+            first_core = worker_id * self.cores_per_worker
+            cores = [
+                c % num_cores
+                for c in range(first_core, first_core + self.cores_per_worker)
+            ]
+            conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=run_worker,
+                args=(
+                    worker_id,
+                    child_conn,
+                    participants,
+                    cores,
+                    self.layout.shapes,
+                    theta_raw,
+                    updates_raw,
+                    timing.enabled,
+                    performance.mode(),
+                ),
+                daemon=True,
+            )
+            process.start()
+            update_flat = updates_flat[worker_id * size : (worker_id + 1) * size]
+            self.workers.append(_Worker(worker_id, process, conn, update_flat))
+
+        logging.info(
+            f"Started {self.num_workers} training workers "
+            + f"with {self.cores_per_worker} core(s) each"
+        )
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.conn.send(None)
+        for worker in self.workers:
+            worker.process.join()
+        self.workers = []
+
+
+def drain(busy: Dict) -> None:
+    """Waits for the replies of busy workers and discards them"""
+    for conn in list(busy):
+        try:
+            conn.recv()
+        except EOFError:  # The worker process is gone
+            pass
+    busy.clear()
+
+
+class _Worker:  # pylint: disable=too-few-public-methods
+    def __init__(self, worker_id: int, process, conn, update_flat: np.ndarray):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.update_flat = update_flat
+
+
+# pylint: disable-msg=too-many-arguments,too-many-locals
+def run_worker(
+    worker_id: int,
+    conn,
+    participants: List[Participant],
+    cores: List[int],
+    shapes: List[Tuple[int, ...]],
+    theta_raw,
+    updates_raw,
+    timing_enabled: bool = False,
+    performance_mode: Tuple[bool, str] = (False, "float32"),
+) -> None:
+    """Entry point of a `ProcessExecutor` worker process"""
+    timing.enable(timing_enabled)
+    # Spawned workers don't inherit the performance mode of the coordinator
+    performance.configure(*performance_mode)
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    config = tf.compat.v1.ConfigProto(
+        intra_op_parallelism_threads=len(cores), inter_op_parallelism_threads=len(cores)
+    )
+    config.graph_options.optimizer_options.global_jit_level = performance.jit_level()
+    tf.compat.v1.keras.backend.set_session(tf.compat.v1.Session(config=config))
+
+    layout = WeightsLayout(shapes)
+    theta = layout.unflatten(np.frombuffer(theta_raw, dtype=np.float32))
+    update_flat = np.frombuffer(updates_raw, dtype=np.float32)[
+        worker_id * layout.size : (worker_id + 1) * layout.size
+    ]
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        index, epochs, epoch_base = task
+        try:
+            participant = participants[index]
+            # The worker's model comes from the model pool, so it is only built once
+            (theta_update, num_examples), history = participant.train_round(
+                theta, epochs=epochs, epoch_base=epoch_base
+            )
+            metrics = participant.metrics()
+            layout.flatten(theta_update, out=update_flat)
+            conn.send(("ok", num_examples, history, metrics, timing.pop()))
+        except Exception:  # pylint: disable=broad-except
+            conn.send(("error", traceback.format_exc()))
+
+
+def train_local(
+    p: Participant, theta: KerasWeights, epochs: int, epoch_base: int
+) -> Tuple[Tuple[KerasWeights, int], KerasHistory, Metrics]:
+    theta_update, history = p.train_round(theta, epochs=epochs, epoch_base=epoch_base)
+    metrics = p.metrics()
+    return theta_update, history, metrics
+
+
+def unzip_results(
+    results: List[Tuple[Tuple[KerasWeights, int], KerasHistory, Metrics]]
+) -> TrainResults:
+    theta_updates = [theta_update for theta_update, _, _ in results]
+    histories = [history for _, history, _ in results]
+    train_metrics = [metrics for _, _, metrics in results]
+    return theta_updates, histories, train_metrics
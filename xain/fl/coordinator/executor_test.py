@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from xain.benchmark.net import model_fns
+from xain.fl.participant import ModelProvider, Participant
+
+from .executor import ProcessExecutor, SequentialExecutor, ThreadExecutor
+
+
+def create_participants(num_participants: int):
+    model_provider = ModelProvider(model_fns["blog_cnn"])
+    participants = []
+    for cid in range(num_participants):
+        num_examples = 10 + cid
+        x = np.random.randint(0, high=256, size=(num_examples, 28, 28, 1))
+        y = np.random.randint(0, high=10, size=(num_examples))
+        xy = (x.astype(np.uint8), y.astype(np.uint8))
+        participants.append(
+            Participant(cid, model_provider, xy, xy, num_classes=10, batch_size=8)
+        )
+    theta = model_provider.init_model().get_weights()
+    return participants, theta
+
+
+def test_SequentialExecutor():
+    # Prepare
+    participants, theta = create_participants(3)
+    executor = SequentialExecutor()
+
+    # Execute
+    theta_updates, histories, train_metrics = executor.train(
+        participants, [2, 0], theta, epochs=1, epoch_base=0
+    )
+
+    # Assert
+    assert [num_examples for _, num_examples in theta_updates] == [12, 10]
+    assert len(histories) == 2
+    assert [cid for cid, _ in train_metrics] == [2, 0]
+
+
+def test_ThreadExecutor_train_as_completed():
+    # Prepare
+    participants, theta = create_participants(3)
+    executor = ThreadExecutor(max_workers=2)
+
+    # Execute
+    results = list(
+        executor.train_as_completed(participants, [1, 2, 0], theta, 1, epoch_base=0)
+    )
+
+    # Assert
+    positions = [position for position, _, _, _ in results]
+    assert sorted(positions) == [0, 1, 2]
+    for position, (_, num_examples), _, (cid, _) in results:
+        assert cid == [1, 2, 0][position]
+        assert num_examples == 10 + cid
+
+
+@pytest.mark.slow
+def test_ProcessExecutor():
+    # Prepare
+    participants, theta = create_participants(4)
+    executor = ProcessExecutor(cores_per_worker=1, num_workers=2)
+
+    # Execute
+    try:
+        for _ in range(2):  # Second round reuses the running workers
+            theta_updates, histories, train_metrics = executor.train(
+                participants, [3, 1, 0], theta, epochs=1, epoch_base=0
+            )
+    finally:
+        executor.close()
+
+    # Assert
+    assert [num_examples for _, num_examples in theta_updates] == [13, 11, 10]
+    assert len(histories) == 3
+    assert [cid for cid, _ in train_metrics] == [3, 1, 0]
+    for theta_update, _ in theta_updates:
+        assert len(theta_update) == len(theta)
+        for w_update, w in zip(theta_update, theta):
+            assert w_update.shape == w.shape
+
+
+@pytest.mark.slow
+def test_ProcessExecutor_discards_results_of_failed_round():
+    # Prepare
+    participants, theta = create_participants(4)
+    executor = ProcessExecutor(cores_per_worker=1, num_workers=2)
+
+    # Execute
+    try:
+        # Participant 9 doesn't exist, so one worker fails while the other one
+        # is still training participant 0
+        with pytest.raises(Exception, match="Worker . failed"):
+            executor.train(participants, [9, 0], theta, epochs=1, epoch_base=0)
+        _, _, train_metrics = executor.train(
+            participants, [3, 1], theta, epochs=1, epoch_base=0
+        )
+    finally:
+        executor.close()
+
+    # Assert
+    assert [cid for cid, _ in train_metrics] == [3, 1]
@@ -0,0 +1,57 @@
+"""Flat, contiguous representation of `KerasWeights`
+
+A model's weights are a list of ndarrays of different shapes. Some operations, e.g.
+moving weights between processes or aggregating many updates, are a lot cheaper on a
+single contiguous buffer. `WeightsLayout` describes where each tensor of a model lives
+inside such a buffer.
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from xain.types import KerasWeights
+
+DTYPE = np.float32
+
+
+class WeightsLayout:
+    def __init__(self, shapes: List[Tuple[int, ...]]) -> None:
+        self.shapes: List[Tuple[int, ...]] = [tuple(shape) for shape in shapes]
+        sizes = [int(np.prod(shape)) for shape in self.shapes]
+        self.offsets: List[int] = np.cumsum([0] + sizes).tolist()
+        self.size: int = self.offsets[-1]
+
+    def flatten(
+        self, theta: KerasWeights, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Copies theta into one flat buffer; `out` is used as buffer if given"""
+        assert len(theta) == len(self.shapes), "theta does not match layout"
+        if out is None:
+            out = np.empty((self.size,), dtype=DTYPE)
+        assert out.shape == (self.size,)
+        for w, shape, start, end in zip(
+            theta, self.shapes, self.offsets[:-1], self.offsets[1:]
+        ):
+            out[start:end].reshape(shape)[...] = w
+        return out
+
+    def unflatten(self, flat: np.ndarray) -> KerasWeights:
+        """Returns a list of views into `flat`; no data is copied"""
+        assert flat.shape == (self.size,)
+        return [
+            flat[start:end].reshape(shape)
+            for shape, start, end in zip(
+                self.shapes, self.offsets[:-1], self.offsets[1:]
+            )
+        ]
+
+
+def layout_of(theta: KerasWeights) -> WeightsLayout:
+    """Returns the (cached) layout for weights shaped like theta"""
+    return _layout(tuple(tuple(w.shape) for w in theta))
+
+
+@lru_cache(maxsize=32)
+def _layout(shapes: Tuple[Tuple[int, ...], ...]) -> WeightsLayout:
+    return WeightsLayout(list(shapes))
@@ -0,0 +1,47 @@
+import numpy as np
+
+from .weights import WeightsLayout, layout_of
+
+
+def test_WeightsLayout_flatten_unflatten():
+    # Prepare
+    theta = [
+        np.arange(6, dtype=np.float32).reshape((2, 3)),
+        np.ones((2), dtype=np.float32),
+        np.full((1, 2, 2), 7, dtype=np.float32),
+    ]
+    layout = WeightsLayout([w.shape for w in theta])
+
+    # Execute
+    flat = layout.flatten(theta)
+    theta_actual = layout.unflatten(flat)
+
+    # Assert
+    assert layout.size == 12
+    assert flat.shape == (12,)
+    for w_expected, w_actual in zip(theta, theta_actual):
+        assert w_expected.shape == w_actual.shape
+        np.testing.assert_array_equal(w_expected, w_actual)
+
+
+def test_WeightsLayout_unflatten_returns_views():
+    # Prepare
+    layout = WeightsLayout([(2, 2), (3,)])
+    flat = np.zeros((7), dtype=np.float32)
+
+    # Execute
+    theta = layout.unflatten(flat)
+    flat[:] = 1.0
+
+    # Assert
+    for w in theta:
+        assert np.all(w == 1.0)
+
+
+def test_layout_of_is_cached():
+    # Prepare
+    theta_a = [np.zeros((3, 2)), np.zeros((2))]
+    theta_b = [np.ones((3, 2)), np.ones((2))]
+
+    # Execute & Assert
+    assert layout_of(theta_a) is layout_of(theta_b)
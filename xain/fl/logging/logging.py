@@ -1,5 +1,7 @@
 """Functions for logging TensorBoard summaries"""
 
+from typing import Dict
+
 import tensorflow as tf
 from absl import flags
 from tensorflow._api.v1.compat.v1 import Summary
@@ -63,3 +65,29 @@ def write_summaries(
     )
     # flushing each training round to observe live training in TensorBoard dashboard
     summary_writer.flush()
+
+
+def write_timings(
+    summary_writer: FileWriter, timings: Dict[str, float], train_round: int
+) -> None:
+    """Adding the seconds spent in each section of a round to an event file.
+
+    Args:
+        summary_writer (~tf.summary.FileWriter): FileWriter object writing Summaries to event files.
+        timings (Dict[str, float]): Seconds spent in each section (see `xain.helpers.timing`).
+        train_round (int): Train round, that should be logged as dependency for the timings.
+    """
+
+    summary_writer.add_summary(
+        summary=Summary(
+            value=[
+                Summary.Value(
+                    tag=f"coordinator_{FLAGS.task_name}/time_{name}",
+                    simple_value=duration,
+                )
+                for name, duration in sorted(timings.items())
+            ]
+        ),
+        global_step=train_round,
+    )
+    summary_writer.flush()
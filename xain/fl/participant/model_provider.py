@@ -1,8 +1,86 @@
-from typing import Callable
+import threading
+from typing import Callable, Dict, Optional
 
+import numpy as np
 import tensorflow as tf
 
 
 class ModelProvider:
-    def __init__(self, model_fn: Callable[[], tf.keras.Model]):
+    """Provides compiled models built by `model_fn`
+
+    Args:
+        model_fn: Builds and compiles a model; accepts an optional `epoch_base`
+        lr_fn: Learning rate to train with for a given `epoch_base`. Only required
+            if the learning rate set by `model_fn` depends on `epoch_base`.
+    """
+
+    def __init__(
+        self,
+        model_fn: Callable[[], tf.keras.Model],
+        lr_fn: Optional[Callable[[int], float]] = None,
+    ):
         self.init_model = model_fn
+        self.lr_fn = lr_fn
+
+    def init_training_model(self, epoch_base: int) -> tf.keras.Model:
+        """Returns a compiled model ready to train a round starting at `epoch_base`
+
+        The model is taken from `model_pool`, so each thread builds the graph of a
+        model only once. Its weights are left as they are and should be set by the
+        caller.
+        """
+        return model_pool.get(self, epoch_base)
+
+
+class ModelPool:
+    """Reusable compiled models keyed by model function, one set per thread
+
+    Building and compiling a model (e.g. ResNet-20) is a considerable part of a short
+    training round. As a model must not be trained by two threads at the same time,
+    every thread (and therefore every worker process) gets its own instance. The
+    models are kept in thread-local storage, so they are released together with the
+    thread, e.g. when the pool of a `ThreadExecutor` shuts down.
+    """
+
+    def __init__(self) -> None:
+        self.local = threading.local()
+
+    def models(self) -> Dict[Callable, tf.keras.Model]:
+        """Returns the models of the calling thread"""
+        if not hasattr(self.local, "models"):
+            self.local.models = {}
+        return self.local.models
+
+    def get(self, model_provider: ModelProvider, epoch_base: int) -> tf.keras.Model:
+        models = self.models()
+        model = models.get(model_provider.init_model)
+        if model is None:
+            model = model_provider.init_model(epoch_base=epoch_base)  # type:ignore
+            models[model_provider.init_model] = model
+            return model
+        reset_optimizer(model)
+        if model_provider.lr_fn is not None:
+            lr = model_provider.lr_fn(epoch_base)
+            tf.keras.backend.set_value(model.optimizer.lr, lr)
+        return model
+
+    def clear(self) -> None:
+        """Releases the models of all threads"""
+        self.local = threading.local()
+
+
+model_pool = ModelPool()
+
+
+def reset_optimizer(model: tf.keras.Model) -> None:
+    """Resets the optimizer state (e.g. iterations, momentum) of a compiled model
+
+    Afterwards the model trains as if its optimizer had just been created. Optimizer
+    variables which do not exist yet (i.e. before the first training step) are
+    created with their initial values anyway.
+    """
+    variables = model.optimizer.variables()
+    values = tf.keras.backend.batch_get_value(variables)
+    tf.keras.backend.batch_set_value(
+        [(v, np.zeros_like(value)) for v, value in zip(variables, values)]
+    )
@@ -0,0 +1,68 @@
+import gc
+import threading
+import weakref
+
+import numpy as np
+import tensorflow as tf
+
+from xain.benchmark.net import model_fns
+
+from .model_provider import ModelProvider, model_pool
+
+
+def test_ModelProvider_init_training_model_reuses_model():
+    # Prepare
+    model_pool.clear()
+    model_provider = ModelProvider(model_fns["orig_2nn"], lr_fn=lambda e: 0.5 / (e + 1))
+    model = model_provider.init_training_model(epoch_base=0)
+    x = np.zeros((4, 28, 28, 1), dtype=np.float32)
+    y = np.zeros((4, 10), dtype=np.float32)
+    model.fit(x, y, epochs=1, verbose=0)
+
+    # Execute
+    model_reused = model_provider.init_training_model(epoch_base=4)
+
+    # Assert
+    assert model_reused is model
+    assert tf.keras.backend.get_value(model.optimizer.iterations) == 0
+    np.testing.assert_almost_equal(tf.keras.backend.get_value(model.optimizer.lr), 0.1)
+
+
+def test_ModelProvider_init_training_model_one_model_per_thread():
+    # Prepare
+    model_pool.clear()
+    model_provider = ModelProvider(model_fns["orig_2nn"])
+    models = []
+
+    def init_model():
+        models.append(model_provider.init_training_model(epoch_base=0))
+
+    # Execute
+    init_model()
+    thread = threading.Thread(target=init_model)
+    thread.start()
+    thread.join()
+
+    # Assert
+    assert len(models) == 2
+    assert models[0] is not models[1]
+
+
+def test_ModelProvider_init_training_model_releases_models_of_finished_threads():
+    # Prepare
+    model_pool.clear()
+    model_provider = ModelProvider(model_fns["orig_2nn"])
+    model_refs = []
+
+    def init_model():
+        model_refs.append(weakref.ref(model_provider.init_training_model(epoch_base=0)))
+
+    # Execute
+    thread = threading.Thread(target=init_model)
+    thread.start()
+    thread.join()
+    del thread
+    gc.collect()
+
+    # Assert
+    assert model_refs[0]() is None
@@ -1,10 +1,12 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
 from absl import logging
 
 from xain.datasets import prep
+from xain.datasets.stats.histograms import label_histograms
+from xain.helpers import timing
 from xain.types import KerasHistory, KerasWeights, Metrics, VolumeByClass
 
 from .model_provider import ModelProvider
@@ -21,7 +23,14 @@ class Participant:
         xy_val: Tuple[np.ndarray, np.ndarray],
         num_classes: int,
         batch_size: int,
+        cache_datasets: bool = False,
+        volume_by_class: Optional[VolumeByClass] = None,
+        eval_batch_size: Optional[int] = None,
     ) -> None:
+        """
+        :param eval_batch_size: Number of examples evaluated at once during
+            validation and evaluation, all by default
+        """
         assert xy_train[0].shape[0] == xy_train[1].shape[0]
         assert xy_val[0].shape[0] == xy_val[1].shape[0]
         self.cid = cid
@@ -34,35 +43,79 @@ class Participant:
         self.steps_train: int = int(xy_train[0].shape[0] / batch_size)
         # Validation set
         self.xy_val = xy_val
-        self.steps_val: int = 1
+        self.eval_batch_size = eval_batch_size
+        self.steps_val: int = prep.num_val_batches(xy_val[0].shape[0], eval_batch_size)
+        # Input pipelines are built on first use and reused in later rounds;
+        # `cache_datasets` additionally keeps the prepared examples in memory
+        self.cache_datasets = cache_datasets
+        self.ds_train: Optional[tf.data.Dataset] = None
+        self.ds_val: Optional[tf.data.Dataset] = None
+        # The labels never change, so their histogram is only computed once (unless
+        # precomputed for all partitions, see `xain.datasets.stats.histograms`)
+        if volume_by_class is None:
+            volume_by_class = xy_train_volume_by_class(num_classes, xy_train)
+        self.volume_by_class: VolumeByClass = volume_by_class
+
+    def __getstate__(self):
+        # Datasets can't be pickled (e.g. when sent to a worker process)
+        state = self.__dict__.copy()
+        state["ds_train"] = None
+        state["ds_val"] = None
+        return state
 
     def train_round(
-        self, theta: KerasWeights, epochs: int, epoch_base: int
+        self,
+        theta: KerasWeights,
+        epochs: int,
+        epoch_base: int,
+        model: Optional[tf.keras.Model] = None,
     ) -> Tuple[Tuple[KerasWeights, int], KerasHistory]:
+        """Trains theta for a number of epochs on the local training set
+
+        By default the model is taken from the model pool of `self.model_provider`;
+        callers which manage their own compiled model can pass it as `model`.
+        """
         logging.info(
             f"Participant {self.cid}: train_round START (epoch_base: {epoch_base})"
         )
-        model = self.model_provider.init_model(epoch_base=epoch_base)  # type:ignore
-        model.set_weights(theta)
+        with timing.section("model_init"):
+            if model is None:
+                model = self.model_provider.init_training_model(epoch_base=epoch_base)
+            model.set_weights(theta)
         hist: KerasHistory = self.fit(model, epochs)
-        theta_prime = model.get_weights()
+        with timing.section("get_weights"):
+            theta_prime = model.get_weights()
         logging.info("Participant {}: train_round FINISH".format(self.cid))
         return (theta_prime, self.num_examples), hist
 
     def fit(self, model: tf.keras.Model, epochs: int) -> KerasHistory:
-        ds_train = prep.init_ds_train(self.xy_train, self.num_classes, self.batch_size)
-        ds_val = prep.init_ds_val(self.xy_val, self.num_classes)
-
-        hist = model.fit(
-            ds_train,
-            epochs=epochs,
-            validation_data=ds_val,
-            callbacks=[LoggingCallback(str(self.cid), logging.info)],
-            shuffle=False,  # Shuffling is handled via tf.data.Dataset
-            steps_per_epoch=self.steps_train,
-            validation_steps=self.steps_val,
-            verbose=0,
-        )
+        with timing.section("dataset"):
+            if self.ds_train is None:
+                self.ds_train = prep.init_ds_train(
+                    self.xy_train,
+                    self.num_classes,
+                    self.batch_size,
+                    cache=self.cache_datasets,
+                )
+            if self.ds_val is None:
+                self.ds_val = prep.init_ds_val(
+                    self.xy_val,
+                    self.num_classes,
+                    cache=self.cache_datasets,
+                    batch_size=self.eval_batch_size,
+                )
+
+        with timing.section("fit"):
+            hist = model.fit(
+                self.ds_train,
+                epochs=epochs,
+                validation_data=self.ds_val,
+                callbacks=[LoggingCallback(str(self.cid), logging.info)],
+                shuffle=False,  # Shuffling is handled via tf.data.Dataset
+                steps_per_epoch=self.steps_train,
+                validation_steps=self.steps_val,
+                verbose=0,
+            )
         return cast_to_float(hist.history)
 
     def evaluate(
@@ -70,28 +123,17 @@ class Participant:
     ) -> Tuple[float, float]:
         model = self.model_provider.init_model()
         model.set_weights(theta)
-        ds_val = prep.init_ds_val(xy_test)
-        # Assume the validation `tf.data.Dataset` to yield exactly one batch containing
-        # all examples in the validation set
-        loss, accuracy = model.evaluate(ds_val, steps=1, verbose=0)
-        return loss, accuracy
+        xy_prepared = prep.prepare_xy(xy_test, self.num_classes)
+        return prep.evaluate_prepared(model, xy_prepared, self.eval_batch_size)
 
     def metrics(self) -> Metrics:
-        vol_by_class = xy_train_volume_by_class(self.num_classes, self.xy_train)
-        return (self.cid, vol_by_class)
+        return (self.cid, self.volume_by_class)
 
 
 def xy_train_volume_by_class(num_classes: int, xy_train) -> VolumeByClass:
-    counts = [0] * num_classes
     _, y = xy_train
-    classes, counts_actual = np.unique(y, return_counts=True)
-
-    for i_ca, c in enumerate(classes):
-        # Cast explicitly to int so its later JSON serializable
-        # as other we will get a list of np objects of type int64
-        counts[c] = int(counts_actual[i_ca])
-
-    return counts
+    # tolist casts to int so the counts are JSON serializable later on
+    return label_histograms([y], num_classes=num_classes)[0].tolist()
 
 
 def cast_to_float(hist) -> KerasHistory:
@@ -54,6 +54,59 @@ def test_Participant_num_examples():
     assert num_examples_actual == num_examples_expected
 
 
+def test_Participant_reuses_datasets():
+    # Prepare
+    num_examples = 16
+    model_provider = ModelProvider(model_fns["blog_cnn"])
+    x = np.random.randint(0, high=256, size=(num_examples, 28, 28, 1), dtype=np.uint8)
+    y = np.random.randint(0, high=10, size=(num_examples), dtype=np.uint8)
+    participant = Participant(
+        0, model_provider, (x, y), (x, y), num_classes=10, batch_size=8
+    )
+    weights = model_provider.init_model().get_weights()
+
+    # Execute
+    participant.train_round(weights, 1, 0)
+    ds_train, ds_val = participant.ds_train, participant.ds_val
+    participant.train_round(weights, 1, 1)
+
+    # Assert
+    assert ds_train is not None and ds_val is not None
+    assert participant.ds_train is ds_train
+    assert participant.ds_val is ds_val
+
+
+def test_Participant_evaluates_in_batches_of_eval_batch_size():
+    # Prepare
+    num_examples = 19
+    model_provider = ModelProvider(model_fns["blog_cnn"])
+    x = np.random.randint(0, high=256, size=(num_examples, 28, 28, 1), dtype=np.uint8)
+    y = np.random.randint(0, high=10, size=(num_examples), dtype=np.uint8)
+    participant = Participant(
+        0, model_provider, (x, y), (x, y), num_classes=10, batch_size=8
+    )
+    participant_batched = Participant(
+        0,
+        model_provider,
+        (x, y),
+        (x, y),
+        num_classes=10,
+        batch_size=8,
+        eval_batch_size=8,
+    )
+    weights = model_provider.init_model().get_weights()
+
+    # Execute
+    loss, acc = participant.evaluate(weights, (x, y))
+    loss_batched, acc_batched = participant_batched.evaluate(weights, (x, y))
+
+    # Assert
+    assert participant.steps_val == 1
+    assert participant_batched.steps_val == 3
+    np.testing.assert_allclose(loss_batched, loss, rtol=1e-5)
+    np.testing.assert_allclose(acc_batched, acc)
+
+
 def test_Participant_get_xy_train_volume_by_class():
     # Prepare
     cid_expected = 19
@@ -76,6 +129,26 @@ def test_Participant_get_xy_train_volume_by_class():
     assert y_volume_by_class_actual == y_volume_by_class_expected
 
 
+def test_Participant_precomputed_volume_by_class():
+    # Prepare
+    x = np.zeros((4, 32, 32, 3), dtype=np.uint8)
+    y = np.array([0, 1, 2, 2], dtype=np.uint8)
+
+    # Execute
+    p = Participant(
+        0,
+        None,
+        (x, y),
+        (x, y),
+        num_classes=5,
+        batch_size=32,
+        volume_by_class=[4, 0, 0, 0, 0],
+    )
+
+    # Assert
+    assert p.metrics() == (0, [4, 0, 0, 0, 0])
+
+
 @pytest.mark.parametrize(
     "num_classes_total, num_classes_in_partition", [(4, 1), (7, 5), (10, 10)]
 )
@@ -1,39 +1,41 @@
-from absl import app, logging
-
-from xain.datasets import testing
-from xain.generator import config, data, persistence
-
-
-def generate_dataset(dataset_name):
-    logging.info("Starting dataset generation of {}".format(dataset_name))
-
-    assert dataset_name in config.datasets, "Dataset not found in config"
-
-    c = config.datasets[dataset_name]
-
-    dataset = data.create_federated_dataset(
-        keras_dataset=c["keras_dataset"],
-        num_partitions=c["num_partitions"],
-        validation_set_size=c["validation_set_size"],
-        transformers=c["transformers"],
-        transformers_kwargs=c["transformers_kwargs"],
-    )
-
-    if c["assert_dataset_origin"]:
-        testing.assert_dataset_origin(
-            keras_dataset=data.load(c["keras_dataset"]), federated_dataset=dataset
-        )
-
-    persistence.save_splits(
-        dataset_name=dataset_name,
-        dataset=dataset,
-        local_generator_dir=config.local_generator_datasets_dir,
-    )
+from absl import app, flags
+
+from xain.generator import generate
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_boolean(
+    "pack_datasets",
+    False,
+    "Store each dataset as a single packed file instead of one .npy file per ndarray",
+)
+flags.DEFINE_boolean(
+    "virtual_datasets",
+    False,
+    "Store each dataset as an index map into a base dataset shared by all datasets "
+    + "of the same Keras dataset (see xain.datasets.virtual)",
+)
+flags.DEFINE_list(
+    "only",
+    None,
+    "Comma-separated glob patterns, only datasets matching one of them are generated",
+)
+flags.DEFINE_boolean(
+    "force", False, "Also generate datasets whose files are already up to date"
+)
+flags.DEFINE_integer(
+    "num_processes", None, "Number of worker processes, defaults to the CPU count"
+)
 
 
 def main(_):
-    for dataset_name in config.datasets:
-        generate_dataset(dataset_name)
+    generate.generate_datasets(
+        patterns=FLAGS.only,
+        pack=FLAGS.pack_datasets,
+        virtual=FLAGS.virtual_datasets,
+        force=FLAGS.force,
+        num_processes=FLAGS.num_processes,
+    )
 
 
 app.run(main=main)
@@ -106,3 +106,71 @@ def distribution(num_classes: int, num_partitions: int, cpp: int) -> np.ndarray:
         np.add.at(p, p_indicies, 1)
 
     return partitions
+
+
+# Number of rounds of random swaps by which sample_distribution mixes its partitions
+NUM_SWAP_ROUNDS = 20
+
+
+def sample_distribution(
+    num_classes: int,
+    num_partitions: int,
+    cpp: int,
+    seed: int = SEED,
+    num_swap_rounds: int = NUM_SWAP_ROUNDS,
+) -> np.ndarray:
+    """Samples a partition distribution with the same guarantees and format as
+    `distribution` in O(num_partitions * cpp) per round, so it scales to many
+    thousands of partitions
+
+    1. Deal the sections out round-robin: partition i gets the classes
+       i * cpp, ..., i * cpp + cpp - 1 (modulo num_classes), i.e. cpp distinct
+       classes, and every class is dealt equally often
+    2. Randomize by swapping classes between random pairs of partitions where
+       neither partition has the other's class yet, which keeps both guarantees
+    3. Shuffle partitions and classes
+
+    :param num_classes: number of distinct unique classes
+    :param num_partitions: number of partitions
+    :param cpp: number of classes per partition required
+    :param seed: seed of the RandomState used for sampling
+    :param num_swap_rounds: number of rounds in which every partition is paired
+                            with another one for a swap
+
+    :returns: parition distribution as an ndarray of shape (num_partitions, num_classes)
+              with ones at the locations where a section should be
+    """
+    assert cpp <= num_classes
+    assert (cpp * num_partitions) % num_classes == 0
+
+    # pylint: disable=no-member
+    rst = np.random.RandomState(seed=seed)
+
+    # classes[i] holds the cpp distinct classes of partition i
+    classes = np.arange(num_partitions * cpp).reshape((num_partitions, cpp))
+    classes %= num_classes
+
+    num_pairs = num_partitions // 2
+    rows = np.arange(num_pairs)
+    for _ in range(num_swap_rounds):
+        # Pair up all partitions and pick one class of each partition of a pair
+        order = rst.permutation(num_partitions)
+        ps, qs = order[:num_pairs], order[num_pairs : 2 * num_pairs]
+        i = rst.randint(cpp, size=num_pairs)
+        j = rst.randint(cpp, size=num_pairs)
+        classes_p = classes[ps, i]
+        classes_q = classes[qs, j]
+
+        # Swapping only keeps the classes of a partition distinct if neither
+        # partition has the class of the other one yet. As the pairs are disjoint,
+        # all valid swaps of a round can be applied at once.
+        valid = ~(classes[ps] == classes_q[:, None]).any(axis=1)
+        valid &= ~(classes[qs] == classes_p[:, None]).any(axis=1)
+        valid = rows[valid]
+        classes[ps[valid], i[valid]] = classes_q[valid]
+        classes[qs[valid], j[valid]] = classes_p[valid]
+
+    partitions = np.zeros((num_partitions, num_classes), dtype=np.int8)
+    partitions[np.arange(num_partitions)[:, None], classes] = 1
+
+    return partitions[rst.permutation(num_partitions)][:, rst.permutation(num_classes)]
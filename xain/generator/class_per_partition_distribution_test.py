@@ -1,7 +1,7 @@
 import numpy as np
 import pytest
 
-from .class_per_partition_distribution import distribution
+from .class_per_partition_distribution import distribution, sample_distribution
 
 
 @pytest.mark.parametrize("cpp", [1, 5, 10])
@@ -29,3 +29,36 @@ def test_distribution(cpp):
     # Each class should occur globally same number of times
     for column in p_dist.T:
         assert np.sum(column) == num_per_class
+
+
+@pytest.mark.parametrize(
+    "num_classes, num_partitions, cpp",
+    [(10, 10, 1), (10, 100, 3), (10, 10, 10), (100, 10000, 7), (10, 1000, 5)],
+)
+def test_sample_distribution(num_classes, num_partitions, cpp):
+    # Execute
+    p_dist = sample_distribution(
+        num_classes=num_classes, num_partitions=num_partitions, cpp=cpp
+    )
+
+    # Assert
+    assert p_dist.shape == (num_partitions, num_classes)
+    assert p_dist.dtype == np.int8
+    assert set(np.unique(p_dist)) <= {0, 1}
+
+    # Each partition has cpp distinct classes
+    assert (p_dist.sum(axis=1) == cpp).all()
+
+    # Each class should occur globally same number of times
+    assert (p_dist.sum(axis=0) == cpp * num_partitions // num_classes).all()
+
+
+def test_sample_distribution_seed():
+    # Execute
+    p_dist_a = sample_distribution(num_classes=10, num_partitions=100, cpp=2, seed=1)
+    p_dist_b = sample_distribution(num_classes=10, num_partitions=100, cpp=2, seed=1)
+    p_dist_c = sample_distribution(num_classes=10, num_partitions=100, cpp=2, seed=2)
+
+    # Assert
+    np.testing.assert_array_equal(p_dist_a, p_dist_b)
+    assert not np.array_equal(p_dist_a, p_dist_c)
@@ -10,6 +10,9 @@ local_generator_datasets_dir = config.storage_dir.joinpath("generator/datasets")
 keras_cifar10 = tf.keras.datasets.cifar10
 keras_fashion_mnist = tf.keras.datasets.fashion_mnist
 
+# Base datasets of virtual datasets (see xain.datasets.virtual) by name
+base_datasets = {"cifar-10": keras_cifar10, "fashion-mnist": keras_fashion_mnist}
+
 # Makes from an int e.g. 5 => 05
 leftpad = lambda i: str(i).zfill(2)
 
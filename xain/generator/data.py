@@ -3,9 +3,14 @@ from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
 from numpy import ndarray
 
+from xain.datasets.virtual import IndexMap
 from xain.types import FederatedDataset, KerasDataset
 
-from .transformer import classes_balanced_randomized_per_partition, sort_by_class
+from .transformer import (
+    classes_balanced_randomized_per_partition_permutation,
+    label_only,
+    sort_by_class_permutation,
+)
 
 
 def load(keras_dataset) -> KerasDataset:
@@ -27,18 +32,27 @@ def extract_validation_set(x: ndarray, y: ndarray, size=6000):
                 in x, y and multiple of label_count
     """
     assert x.shape[0] == y.shape[0]
+
+    index_train, index_val = extract_validation_index(y, size=size)
+
+    xy_val = (x[index_val], y[index_val])
+    xy_train = (x[index_train], y[index_train])
+
+    return xy_train, xy_val
+
+
+def extract_validation_index(y: ndarray, size=6000) -> Tuple[ndarray, ndarray]:
+    """Returns the indices of the examples of the training and validation set
+    `extract_validation_set` creates"""
     assert (
-        x.shape[0] % size == 0
-    ), f"number of examples ({x.shape[0]}) needs to be evenly divisible by parameter size ({size})"
+        y.shape[0] % size == 0
+    ), f"number of examples ({y.shape[0]}) needs to be evenly divisible by parameter size ({size})"
 
     assert size % len(set(y)) == 0, "size must be a multiple of number of labels"
 
-    x_balanced, y_balanced = classes_balanced_randomized_per_partition(x, y)
+    balanced_index = classes_balanced_randomized_per_partition_permutation(y)
 
-    xy_val = (x_balanced[:size], y_balanced[:size])
-    xy_train = (x_balanced[size:], y_balanced[size:])
-
-    return xy_train, xy_val
+    return balanced_index[size:], balanced_index[:size]
 
 
 def assert_is_balanced(y):
@@ -46,7 +60,7 @@ def assert_is_balanced(y):
     assert len(set(counts)) == 1, "Some classes appear more often than others"
 
 
-def remove_balanced(x: ndarray, y: ndarray, num_remove: int) -> Tuple[ndarray, ndarray]:
+def remove_balanced_index(y: ndarray, num_remove: int) -> ndarray:
     assert_is_balanced(y)
 
     num_classes = len(np.unique(y))
@@ -56,15 +70,15 @@ def remove_balanced(x: ndarray, y: ndarray, num_remove: int) -> Tuple[ndarray, n
         num_remove % num_classes == 0
     ), "Number of examples to be removed has to be divisible by num_remove"
 
-    x, y = sort_by_class(x, y)
+    sort_index = sort_by_class_permutation(y).reshape((num_classes, -1))
 
-    x_splits = np.split(x, indices_or_sections=num_classes, axis=0)
-    y_splits = np.split(y, indices_or_sections=num_classes, axis=0)
+    return sort_index[:, num_remove_per_class:].reshape(-1)
 
-    x = np.concatenate([x_split[num_remove_per_class:] for x_split in x_splits])
-    y = np.concatenate([y_split[num_remove_per_class:] for y_split in y_splits])
 
-    return x, y
+@label_only(remove_balanced_index)
+def remove_balanced(x: ndarray, y: ndarray, num_remove: int) -> Tuple[ndarray, ndarray]:
+    index = remove_balanced_index(y, num_remove)
+    return x[index], y[index]
 
 
 def create_federated_dataset(
@@ -74,26 +88,85 @@ def create_federated_dataset(
     transformers: List[Callable],
     transformers_kwargs: Optional[Dict] = None,
 ) -> FederatedDataset:
+    xy_train, xy_test = load(keras_dataset)
+
+    return split_federated_dataset(
+        xy_train,
+        xy_test,
+        num_partitions=num_partitions,
+        validation_set_size=validation_set_size,
+        transformers=transformers,
+        transformers_kwargs=transformers_kwargs,
+    )
+
+
+def create_index_map(
+    keras_dataset,
+    num_partitions: int,
+    validation_set_size: int,
+    transformers: List[Callable],
+    transformers_kwargs: Optional[Dict] = None,
+) -> IndexMap:
+    """Returns for each partition and the validation set the indices of their
+    examples in the training set of keras_dataset, as `create_federated_dataset`
+    would split it given the same numpy random state"""
     (x_train, y_train), xy_test = load(keras_dataset)
 
+    # Transformers only reorder examples, so they can reorder positions instead
+    positions = np.arange(x_train.shape[0])
+    xy_splits, (val_indices, _), _ = split_federated_dataset(
+        (positions, y_train),
+        xy_test,
+        num_partitions=num_partitions,
+        validation_set_size=validation_set_size,
+        transformers=transformers,
+        transformers_kwargs=transformers_kwargs,
+    )
+
+    return [partition_indices for partition_indices, _ in xy_splits], val_indices
+
+
+def split_federated_dataset(
+    xy_train: Tuple[ndarray, ndarray],
+    xy_test: Tuple[ndarray, ndarray],
+    num_partitions: int,
+    validation_set_size: int,
+    transformers: List[Callable],
+    transformers_kwargs: Optional[Dict] = None,
+) -> FederatedDataset:
+    x_train, y_train = xy_train
+
     if isinstance(num_partitions, list):
         assert x_train.shape[0] % (len(num_partitions) + 1) == 0
     else:
         assert x_train.shape[0] % num_partitions == 0
 
-    (x_train, y_train), xy_val = extract_validation_set(
-        x_train, y_train, size=validation_set_size
-    )
+    index_train, index_val = extract_validation_index(y_train, size=validation_set_size)
+    xy_val = (x_train[index_val], y_train[index_val])
 
+    # Transformers declared with `label_only` are composed into one index vector,
+    # so x_train is gathered only once at the end
     for i, transformer in enumerate(transformers):
         if (
             not transformers_kwargs
             or not transformers_kwargs[i]
             or transformers_kwargs[i] is None
         ):
-            x_train, y_train = transformer(x_train, y_train)
+            kwargs: Dict = {}
+        else:
+            kwargs = transformers_kwargs[i]
+
+        index_fn = getattr(transformer, "index_fn", None)
+        if index_fn is not None:
+            index_train = index_train[index_fn(y_train[index_train], **kwargs)]
         else:
-            x_train, y_train = transformer(x_train, y_train, **transformers_kwargs[i])
+            x_train, y_train = transformer(
+                x_train[index_train], y_train[index_train], **kwargs
+            )
+            index_train = np.arange(y_train.shape[0])
+
+    x_train = x_train[index_train]
+    y_train = y_train[index_train]
 
     x_splits = np.split(x_train, indices_or_sections=num_partitions, axis=0)
     y_splits = np.split(y_train, indices_or_sections=num_partitions, axis=0)
@@ -2,7 +2,7 @@ import numpy as np
 import pytest
 import tensorflow as tf
 
-from . import data
+from . import data, transformer
 
 
 @pytest.mark.integration
@@ -72,3 +72,73 @@ def test_extract_validation_set():
 
     # Each label occurs equal times
     assert len(set(label_counts_train)) == len(set(label_counts_validation)) == 1
+
+
+def test_create_federated_dataset_composes_index():
+    # Prepare
+    y = np.tile(np.arange(10, dtype=np.int64), 60)
+    np.random.shuffle(y)
+    x = np.arange(y.shape[0])  # x[i] == i identifies each example
+
+    class KerasDataset:  # pylint: disable=too-few-public-methods
+        @staticmethod
+        def load_data():
+            return (x, y), (x[:100], y[:100])
+
+    def reverse(x, y):
+        return x[::-1], y[::-1]
+
+    transformers = [data.remove_balanced, reverse, transformer.class_per_partition]
+    transformers_kwargs = [{"num_remove": 90}, None, {"num_partitions": 5, "cpp": 2}]
+
+    # Execute
+    np.random.seed(42)
+    xy_splits, xy_val, _ = data.create_federated_dataset(
+        KerasDataset, 5, 60, transformers, transformers_kwargs
+    )
+
+    # Assert: same result as applying every transformer to the full arrays
+    np.random.seed(42)
+    (x_expected, y_expected), xy_val_expected = data.extract_validation_set(
+        x, y, size=60
+    )
+    x_expected, y_expected = data.remove_balanced(x_expected, y_expected, 90)
+    x_expected, y_expected = reverse(x_expected, y_expected)
+    x_expected, y_expected = transformer.class_per_partition(
+        x_expected, y_expected, num_partitions=5, cpp=2
+    )
+    np.testing.assert_array_equal(xy_val[0], xy_val_expected[0])
+    np.testing.assert_array_equal(np.concatenate([x for x, _ in xy_splits]), x_expected)
+    np.testing.assert_array_equal(np.concatenate([y for _, y in xy_splits]), y_expected)
+
+
+def test_create_index_map():
+    # Prepare
+    y = np.tile(np.arange(10, dtype=np.int64), 60)
+    np.random.shuffle(y)
+    x = np.random.randint(0, 256, size=(600, 2, 2)).astype(np.uint8)
+
+    class KerasDataset:  # pylint: disable=too-few-public-methods
+        @staticmethod
+        def load_data():
+            return (x, y), (x[:100], y[:100])
+
+    transformers = [data.remove_balanced, transformer.class_per_partition]
+    transformers_kwargs = [{"num_remove": 90}, {"num_partitions": 5, "cpp": 2}]
+
+    # Execute
+    np.random.seed(42)
+    partition_indices, val_indices = data.create_index_map(
+        KerasDataset, 5, 60, transformers, transformers_kwargs
+    )
+
+    # Assert
+    np.random.seed(42)
+    xy_splits, (x_val, _), _ = data.create_federated_dataset(
+        KerasDataset, 5, 60, transformers, transformers_kwargs
+    )
+    assert len(partition_indices) == len(xy_splits)
+    for indices, (x_split, y_split) in zip(partition_indices, xy_splits):
+        np.testing.assert_array_equal(x[indices], x_split)
+        np.testing.assert_array_equal(y[indices], y_split)
+    np.testing.assert_array_equal(x[val_indices], x_val)
@@ -0,0 +1,261 @@
+"""Generates the datasets configured in `xain.generator.config` in parallel
+
+Every source Keras dataset is loaded once in the main process before the worker
+processes are forked, so all workers share its ndarrays (copy-on-write) instead
+of loading it again for every dataset. Datasets whose files are up to date, i.e.
+were generated from the same configuration by the same generator code and are
+still complete, are skipped.
+"""
+import fnmatch
+import functools
+import hashlib
+import importlib
+import json
+import multiprocessing
+from typing import Dict, List, Optional
+
+import numpy as np
+from absl import logging
+
+from xain.datasets import testing
+from xain.generator import config, data, persistence
+from xain.types import KerasDataset
+
+# Modules whose code determines the generated files. Changing any of them changes
+# the fingerprint of every dataset, so all of them are generated again.
+GENERATOR_MODULES = [
+    "xain.datasets.packed",
+    "xain.datasets.virtual",
+    "xain.generator.class_per_partition_distribution",
+    "xain.generator.data",
+    "xain.generator.partition_volume_distributions",
+    "xain.generator.persistence",
+    "xain.generator.transformer",
+]
+
+# Source datasets loaded by `preload`, keyed by the id of their Keras dataset module.
+# Filled before the worker processes are forked so they inherit it.
+preloaded: Dict[int, KerasDataset] = {}
+
+
+class PreloadedKerasDataset:  # pylint: disable=too-few-public-methods
+    """Stands in for a Keras dataset module whose data was loaded already"""
+
+    def __init__(self, keras_dataset: KerasDataset):
+        self.keras_dataset = keras_dataset
+
+    def load_data(self) -> KerasDataset:
+        return self.keras_dataset
+
+
+def select_datasets(
+    dataset_names: List[str], patterns: Optional[List[str]]
+) -> List[str]:
+    """Returns the dataset names matching any of the glob patterns, all if no
+    patterns are given"""
+    if not patterns:
+        return list(dataset_names)
+    return [
+        name
+        for name in dataset_names
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def code_checksum() -> str:
+    """Returns a checksum of the source code of all `GENERATOR_MODULES`"""
+    sha1 = hashlib.sha1()
+    for module_name in GENERATOR_MODULES:
+        fpath = importlib.import_module(module_name).__file__
+        assert fpath is not None
+        with open(fpath, "rb") as f:
+            sha1.update(f.read())
+    return sha1.hexdigest()
+
+
+def fingerprint(c: Dict, pack: bool, virtual: bool = False) -> str:
+    """Returns a checksum of a dataset configuration and of the generator code
+    which changes whenever the generated files would"""
+
+    def describe(value):
+        if isinstance(value, (np.ndarray, np.generic)):
+            return value.tolist()
+        if hasattr(value, "load_data"):  # Keras dataset module
+            return value.__name__
+        if callable(value):
+            return "{}.{}".format(value.__module__, value.__qualname__)
+        raise TypeError(repr(value))
+
+    description = json.dumps(
+        {**c, "pack": pack, "virtual": virtual, "code": code_checksum()},
+        default=describe,
+        sort_keys=True,
+    )
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+def preload(keras_datasets: List):
+    for keras_dataset in keras_datasets:
+        if id(keras_dataset) not in preloaded:
+            logging.info("Loading {}".format(keras_dataset.__name__))
+            preloaded[id(keras_dataset)] = data.load(keras_dataset)
+
+
+def load(keras_dataset) -> KerasDataset:
+    if id(keras_dataset) in preloaded:
+        return preloaded[id(keras_dataset)]
+    return data.load(keras_dataset)
+
+
+def get_base_name(keras_dataset) -> str:
+    """Returns the name of the base dataset of virtual datasets of keras_dataset"""
+    for base_name, base_keras_dataset in config.base_datasets.items():
+        if base_keras_dataset is keras_dataset:
+            return base_name
+    raise Exception("No base dataset configured for {}".format(keras_dataset))
+
+
+def generate_base_dataset(base_name: str):
+    keras_dataset = config.base_datasets[base_name]
+
+    persistence.save_base(
+        base_name=base_name,
+        keras_dataset=load(keras_dataset),
+        local_generator_dir=config.local_generator_datasets_dir,
+        fingerprint=fingerprint({"keras_dataset": keras_dataset}, pack=False),
+    )
+
+
+def generate_dataset(
+    dataset_name: str, pack: bool = False, virtual: bool = False
+) -> str:
+    logging.info("Starting dataset generation of {}".format(dataset_name))
+
+    assert dataset_name in config.datasets, "Dataset not found in config"
+
+    c = config.datasets[dataset_name]
+
+    keras_dataset = load(c["keras_dataset"])
+
+    if virtual:
+        generate_virtual_dataset(dataset_name, keras_dataset)
+        return dataset_name
+
+    dataset = data.create_federated_dataset(
+        keras_dataset=PreloadedKerasDataset(keras_dataset),
+        num_partitions=c["num_partitions"],
+        validation_set_size=c["validation_set_size"],
+        transformers=c["transformers"],
+        transformers_kwargs=c["transformers_kwargs"],
+    )
+
+    if c["assert_dataset_origin"]:
+        testing.assert_dataset_origin(
+            keras_dataset=keras_dataset, federated_dataset=dataset
+        )
+
+    persistence.save_splits(
+        dataset_name=dataset_name,
+        dataset=dataset,
+        local_generator_dir=config.local_generator_datasets_dir,
+        pack=pack,
+        fingerprint=fingerprint(c, pack),
+    )
+
+    return dataset_name
+
+
+def generate_virtual_dataset(dataset_name: str, keras_dataset: KerasDataset):
+    c = config.datasets[dataset_name]
+
+    index_map = data.create_index_map(
+        keras_dataset=PreloadedKerasDataset(keras_dataset),
+        num_partitions=c["num_partitions"],
+        validation_set_size=c["validation_set_size"],
+        transformers=c["transformers"],
+        transformers_kwargs=c["transformers_kwargs"],
+    )
+
+    (_, y_train), _ = keras_dataset
+    num_examples = y_train.shape[0]
+
+    if c["assert_dataset_origin"]:
+        # Every training example has to be used exactly once
+        partition_indices, val_indices = index_map
+        indices = np.sort(np.concatenate(partition_indices + [val_indices]))
+        assert np.array_equal(
+            indices, np.arange(num_examples)
+        ), "Some examples are duplicate or not existing in keras dataset"
+
+    persistence.save_virtual(
+        dataset_name=dataset_name,
+        base_name=get_base_name(c["keras_dataset"]),
+        index_map=index_map,
+        num_examples=num_examples,
+        local_generator_dir=config.local_generator_datasets_dir,
+        fingerprint=fingerprint(c, pack=False, virtual=True),
+    )
+
+
+def generate_datasets(
+    patterns: Optional[List[str]] = None,
+    pack: bool = False,
+    virtual: bool = False,
+    force: bool = False,
+    num_processes: Optional[int] = None,
+) -> List[str]:
+    """Generates all configured datasets matching patterns
+
+    Parameters:
+    patterns (List[str]): Glob patterns of dataset names, all datasets if None
+    pack (bool): Store each dataset as a single packed file
+    virtual (bool): Store each dataset as index map into a shared base dataset
+    force (bool): Also generate datasets which are up to date
+    num_processes (int): Number of worker processes, defaults to the CPU count
+
+    Returns:
+        List[str]: Names of the generated datasets
+    """
+    dataset_names = [
+        dataset_name
+        for dataset_name in select_datasets(list(config.datasets), patterns)
+        if force
+        or not persistence.is_up_to_date(
+            dataset_name,
+            config.local_generator_datasets_dir,
+            fingerprint(config.datasets[dataset_name], pack, virtual),
+        )
+    ]
+    logging.info("Generating {} datasets".format(len(dataset_names)))
+    if not dataset_names:
+        return []
+
+    keras_datasets = [config.datasets[name]["keras_dataset"] for name in dataset_names]
+    preload(keras_datasets)
+
+    if virtual:
+        for base_name in sorted({get_base_name(kd) for kd in keras_datasets}):
+            base_fingerprint = fingerprint(
+                {"keras_dataset": config.base_datasets[base_name]}, pack=False
+            )
+            if force or not persistence.is_up_to_date(
+                base_name, config.local_generator_datasets_dir, base_fingerprint
+            ):
+                generate_base_dataset(base_name)
+
+    if num_processes == 1 or len(dataset_names) == 1:
+        return [generate_dataset(name, pack, virtual) for name in dataset_names]
+
+    # Workers need to be forked to inherit the preloaded datasets
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(processes=num_processes) as pool:
+        return list(
+            pool.imap_unordered(
+                generate_dataset_star, [(name, pack, virtual) for name in dataset_names]
+            )
+        )
+
+
+def generate_dataset_star(args) -> str:
+    return generate_dataset(*args)
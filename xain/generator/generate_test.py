@@ -0,0 +1,100 @@
+import json
+import os
+
+from ..datasets import virtual
+from . import config, generate, persistence, transformer
+from .conftest import MockKerasDataset
+
+
+def mock_config(num_partitions: int):
+    return {
+        "keras_dataset": MockKerasDataset,
+        "transformers": [transformer.classes_balanced_randomized_per_partition],
+        "transformers_kwargs": [{"num_partitions": num_partitions}],
+        "num_partitions": num_partitions,
+        "validation_set_size": 60,
+        "assert_dataset_origin": False,
+    }
+
+
+def test_select_datasets():
+    # Prepare
+    dataset_names = ["cifar-10-100p-iid", "cifar-10-100p-b1_045", "fashion-mnist-100p"]
+
+    # Execute
+    selected = generate.select_datasets(dataset_names, ["cifar-10-*-b*", "fashion*"])
+
+    # Assert
+    assert selected == ["cifar-10-100p-b1_045", "fashion-mnist-100p"]
+    assert generate.select_datasets(dataset_names, None) == dataset_names
+
+
+def test_fingerprint():
+    # Execute
+    fingerprint = generate.fingerprint(mock_config(2), pack=False)
+
+    # Assert
+    assert fingerprint == generate.fingerprint(mock_config(2), pack=False)
+    assert fingerprint != generate.fingerprint(mock_config(3), pack=False)
+    assert fingerprint != generate.fingerprint(mock_config(2), pack=True)
+
+
+def test_fingerprint_changes_with_generator_code(monkeypatch):
+    # Prepare
+    fingerprint = generate.fingerprint(mock_config(2), pack=False)
+
+    # Execute
+    monkeypatch.setattr(generate, "code_checksum", lambda: "changed")
+
+    # Assert
+    assert fingerprint != generate.fingerprint(mock_config(2), pack=False)
+
+
+def test_generate_datasets_skips_up_to_date(tmp_path, monkeypatch):
+    # Prepare
+    local_generator_dir = os.path.join(tmp_path, "generator/datasets")
+    monkeypatch.setattr(config, "local_generator_datasets_dir", local_generator_dir)
+    monkeypatch.setattr(
+        config, "datasets", {"mock-2p": mock_config(2), "mock-3p": mock_config(3)}
+    )
+    monkeypatch.setattr(generate, "preloaded", {})
+
+    # Execute
+    generated_first = generate.generate_datasets(num_processes=2)
+    generated_second = generate.generate_datasets()
+    os.remove(os.path.join(local_generator_dir, "mock-3p", "x_01.npy"))
+    generated_third = generate.generate_datasets()
+    generated_forced = generate.generate_datasets(patterns=["*-2p"], force=True)
+
+    # Assert
+    assert sorted(generated_first) == ["mock-2p", "mock-3p"]
+    assert generated_second == []
+    assert generated_third == ["mock-3p"]
+    assert generated_forced == ["mock-2p"]
+
+
+def test_generate_datasets_virtual(tmp_path, monkeypatch):
+    # Prepare
+    local_generator_dir = os.path.join(tmp_path, "generator/datasets")
+    monkeypatch.setattr(config, "local_generator_datasets_dir", local_generator_dir)
+    monkeypatch.setattr(config, "datasets", {"mock-2p": mock_config(2)})
+    monkeypatch.setattr(config, "base_datasets", {"mock": MockKerasDataset})
+    monkeypatch.setattr(generate, "preloaded", {})
+
+    # Execute
+    generated = generate.generate_datasets(virtual=True)
+
+    # Assert
+    assert generated == ["mock-2p"]
+    assert persistence.is_up_to_date(
+        "mock",
+        local_generator_dir,
+        generate.fingerprint({"keras_dataset": MockKerasDataset}, pack=False),
+    )
+    with open(os.path.join(tmp_path, "generator/mock-2p.json")) as f:
+        assert json.load(f)[virtual.HASH_KEY]["base"] == "mock"
+    partition_indices, val_indices = virtual.read_index(
+        os.path.join(local_generator_dir, "mock-2p", virtual.INDEX_FNAME)
+    )
+    assert [indices.shape[0] for indices in partition_indices] == [270, 270]
+    assert val_indices.shape[0] == 60
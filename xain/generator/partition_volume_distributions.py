@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import matplotlib
 import numpy as np
@@ -19,6 +19,11 @@ import matplotlib.pyplot as plt  # isort:skip
 
 FORMAT = "png"
 
+# Number of candidate values for a evaluated at once by solve_a
+NUM_CANDIDATES = 64
+
+BS = [1.0, 1.005, 1.01, 1.015, 1.02, 1.025, 1.03, 1.035, 1.04, 1.045]
+
 bs_fashion_mnist: Dict[float, float] = {
     1.0: 540.0,
     1.005: 417.94000000000017,
@@ -71,23 +76,88 @@ def _generate_100p_volume_distributions(
 
 def _generate_volume_distribution(xs: np.ndarray, a: float, b: float) -> List[int]:
     assert xs.ndim == 1
-    return [int(exponential_decay(x, a=a, b=b)) for x in xs]
+    return volumes(np.array([a]), powers(xs, b))[0].tolist()
 
 
-def brute_force_a_for_fashion_mnist():
-    for b in [1.0, 1.005, 1.01, 1.015, 1.02, 1.025, 1.03, 1.035, 1.04, 1.045]:
-        a = brute_force_a(np.arange(100), b, target=54_000)
+def generate_volume_distributions(
+    num_partitions: int, target: int, bs: Optional[List[float]] = None
+) -> List[Tuple[float, List[int]]]:
+    """Returns for each b (by default each of BS) the volumes of num_partitions
+    partitions which decay exponentially with base b and sum up to target"""
+    bs = BS if bs is None else bs
+    xs = np.arange(num_partitions)
+    return [
+        (b, _generate_volume_distribution(xs, solve_a(num_partitions, b, target), b))
+        for b in bs
+    ]
+
+
+def powers(xs: np.ndarray, b: float) -> np.ndarray:
+    # Computed like exponential_decay so volumes match it exactly
+    return np.array([b ** int(x) for x in xs], dtype=np.float64)
+
+
+def volumes(a_candidates: np.ndarray, b_powers: np.ndarray) -> np.ndarray:
+    """Returns the volumes int(a * b**x) of all partitions x (columns) for all
+    candidate values of a (rows)"""
+    return np.floor(np.outer(a_candidates, b_powers)).astype(np.int64)
+
+
+def solve_a(
+    num_partitions: int, b: float, target: int, num_candidates: int = NUM_CANDIDATES
+) -> float:
+    """Returns the smallest a for which the volumes int(a * b**x) of the partitions
+    x = 0, ..., num_partitions - 1 sum up to target
+
+    The sum of the volumes never decreases with a, so the interval which contains
+    a is narrowed down by evaluating num_candidates values of a at once until it
+    can't be split any further.
+    """
+    b_powers = powers(np.arange(num_partitions), b)
+
+    # sum(int(a * b**x)) > a * sum(b**x) - num_partitions, so hi is large enough
+    lo, hi = 0.0, (target + num_partitions) / b_powers.sum()
+
+    while True:
+        candidates = np.linspace(lo, hi, num_candidates + 2)[1:-1]
+        candidates = candidates[(candidates > lo) & (candidates < hi)]
+        if candidates.size == 0:
+            break
+
+        reached = volumes(candidates, b_powers).sum(axis=1) >= target
+        if not reached.any():
+            lo = candidates[-1]
+            continue
+        first = int(np.argmax(reached))
+        hi = candidates[first]
+        if first > 0:
+            lo = candidates[first - 1]
+
+    if volumes(np.array([hi]), b_powers).sum() != target:
+        raise Exception(
+            "Volumes of {} partitions with b={} can't sum up to {}".format(
+                num_partitions, b, target
+            )
+        )
+
+    return float(hi)
+
+
+def print_a_for_fashion_mnist():
+    for b in BS:
+        a = solve_a(100, b, target=54_000)
         print(f"{b}: {a},")
 
 
-def brute_force_a_for_cifar_10():
-    for b in [1.0, 1.005, 1.01, 1.015, 1.02, 1.025, 1.03, 1.035, 1.04, 1.045]:
-        a = brute_force_a(np.arange(100), b, target=45_000)
+def print_a_for_cifar_10():
+    for b in BS:
+        a = solve_a(100, b, target=45_000)
         print(f"{b}: {a},")
 
 
 # pylint: disable-msg=inconsistent-return-statements
 def brute_force_a(xs, b: float, target: int, step=1.0, start=1):
+    """Slow reference implementation of solve_a stepping through values of a"""
     a_best = 1
     for a in np.arange(start, target, step):
         ys = [int(exponential_decay(x, a=a, b=b)) for x in xs]
@@ -144,9 +214,9 @@ def plot_fashion_mnist_dist():
 
 def main():
     print("Fashion-MNIST:")
-    brute_force_a_for_fashion_mnist()
+    print_a_for_fashion_mnist()
     print("CIFAR-10:")
-    brute_force_a_for_cifar_10()
+    print_a_for_cifar_10()
     print("Plot Fashion-MNIST volume distributions")
     fmd_fpath = plot_fashion_mnist_dist()
     logging.info(f"Data plotted and saved in {fmd_fpath}")
@@ -48,6 +48,50 @@ def test_brute_force_a(b, expected, target):
     assert actual == expected
 
 
+@pytest.mark.parametrize(
+    "b, a_brute_force, target",
+    [
+        (1.0, 540.0, 54_000),
+        (1.005, 417.94000000000017, 54_000),
+        (1.045, 30.181500000000014, 54_000),
+        (1.01, 264.28, 45_000),
+    ],
+)
+def test_solve_a(b, a_brute_force, target):
+    # Prepare
+    xs = np.arange(100)
+
+    # Execute
+    a = pvd.solve_a(100, b=b, target=target)
+
+    # Assert
+    assert a <= a_brute_force
+    assert pvd._generate_volume_distribution(  # pylint: disable=protected-access
+        xs, a, b
+    ) == pvd._generate_volume_distribution(  # pylint: disable=protected-access
+        xs, a_brute_force, b
+    )
+
+
+@pytest.mark.parametrize("num_partitions, target", [(1000, 540_000), (10, 45_010)])
+def test_generate_volume_distributions(num_partitions, target):
+    # Execute
+    dists = pvd.generate_volume_distributions(num_partitions, target)
+
+    # Assert
+    assert [b for b, _ in dists] == pvd.BS
+    for _, dist in dists:
+        assert len(dist) == num_partitions
+        assert sum(dist) == target
+        assert dist == sorted(dist, reverse=True) or dist == sorted(dist)
+
+
+def test_solve_a_unreachable_target():
+    # b=1.0 gives every partition the same volume, so the sum is a multiple of 100
+    with pytest.raises(Exception):
+        pvd.solve_a(100, b=1.0, target=54_001)
+
+
 def test_dist_to_indicies():
     # Prepare
     dists = pvd.cifar_10_100p() + pvd.fashion_mnist_100p()
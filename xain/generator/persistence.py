@@ -6,28 +6,63 @@ A dataset is stored with N>=0 for N=num_splits-1 as
 - yN.npy
 - x_test.npy
 - y_test.npy
+
+or, if packed, as a single file (see `xain.datasets.packed`), or, if virtual, as
+an index map into a base dataset (see `xain.datasets.virtual`)
 """
+import hashlib
 import os
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from absl import logging
 
-from xain.helpers import sha1, storage
-from xain.types import FederatedDataset, FnameNDArrayTuple
+from xain.datasets import packed, virtual
+from xain.helpers import storage
+from xain.helpers.sha1 import checksum
+from xain.types import FederatedDataset, FnameNDArrayTuple, KerasDataset
+
+# Name of the file in a dataset directory which records how the dataset was generated
+STAMP_FNAME = "generator.json"
+
+
+class HashingWriter:
+    """File-like object which computes the sha1 checksum of everything written"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha1 = hashlib.sha1()
+
+    def write(self, data):
+        self.sha1.update(data)
+        return self.f.write(data)
+
+    def hexdigest(self) -> str:
+        return self.sha1.hexdigest()
 
 
 def save(fname: str, data: np.ndarray, storage_dir: str):
+    """Stores data as .npy file and returns its sha1 checksum
+
+    The checksum is computed while writing, so the file does not need to be
+    read again. The file is moved into place once complete.
+    """
     path = "{}/{}".format(storage_dir, fname)
-    np.save(path, data)
+    tmp_path = "{}.tmp".format(path)
+
+    with open(tmp_path, "wb") as f:
+        writer = HashingWriter(f)
+        np.lib.format.write_array(writer, np.asanyarray(data), allow_pickle=False)
+    os.replace(tmp_path, path)
 
     print(f"Saved {path}")
 
-    return sha1.checksum(path)
+    return writer.hexdigest()
 
 
 def dataset_to_fname_ndarray_tuple_list(
-    dataset: FederatedDataset
+    dataset: FederatedDataset,
 ) -> List[Tuple[str, np.ndarray]]:
     fname_ndarray_tuples: List[Tuple[str, np.ndarray]] = []
     xy_splits, xy_val, xy_test = dataset
@@ -56,7 +91,7 @@ def to_fname_ndarray_tuple(
     return [(name_x, x), (name_y, y)]
 
 
-def get_dataset_dir(dataset_name: str, local_generator_dir: str) -> str:
+def get_dataset_dir(dataset_name: str, local_generator_dir: Union[str, Path]) -> str:
     """Will return dataset directory and create it if its not already present"""
     dataset_dir = os.path.join(local_generator_dir, dataset_name)
 
@@ -66,18 +101,145 @@ def get_dataset_dir(dataset_name: str, local_generator_dir: str) -> str:
     return dataset_dir
 
 
-def save_splits(dataset_name: str, dataset: FederatedDataset, local_generator_dir: str):
-    fname_ndarray_tuple = dataset_to_fname_ndarray_tuple_list(dataset)
+def save_splits(
+    dataset_name: str,
+    dataset: FederatedDataset,
+    local_generator_dir: Union[str, Path],
+    pack: bool = False,
+    fingerprint: Optional[str] = None,
+):
+    """Stores dataset as .npy files, or as a single packed file if `pack` is set
 
+    If a fingerprint of the dataset's configuration is given it is recorded next
+    to the files, see `is_up_to_date`.
+    """
     dataset_dir = get_dataset_dir(
         dataset_name=dataset_name, local_generator_dir=local_generator_dir
     )
 
     logging.info("Storing dataset in {}".format(dataset_dir))
 
+    split_hashes: Dict
+    if pack:
+        split_hashes = save_packed(dataset, dataset_dir)
+    else:
+        split_hashes = save_ndarrays(dataset, dataset_dir)
+
+    write_hashes(dataset_name, dataset_dir, split_hashes, fingerprint)
+
+    logging.info("{} generated and stored\n".format(dataset_name))
+
+
+def save_base(
+    base_name: str,
+    keras_dataset: KerasDataset,
+    local_generator_dir: Union[str, Path],
+    fingerprint: Optional[str] = None,
+):
+    """Stores the training and test set of a Keras dataset as base dataset of
+    virtual datasets (see `xain.datasets.virtual`)"""
+    dataset_dir = get_dataset_dir(
+        dataset_name=base_name, local_generator_dir=local_generator_dir
+    )
+
+    logging.info("Storing base dataset in {}".format(dataset_dir))
+
+    split_hashes = {
+        split_id: [
+            save(fname="x_{}.npy".format(split_id), data=x, storage_dir=dataset_dir),
+            save(fname="y_{}.npy".format(split_id), data=y, storage_dir=dataset_dir),
+        ]
+        for split_id, (x, y) in zip(virtual.BASE_SPLIT_IDS, keras_dataset)
+    }
+
+    write_hashes(base_name, dataset_dir, split_hashes, fingerprint)
+
+
+def save_virtual(
+    dataset_name: str,
+    base_name: str,
+    index_map: virtual.IndexMap,
+    num_examples: int,
+    local_generator_dir: Union[str, Path],
+    fingerprint: Optional[str] = None,
+):
+    """Stores the index map of a virtual dataset referring to base_name, which
+    has num_examples examples in its training set"""
+    dataset_dir = get_dataset_dir(
+        dataset_name=dataset_name, local_generator_dir=local_generator_dir
+    )
+
+    fpath = os.path.join(dataset_dir, virtual.INDEX_FNAME)
+    virtual.write_index(fpath, index_map, num_examples)
+
+    print(f"Saved {fpath}")
+
+    split_hashes = {virtual.HASH_KEY: {"base": base_name, "index": checksum(fpath)}}
+    write_hashes(dataset_name, dataset_dir, split_hashes, fingerprint)
+
+    logging.info("{} generated and stored\n".format(dataset_name))
+
+
+def write_hashes(
+    dataset_name: str, dataset_dir: str, split_hashes: Dict, fingerprint: Optional[str]
+):
+    hash_file = get_hash_file(dataset_dir, dataset_name)
+    storage.write_json(split_hashes, hash_file)
+
+    if fingerprint is not None:
+        stamp = {"fingerprint": fingerprint, "hashes": split_hashes}
+        storage.write_json(stamp, os.path.join(dataset_dir, STAMP_FNAME))
+
+
+def get_hash_file(dataset_dir: str, dataset_name: str) -> str:
+    return os.path.join(dataset_dir, f"../../{dataset_name}.json")
+
+
+def is_up_to_date(
+    dataset_name: str, local_generator_dir: Union[str, Path], fingerprint: str
+) -> bool:
+    """Returns True if the dataset was stored by `save_splits` with the same
+    fingerprint and neither its hash file nor any of its files went missing"""
+    dataset_dir = os.path.join(local_generator_dir, dataset_name)
+    stamp_file = os.path.join(dataset_dir, STAMP_FNAME)
+    hash_file = get_hash_file(dataset_dir, dataset_name)
+    if not os.path.isfile(stamp_file) or not os.path.isfile(hash_file):
+        return False
+
+    stamp = storage.read_json(stamp_file)
+    split_hashes = stamp["hashes"]
+    if (
+        stamp["fingerprint"] != fingerprint
+        or storage.read_json(hash_file) != split_hashes
+    ):
+        return False
+
+    if packed.HASH_KEY in split_hashes:
+        fnames = [packed.PACKED_FNAME]
+    elif virtual.HASH_KEY in split_hashes:
+        fnames = [virtual.INDEX_FNAME]
+    else:
+        fnames = [
+            "{}_{}.npy".format(name, key) for key in split_hashes for name in ["x", "y"]
+        ]
+    return all(os.path.isfile(os.path.join(dataset_dir, fname)) for fname in fnames)
+
+
+def save_packed(dataset: FederatedDataset, dataset_dir: str) -> Dict[str, str]:
+    fpath = os.path.join(dataset_dir, packed.PACKED_FNAME)
+    sha1cs = packed.write(fpath, dataset)
+
+    print(f"Saved {fpath}")
+
+    return {packed.HASH_KEY: sha1cs}
+
+
+def save_ndarrays(
+    dataset: FederatedDataset, dataset_dir: str
+) -> Dict[str, List[Optional[str]]]:
     split_hashes: Dict[str, List[Optional[str]]] = {}
 
-    for fname, ndarr in fname_ndarray_tuple:
+    for fname, ndarr in dataset_to_fname_ndarray_tuple_list(dataset):
         sha1cs = save(fname=fname, data=ndarr, storage_dir=dataset_dir)
 
         storage_key = fname[2:-4]
@@ -87,7 +249,4 @@ def save_splits(dataset_name: str, dataset: FederatedDataset, local_generator_di
 
         split_hashes[storage_key][0 if "x_" in fname else 1] = sha1cs
 
-    hash_file = os.path.join(dataset_dir, f"../../{dataset_name}.json")
-    storage.write_json(split_hashes, hash_file)
-
-    logging.info("{} generated and stored\n".format(dataset_name))
+    return split_hashes
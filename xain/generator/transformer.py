@@ -1,13 +1,21 @@
-from typing import Callable, Tuple
+from typing import Callable, Optional, Tuple
 
 import numpy as np
 from numpy import ndarray
 
 from .class_per_partition_distribution import distribution as cpp_distribution
+from .class_per_partition_distribution import sample_distribution
 
 # Passed to RandomState for predictable shuffling
 SEED = 851746
 
+# Each transformer reorders the examples of a dataset. The reordering only depends
+# on the labels, so every transformer is based on a function computing a
+# permutation from y alone; the (large) x is then gathered exactly once.
+# Transformers declare that function with `label_only` so that a chain of
+# transformers can be composed into a single index vector (see
+# `xain.generator.data.create_federated_dataset`).
+
 
 def transfomer_decorator(func: Callable):
     """The decorator will validate the input and result of any
@@ -32,20 +40,43 @@ def transfomer_decorator(func: Callable):
     return wrapper
 
 
-@transfomer_decorator
-def random_shuffle(x: ndarray, y: ndarray) -> Tuple[ndarray, ndarray]:
+def label_only(index_fn: Callable[..., ndarray]):
+    """Declares that a transformer only selects and reorders examples based on y
+
+    `index_fn(y, **kwargs)` has to return the indices of the examples (in order)
+    which `transformer(x, y, **kwargs)` returns. It is attached to the transformer
+    as `index_fn`.
+    """
+
+    def decorator(transformer: Callable) -> Callable:
+        transformer.index_fn = index_fn  # type: ignore
+        return transformer
+
+    return decorator
+
+
+def previous_occurrences(values: ndarray) -> ndarray:
+    """Returns for each element how often its value occurred before it
+
+    E.g. [2, 0, 2, 2, 0] => [0, 0, 1, 2, 1]
+    """
+    order = np.argsort(values, kind="stable")
+    values_sorted = values[order]
+    # Index of the first occurrence of each value in the sorted array
+    first = np.searchsorted(values_sorted, values_sorted)
+    occurrences = np.empty(values.shape, dtype=np.int64)
+    occurrences[order] = np.arange(values.shape[0]) - first
+    return occurrences
+
+
+def random_shuffle_permutation(y: ndarray) -> ndarray:
     # pylint: disable=no-member
-    permutation = np.random.RandomState(seed=SEED).permutation(x.shape[0])
-    x_shuffled = x[permutation]
-    y_shuffled = y[permutation]
-    return x_shuffled, y_shuffled
+    return np.random.RandomState(seed=SEED).permutation(y.shape[0])
 
 
-@transfomer_decorator
-def classes_balanced_randomized_per_partition(
-    x: ndarray, y: ndarray, num_partitions=10
-) -> Tuple[ndarray, ndarray]:
-    """Shuffles y so that only a each class is in each partition"""
+def classes_balanced_randomized_per_partition_permutation(
+    y: ndarray, num_partitions=10
+) -> ndarray:
     example_count = y.shape[0]
     section_size = int(example_count / num_partitions)
 
@@ -53,13 +84,10 @@ def classes_balanced_randomized_per_partition(
         example_count % num_partitions == 0
     ), "Number of examples needs to be evenly divisible by section_count"
 
-    x_shuffled, y_shuffled = random_shuffle(x, y)
+    shuffle_index = random_shuffle_permutation(y)
 
     # Array of indices that sort a along the specified axis.
-    sort_index = np.argsort(y_shuffled, axis=0)
-
-    x_sorted = x_shuffled[sort_index]
-    y_sorted = y_shuffled[sort_index]
+    sort_index = np.argsort(y[shuffle_index], axis=0)
 
     balance_index = (
         np.array(range(example_count), np.int64)
@@ -68,18 +96,10 @@ def classes_balanced_randomized_per_partition(
         .reshape(example_count)
     )
 
-    x_balanced = x_sorted[balance_index]
-    y_balanced = y_sorted[balance_index]
-
-    return x_balanced, y_balanced
+    return shuffle_index[sort_index][balance_index]
 
 
-@transfomer_decorator
-def sort_by_class(x: ndarray, y: ndarray) -> Tuple[ndarray, ndarray]:
-    """
-    Shuffles y so that only a single label is in each partition
-    Number of partitions will depend on number of unique labels
-    """
+def sort_by_class_permutation(y: ndarray) -> ndarray:
     example_count = y.shape[0]
     partition_count = np.unique(y).shape[0]
 
@@ -88,23 +108,10 @@ def sort_by_class(x: ndarray, y: ndarray) -> Tuple[ndarray, ndarray]:
     ), "Number of examples needs to be evenly divisible by partition_count"
 
     # Array of indices that sort a along the specified axis.
-    sort_indexes = np.argsort(y, axis=0)
+    return np.argsort(y, axis=0)
 
-    x_sorted = x[sort_indexes]
-    y_sorted = y[sort_indexes]
 
-    return x_sorted, y_sorted
-
-
-@transfomer_decorator
-def one_biased_class_per_partition(  # pylint: disable=R0914
-    x: ndarray, y: ndarray, bias=1000
-) -> Tuple[ndarray, ndarray]:
-    """
-    Shuffle y so that the labels are uniformly distributed in each section
-    except one label which will have a bias. Considering the bias the rest
-    needs to be evenly divisible
-    """
+def one_biased_class_per_partition_permutation(y: ndarray, bias=1000) -> ndarray:
     example_count = y.shape[0]
     # section_count is equal to number of unique labels
     unique_labels_set = set(y)
@@ -116,71 +123,42 @@ def one_biased_class_per_partition(  # pylint: disable=R0914
     ), "Number of examples needs to be evenly divisible by section_count"
 
     # Array of indices that sort a along the specified axis.
-    sort_indexes = np.argsort(y, axis=0)
-
-    x_sorted = x[sort_indexes]
-    y_sorted = y[sort_indexes]
-
-    x_splits = np.split(x_sorted, indices_or_sections=section_count, axis=0)
-    y_splits = np.split(y_sorted, indices_or_sections=section_count, axis=0)
+    sort_index = np.argsort(y, axis=0).reshape((section_count, section_size))
 
-    # Extract first "bias" from each split
-    x_biased_splits = [x_split[:bias] for x_split in x_splits]
-    y_biased_splits = [y_split[:bias] for y_split in y_splits]
+    # Extract first "bias" from each section, the rest is shuffled balanced
+    biased_index = sort_index[:, :bias]
+    unbiased_index = sort_index[:, bias:].reshape(-1)
 
-    for y_biased_split in y_biased_splits:
+    for y_biased_split in y[biased_index]:
         # Check that we got single label splits
         assert len(set(y_biased_split)) == 1
 
-    # Merge rest
-    x_unbiased = np.concatenate([x_split[bias:] for x_split in x_splits])
-    y_unbiased = np.concatenate([y_split[bias:] for y_split in y_splits])
-
-    assert x_unbiased.shape[0] == section_count * (
+    assert unbiased_index.shape[0] == section_count * (
         section_size - bias
     ), "Length of unbiased elements should be equal to original length minus extracted bias"
 
     # Create balanced shuffle of rest
-    x_balanced, y_balanced = classes_balanced_randomized_per_partition(
-        x_unbiased, y_unbiased, num_partitions=section_count
-    )
+    balanced_index = unbiased_index[
+        classes_balanced_randomized_per_partition_permutation(
+            y[unbiased_index], num_partitions=section_count
+        )
+    ].reshape((section_count, -1))
 
-    for y_balanced_split in np.split(y_balanced, indices_or_sections=section_count):
+    for y_balanced_split in y[balanced_index]:
         assert set(y_balanced_split) == unique_labels_set
 
-    # split unbiased splits again to be merged with biased splits
-    x_balanced_splits = np.split(x_balanced, indices_or_sections=section_count, axis=0)
-    y_balanced_splits = np.split(y_balanced, indices_or_sections=section_count, axis=0)
+    # Merge biased and balanced sections
+    return np.concatenate([biased_index, balanced_index], axis=1).reshape(-1)
 
-    x_merged = np.concatenate(
-        [
-            np.concatenate([x1, x2], axis=0)
-            for x1, x2 in zip(x_biased_splits, x_balanced_splits)
-        ]
-    )
-    y_merged = np.concatenate(
-        [
-            np.concatenate([y1, y2], axis=0)
-            for y1, y2 in zip(y_biased_splits, y_balanced_splits)
-        ]
-    )
-
-    assert x.shape == x_merged.shape, "Shape of x should not change"
-
-    return x_merged, y_merged
 
-
-@transfomer_decorator
-def class_per_partition(  # pylint: disable=R0914
-    x: ndarray, y: ndarray, num_partitions: int, cpp: int
-) -> Tuple[ndarray, ndarray]:
-    """
-    Does the following:
-    1. Sort by label
-    2. Shuffles sections randomley
-    """
-    assert x.shape[0] % num_partitions == 0, (
-        f"Number of examples ({x.shape[0]}) needs to be divisible by "
+def class_per_partition_permutation(
+    y: ndarray, num_partitions: int, cpp: int, seed: Optional[int] = None
+) -> ndarray:
+    """Without a seed the class sections are distributed like in all published
+    datasets, with a seed by `sample_distribution` which scales to many thousands
+    of partitions"""
+    assert y.shape[0] % num_partitions == 0, (
+        f"Number of examples ({y.shape[0]}) needs to be divisible by "
         + "num_partitions ({num_partitions})"
     )
 
@@ -192,15 +170,15 @@ def class_per_partition(  # pylint: disable=R0914
         + f"by number of classes ({num_classes})"
     )
 
-    assert x.shape[0] % num_sections == 0, (
-        f"number of examples ({x.shape[0]}) needs to be divisible "
+    assert y.shape[0] % num_sections == 0, (
+        f"number of examples ({y.shape[0]}) needs to be divisible "
         + f"by number of sections ({cpp * num_partitions})"
     )
 
-    section_size = x.shape[0] // num_sections  # number of examples per section
+    section_size = y.shape[0] // num_sections  # number of examples per section
 
-    assert (x.shape[0] / num_classes) % section_size == 0, (
-        f"number of examples per class ({x.shape[0] / num_classes}) needs to be divisible "
+    assert (y.shape[0] / num_classes) % section_size == 0, (
+        f"number of examples per class ({y.shape[0] / num_classes}) needs to be divisible "
         + f"by number of examples per section ({section_size})"
     )
 
@@ -210,43 +188,88 @@ def class_per_partition(  # pylint: disable=R0914
     # After sorting we will have num_labels sorted sections (e.g. 10 for MNIST)
     # e.g. with 4 labels and 8 examples (assuming each label occurs equal times)
     # => y = [0, 0, 1, 1, 2, 2, 3, 3]
-    x_sorted = x[sort_indices]
-    y_sorted = y[sort_indices]
-
     # We want to achive the following structure
     # global:      [ class 1 , ..., class N ]
     # per class:   [ section 1, ..., section N ]
     # per section: [ example 1, ..., example N ]
-    new_x_shape = (num_classes, num_sections // num_classes, section_size, *x.shape[1:])
-    new_y_shape = (num_classes, num_sections // num_classes, section_size, *y.shape[1:])
-
-    x_sections = x_sorted.reshape(new_x_shape)
-    y_sections = y_sorted.reshape(new_y_shape)
+    section_indices = sort_indices.reshape(
+        (num_classes, num_sections // num_classes, section_size)
+    )
 
     # Type of dist is List[List[int]] with length num_partitions where each sublist
     # has length num_class and contains at each index a one if a class section should
     # occur in the final dataset partition
-    cpp_dist = cpp_distribution(
-        num_classes=num_classes, num_partitions=num_partitions, cpp=cpp
-    )
-
+    if seed is None:
+        cpp_dist = cpp_distribution(
+            num_classes=num_classes, num_partitions=num_partitions, cpp=cpp
+        )
+    else:
+        cpp_dist = sample_distribution(
+            num_classes=num_classes, num_partitions=num_partitions, cpp=cpp, seed=seed
+        )
+
+    # The n-th occurrence of a class takes the n-th section of that class
     _, class_indices = np.nonzero(cpp_dist)
-    section_indices = np.zeros((num_classes), dtype=np.int8)
+    section_numbers = previous_occurrences(class_indices)
+
+    return section_indices[class_indices, section_numbers].reshape(-1)
+
+
+@label_only(random_shuffle_permutation)
+@transfomer_decorator
+def random_shuffle(x: ndarray, y: ndarray) -> Tuple[ndarray, ndarray]:
+    permutation = random_shuffle_permutation(y)
+    return x[permutation], y[permutation]
+
+
+@label_only(classes_balanced_randomized_per_partition_permutation)
+@transfomer_decorator
+def classes_balanced_randomized_per_partition(
+    x: ndarray, y: ndarray, num_partitions=10
+) -> Tuple[ndarray, ndarray]:
+    """Shuffles y so that only a each class is in each partition"""
+    permutation = classes_balanced_randomized_per_partition_permutation(
+        y, num_partitions=num_partitions
+    )
+    return x[permutation], y[permutation]
 
-    x_dist = []
-    y_dist = []
 
-    for c_idx in class_indices:
-        s_idx = section_indices[c_idx]
-        section_indices[c_idx] += 1
+@label_only(sort_by_class_permutation)
+@transfomer_decorator
+def sort_by_class(x: ndarray, y: ndarray) -> Tuple[ndarray, ndarray]:
+    """
+    Shuffles y so that only a single label is in each partition
+    Number of partitions will depend on number of unique labels
+    """
+    permutation = sort_by_class_permutation(y)
+    return x[permutation], y[permutation]
 
-        x_sec = x_sections[c_idx][s_idx]
-        y_sec = y_sections[c_idx][s_idx]
 
-        x_dist.append(x_sec)
-        y_dist.append(y_sec)
+@label_only(one_biased_class_per_partition_permutation)
+@transfomer_decorator
+def one_biased_class_per_partition(
+    x: ndarray, y: ndarray, bias=1000
+) -> Tuple[ndarray, ndarray]:
+    """
+    Shuffle y so that the labels are uniformly distributed in each section
+    except one label which will have a bias. Considering the bias the rest
+    needs to be evenly divisible
+    """
+    permutation = one_biased_class_per_partition_permutation(y, bias=bias)
+    return x[permutation], y[permutation]
 
-    x_dist = np.concatenate(x_dist)
-    y_dist = np.concatenate(y_dist)
 
-    return (x_dist, y_dist)
+@label_only(class_per_partition_permutation)
+@transfomer_decorator
+def class_per_partition(
+    x: ndarray, y: ndarray, num_partitions: int, cpp: int, seed: Optional[int] = None
+) -> Tuple[ndarray, ndarray]:
+    """
+    Does the following:
+    1. Sort by label
+    2. Shuffles sections randomley
+    """
+    permutation = class_per_partition_permutation(
+        y, num_partitions=num_partitions, cpp=cpp, seed=seed
+    )
+    return x[permutation], y[permutation]
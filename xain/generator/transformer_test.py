@@ -128,10 +128,11 @@ def test_one_biased_class_per_partition(bias, example_count):  # pylint: disable
 
 
 @pytest.mark.parametrize(
-    "example_count, num_partitions, cpp", [(44000, 100, 4), (54000, 100, 6)]
+    "example_count, num_partitions, cpp, seed",
+    [(44000, 100, 4, None), (54000, 100, 6, None), (50000, 5000, 2, 1)],
 )
 def test_class_per_partition(
-    cpp, num_partitions, example_count
+    cpp, num_partitions, example_count, seed
 ):  # pylint: disable=R0914
     # Prepare
     num_unique_classes = 10
@@ -149,7 +150,7 @@ def test_class_per_partition(
 
     # Execute
     x_shuffled, y_shuffled = transformer.class_per_partition(
-        x, y, num_partitions=num_partitions, cpp=cpp
+        x, y, num_partitions=num_partitions, cpp=cpp, seed=seed
     )
 
     # Assert
@@ -179,7 +180,7 @@ def test_class_per_partition(
 )
 def test_class_per_partition_verbose(cpp, num_partitions, example_count):
     """Purpose of this test is to test even more verbose"""
-    test_class_per_partition(cpp, num_partitions, example_count)
+    test_class_per_partition(cpp, num_partitions, example_count, seed=None)
 
 
 @pytest.mark.parametrize(
@@ -221,3 +222,48 @@ def test_sort_by_class(num_unique_classes, example_count):
         # check that x,y is correctly matched
         for x_i, y_i in zip(x_split, y_split):
             assert x_i == y_i
+
+
+def test_previous_occurrences():
+    # Prepare
+    values = np.array([2, 0, 2, 2, 0, 1])
+
+    # Execute
+    actual = transformer.previous_occurrences(values)
+
+    # Assert
+    np.testing.assert_array_equal(actual, [0, 0, 1, 2, 1, 0])
+
+
+def test_class_per_partition_permutation():
+    # Prepare
+    example_count, num_partitions, cpp = 4000, 100, 2
+    y = np.tile(np.arange(10, dtype=np.int64), example_count // 10)
+    x = np.arange(example_count)  # Each x is its own original index
+
+    # Execute
+    permutation = transformer.class_per_partition_permutation(
+        y, num_partitions=num_partitions, cpp=cpp
+    )
+    x_shuffled, y_shuffled = transformer.class_per_partition(
+        x, y, num_partitions=num_partitions, cpp=cpp
+    )
+
+    # Assert
+    np.testing.assert_array_equal(np.sort(permutation), np.arange(example_count))
+    np.testing.assert_array_equal(x_shuffled, permutation)
+    np.testing.assert_array_equal(y_shuffled, y[permutation])
+
+
+def test_label_only():
+    # Prepare
+    x = np.arange(100)
+    y = np.tile(np.arange(10), 10)
+
+    # Execute
+    permutation = transformer.sort_by_class.index_fn(y)
+    x_sorted, y_sorted = transformer.sort_by_class(x, y)
+
+    # Assert
+    np.testing.assert_array_equal(x[permutation], x_sorted)
+    np.testing.assert_array_equal(y[permutation], y_sorted)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from xain.benchmark.net import model_fns
+from xain.datasets import prep
+
+from . import performance
+
+requires_mixed_precision = pytest.mark.skipif(
+    not performance.mixed_precision_available(),
+    reason="mixed precision requires TensorFlow 2.1 or newer",
+)
+
+
+def create_xy_prepared(num_examples: int = 256):
+    """Examples whose class is the position of a bright band, so they are learned
+    within few epochs"""
+    random = np.random.RandomState(0)
+    y = random.randint(0, 10, size=num_examples)
+    x = random.randint(0, 64, size=(num_examples, 28, 28)).astype(np.uint8)
+    for x_i, y_i in zip(x, y):
+        x_i[2 * y_i : 2 * y_i + 3, :] = 255
+    return prep.prepare_xy((x, y))
+
+
+def train_and_evaluate(theta, xy_prepared, xla: bool, precision: str):
+    performance.configure(xla, precision)
+    try:
+        model = model_fns["orig_2nn"]()
+        model.set_weights(theta)
+        x, y = xy_prepared
+        model.fit(x, y, batch_size=32, epochs=2, shuffle=False, verbose=0)
+        loss, acc = model.evaluate(x, y, verbose=0)
+        return loss, acc, model.get_weights()
+    finally:
+        performance.configure()
+
+
+@requires_mixed_precision
+def test_configure_mixed_bfloat16():
+    # Execute
+    performance.configure(precision_name="mixed_bfloat16")
+    try:
+        model = model_fns["orig_2nn"]()
+    finally:
+        performance.configure()
+
+    # Assert
+    assert performance.mode() == (False, "float32")
+    hidden_layer, output_layer = model.layers[2], model.layers[-1]
+    assert hidden_layer.compute_dtype == "bfloat16"
+    assert output_layer.compute_dtype == "float32"
+    assert model.output.dtype == tf.float32
+    # Weights exchanged with the coordinator stay float32
+    assert all(w.dtype == np.float32 for w in model.get_weights())
+    # bfloat16 doesn't need loss scaling
+    assert not isinstance(model.optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "xla, precision, rtol",
+    [
+        (True, "float32", 1e-4),
+        pytest.param(False, "mixed_bfloat16", 1e-2, marks=requires_mixed_precision),
+    ],
+)
+def test_metric_equivalence(xla, precision, rtol):
+    # Prepare
+    theta = model_fns["orig_2nn"]().get_weights()
+    xy_prepared = create_xy_prepared()
+    loss_expected, acc_expected, _ = train_and_evaluate(
+        theta, xy_prepared, xla=False, precision="float32"
+    )
+
+    # Execute
+    loss_actual, acc_actual, theta_actual = train_and_evaluate(
+        theta, xy_prepared, xla=xla, precision=precision
+    )
+
+    # Assert
+    np.testing.assert_allclose(loss_actual, loss_expected, rtol=rtol)
+    np.testing.assert_allclose(acc_actual, acc_expected, atol=0.02)
+    assert all(w.dtype == np.float32 for w in theta_actual)
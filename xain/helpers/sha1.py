@@ -1,13 +1,15 @@
 import hashlib
 
+CHUNK_SIZE = 1 << 20  # Hash files in chunks of 1 MiB to bound memory usage
 
-def checksum(fpath: str):
+
+def checksum(fpath: str, chunk_size: int = CHUNK_SIZE):
     """Return checksum of file a fpath"""
     sha1 = hashlib.sha1()
 
     with open(fpath, "rb") as f:
         while True:
-            data = f.read()
+            data = f.read(chunk_size)
             if not data:
                 break
             sha1.update(data)
@@ -0,0 +1,87 @@
+"""Timing of the hot path of federated training
+
+Code marks a section with
+
+    with timing.section("fit"):
+        ...
+
+While timing is disabled (the default) `section` returns a shared no-op context
+manager, so marked sections cost next to nothing. Once enabled, the durations of
+all sections are summed up by name (across all threads) until `end_round`
+records them as the timings of a round.
+"""
+import threading
+import time
+from typing import Dict, List
+
+enabled = False
+
+lock = threading.Lock()
+# Seconds spent in each section since the last call to `pop`
+durations: Dict[str, float] = {}
+# Timings of all rounds recorded by `end_round`
+rounds: List[Dict[str, float]] = []
+
+
+class _Section:
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SECTION = _NoSection()
+
+
+def enable(on: bool = True) -> None:
+    global enabled  # pylint: disable=global-statement
+    enabled = on
+
+
+def section(name: str):
+    """Returns a context manager adding the time spent in it to section name"""
+    if not enabled:
+        return _NO_SECTION
+    return _Section(name)
+
+
+def add(name: str, duration: float) -> None:
+    with lock:
+        durations[name] = durations.get(name, 0.0) + duration
+
+
+def merge(other: Dict[str, float]) -> None:
+    """Adds durations measured elsewhere, e.g. in a worker process"""
+    for name, duration in other.items():
+        add(name, duration)
+
+
+def pop() -> Dict[str, float]:
+    """Returns and resets the durations of all sections"""
+    global durations  # pylint: disable=global-statement
+    with lock:
+        popped, durations = durations, {}
+    return popped
+
+
+def end_round() -> Dict[str, float]:
+    """Records the durations since the last round as timings of a round"""
+    round_durations = pop()
+    if enabled:
+        rounds.append(round_durations)
+    return round_durations
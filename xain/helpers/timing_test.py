@@ -0,0 +1,43 @@
+import pytest
+
+from . import timing
+
+
+@pytest.fixture
+def timing_enabled(monkeypatch):
+    monkeypatch.setattr(timing, "durations", {})
+    monkeypatch.setattr(timing, "rounds", [])
+    timing.enable()
+    yield
+    timing.enable(False)
+
+
+def test_section_disabled(monkeypatch):
+    # Prepare
+    monkeypatch.setattr(timing, "durations", {})
+
+    # Execute
+    with timing.section("fit"):
+        pass
+
+    # Assert
+    assert timing.pop() == {}
+    assert timing.end_round() == {}
+
+
+def test_section(
+    timing_enabled,
+):  # pylint: disable=unused-argument,redefined-outer-name
+    # Execute
+    for _ in range(2):
+        with timing.section("fit"):
+            pass
+    timing.merge({"fit": 1.0, "dataset": 0.5})
+    round_timings = timing.end_round()
+
+    # Assert
+    assert set(round_timings) == {"fit", "dataset"}
+    assert round_timings["fit"] >= 1.0
+    assert round_timings["dataset"] == 0.5
+    assert timing.rounds == [round_timings]
+    assert timing.pop() == {}
@@ -5,12 +5,17 @@ from typing import Dict
 import boto3
 from absl import flags, logging
 
+from xain import config
+from xain.datasets import cache
 from xain.helpers import project
 from xain.ops.ec2 import user_data
 
 FLAGS = flags.FLAGS
 root_dir = project.root()
 
+# Mount point of the host's dataset cache inside of containers
+CONTAINER_DATASETS_CACHE_DIR = "/root/.xain/datasets-cache"
+
 # Note:
 # We actually would like to use the m5.large up to m5.24xlarge
 # but AWS is not easily willing to give us the increase without
@@ -29,6 +34,9 @@ def docker(image: str, timeout: int = 300, instance_cores=2, **kwargs):
     """Run train in docker while accepting an arbitrary
     number of absl flags to be passed to the docker container
 
+    The dataset is fetched into the host's dataset cache first, which every
+    container mounts read-only and memory-maps the dataset from
+
     Args:
         image (str): docker image name
         timeout (int): timeout in minutes
@@ -41,6 +49,13 @@ def docker(image: str, timeout: int = 300, instance_cores=2, **kwargs):
         instance_cores if instance_cores <= os.cpu_count() else os.cpu_count()
     )
 
+    # All containers on this host share one read-only copy of each dataset
+    datasets_cache_dir = str(config.datasets_cache_dir_default)
+    if kwargs.get("dataset") is not None:
+        cache.prefetch_dataset(
+            datasets_cache_dir, kwargs["dataset"], FLAGS.datasets_repository
+        )
+
     command = [
         "docker",
         "run",
@@ -50,10 +65,14 @@ def docker(image: str, timeout: int = 300, instance_cores=2, **kwargs):
         f"--cpus={instance_cores}",
         "-e",
         f"S3_RESULTS_BUCKET={FLAGS.S3_results_bucket}",
+        "-v",
+        f"{datasets_cache_dir}:{CONTAINER_DATASETS_CACHE_DIR}:ro",
         image,
         "python",
         "-m",
         "xain.benchmark.exec",
+        f"--datasets_cache_dir={CONTAINER_DATASETS_CACHE_DIR}",
+        "--mmap_datasets=True",
     ]
 
     for arg in kwargs: